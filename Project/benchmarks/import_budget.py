@@ -0,0 +1,89 @@
+# benchmarks/import_budget.py
+"""Бюджет времени импорта при холодном старте окна входа
+
+Запускает импорт src.ui.login_window в отдельных процессах с
+python -X importtime, берет медиану по нескольким запускам и проверяет,
+что она укладывается в бюджет, а тяжелые модули при этом не загружены.
+
+    python benchmarks/import_budget.py [--runs 5] [--budget-ms 250]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_MODULE = "src.ui.login_window"
+
+# Время импорта окна входа (вместе с PySide6.QtWidgets), мс
+IMPORT_BUDGET_MS = 250
+
+# Модули, которые не должны загружаться до входа пользователя
+FORBIDDEN_MODULES = (
+    "matplotlib",
+    "pandas",
+    "pyarrow",
+    "numpy",
+    "sqlite3",
+    "src.ui.main_window",
+    "src.database.database",
+)
+
+
+def measure_once():
+    """Один запуск: время импорта по модулям (мкс) и список загруженных модулей"""
+    code = f"import sys, json, {ENTRY_MODULE}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        if cumulative_us.isdigit():
+            cumulative[name] = int(cumulative_us)
+
+    return cumulative, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    totals = []
+    last = {}
+    modules = []
+    for _ in range(args.runs):
+        last, modules = measure_once()
+        totals.append(last.get(ENTRY_MODULE, 0) / 1000)
+
+    median_ms = statistics.median(totals)
+    print(f"{ENTRY_MODULE}: медиана {median_ms:.1f} мс за {args.runs} запусков "
+          f"(мин {min(totals):.1f}, макс {max(totals):.1f}), бюджет {args.budget_ms:.0f} мс")
+
+    print("Самые долгие модули верхнего уровня (последний запуск):")
+    top_level = {name: us for name, us in last.items() if "." not in name or name.startswith("src.")}
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {us / 1000:8.1f} мс  {name}")
+
+    loaded = [name for name in FORBIDDEN_MODULES
+              if any(module == name or module.startswith(name + ".") for module in modules)]
+    failed = False
+    if loaded:
+        print("Загружены модули, которые должны загружаться позже: " + ", ".join(loaded))
+        failed = True
+    if median_ms > args.budget_ms:
+        print("Бюджет времени импорта превышен")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/login_latency.py
+"""Время входа при разной стоимости хэширования пароля
+
+Для каждого числа итераций PBKDF2 регистрирует пользователя во
+временной базе и измеряет проверку пароля: первую (с PBKDF2), повторную
+(из кэша сеанса) и полный путь через AuthWorker в пуле потоков. Для
+последнего показывается и самая долгая пауза цикла событий Qt -
+она не должна расти вместе со стоимостью.
+
+    python benchmarks/login_latency.py [--runs 5] [--costs 50000 100000 200000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from PySide6.QtCore import QCoreApplication, QEventLoop, QThreadPool, QTimer
+from src.database import database, security
+from src.database.connection import close_all_connections
+from src.ui.auth_worker import AuthWorker
+
+DEFAULT_COSTS = (50_000, 100_000, 200_000, 400_000, 800_000)
+PASSWORD = "benchmark-password"
+# Период таймера, по которому отслеживаются паузы цикла событий, мс
+TICK_MS = 5
+
+
+def median_ms(function, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def worker_login(username):
+    """Вход через AuthWorker: время до сигнала и наибольшая пауза цикла событий, мс"""
+    loop = QEventLoop()
+    ticks = [time.perf_counter()]
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(TICK_MS)
+
+    database.session_cache.forget()
+    worker = AuthWorker('login', username, PASSWORD)
+    worker.signals.finished.connect(lambda ok: loop.quit())
+    start = time.perf_counter()
+    QThreadPool.globalInstance().start(worker)
+    loop.exec()
+    elapsed = (time.perf_counter() - start) * 1000
+    timer.stop()
+
+    gaps = [(b - a) * 1000 for a, b in zip(ticks, ticks[1:])]
+    return elapsed, max(gaps, default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--costs", type=int, nargs="+", default=DEFAULT_COSTS)
+    args = parser.parse_args()
+
+    app = QCoreApplication.instance() or QCoreApplication([])  # цикл событий для сигналов AuthWorker
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "users.db")
+        database._database_ready = False
+
+        print(f"{'итерации':>10} {'регистрация':>12} {'вход':>10} {'из кэша':>10} "
+              f"{'через пул':>10} {'пауза UI':>10}   (мс, медиана из {args.runs})")
+        for iterations in args.costs:
+            # Стоимость задается так же, как в приложении - константой модуля security
+            security.PASSWORD_ITERATIONS = iterations
+            username = f"user_{iterations}"
+            register = median_ms(lambda: database.add_user(f"{username}_{time.perf_counter_ns()}",
+                                                           PASSWORD), args.runs)
+            database.add_user(username, PASSWORD)
+
+            def cold_login():
+                database.session_cache.forget()
+                assert database.check_user(username, PASSWORD)
+
+            cold = median_ms(cold_login, args.runs)
+            cached = median_ms(lambda: database.check_user(username, PASSWORD), args.runs)
+
+            results = [worker_login(username) for _ in range(args.runs)]
+            pooled = statistics.median(elapsed for elapsed, _ in results)
+            stall = max(gap for _, gap in results)
+
+            print(f"{iterations:>10} {register:>12.1f} {cold:>10.1f} {cached:>10.3f} "
+                  f"{pooled:>10.1f} {stall:>10.1f}")
+
+        close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
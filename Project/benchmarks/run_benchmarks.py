@@ -0,0 +1,238 @@
+# benchmarks/run_benchmarks.py
+"""Бенчмарки горячих путей: загрузка данных, отрисовка таблицы, правка, коэффициенты
+
+Строит синтетическую базу нужного размера (benchmarks/synthetic.py),
+открывает главное окно без дисплея (QT_QPA_PLATFORM=offscreen) и для
+каждого сценария измеряет медиану времени и пик памяти Python
+(tracemalloc, отдельным прогоном). Результаты сравниваются с
+benchmarks/baselines.json; превышение допуска - код выхода 1.
+
+    python benchmarks/run_benchmarks.py                      # preset small
+    python benchmarks/run_benchmarks.py --preset medium --save-baseline
+    python benchmarks/run_benchmarks.py --companies 20 --rows 300 --years 8
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+from src.analysis.batch import analyze
+from src.analysis.coefficients import CoefficientEngine
+from src.database.connection import get_connection, close_thread_connections
+from src.database.data_manager import CAPITAL_TABLE, COSTS_TABLE
+from src.database.snapshot import open_snapshot, snapshot_path
+from src.ui.main_window import MainWindow
+from synthetic import generate_database, entity_name
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+PRESETS = {
+    'small': dict(companies=5, rows=100, years=3),
+    'medium': dict(companies=50, rows=500, years=5),
+    'large': dict(companies=500, rows=1000, years=10),
+}
+
+# Допустимое превышение базовой линии: время шумит сильнее памяти
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.2
+# Разница меньше этих порогов - шум, а не регрессия
+MIN_TIME_DELTA_MS = 1.0
+MIN_MEMORY_DELTA_KB = 64
+# Правок ячеек за один прогон сценария handle_value_edited
+EDITS_PER_RUN = 50
+
+
+def wait_until(condition, timeout_ms=60_000):
+    """Крутит цикл событий Qt, пока condition() не станет истинным"""
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: condition() and loop.quit())
+    timer.start(1)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    timer.stop()
+
+
+class Scenarios:
+    """Сценарии бенчмарка над одной синтетической базой и одним окном"""
+
+    def __init__(self, db_path, companies):
+        self.db_path = db_path
+        self.companies = companies
+        self.window = MainWindow(db_path)
+        wait_until(lambda: not self.window.loading)
+        # Первая загрузка пишет снимок базы в фоне; дальше окно читает из него
+        self.window.thread_pool.waitForDone()
+        self._company = 0
+        self.load_data()
+        self.year = int(self.window.year_combo.currentText())
+        self._edit_value = 0
+
+    def load_data(self):
+        """Загрузка двух таблиц организации в окно (переключение организации)"""
+        self._company = (self._company + 1) % self.companies
+        self.window.entity = entity_name(self._company)
+        self.window.load_data()
+        wait_until(lambda: not self.window.loading)
+
+    def snapshot_table(self):
+        """Чтение двух таблиц организации из снимка базы (memory-map)"""
+        self._company = (self._company + 1) % self.companies
+        snapshot = open_snapshot(snapshot_path(self.db_path))
+        if snapshot is None:
+            return
+        try:
+            return [snapshot.table(entity_name(self._company), table_name)
+                    for table_name in (CAPITAL_TABLE, COSTS_TABLE)]
+        finally:
+            snapshot.close()
+
+    def update_table(self):
+        """Подключение таблицы к модели и отрисовка видимой части"""
+        self.window.update_table()
+        self.window.table.viewport().grab()
+
+    def handle_value_edited(self):
+        """Правки ячеек: модель, итоговые строки, коэффициенты, очередь записи"""
+        model = self.window.table_model
+        rows = [row for row in range(model.index_data.row_count)
+                if not model.index_data.is_section(row)][:EDITS_PER_RUN]
+        for row in rows:
+            self._edit_value += 1
+            model.setData(model.index(row, 1), str(self._edit_value))
+
+    def calculate_coefficients(self):
+        """Коэффициенты по всем организациям и годам из записей длинного формата"""
+        records = get_connection(self.db_path).execute(
+            "SELECT entity, code, year, value FROM financial_values WHERE table_name = ?",
+            (CAPITAL_TABLE,)).fetchall()
+        engine = CoefficientEngine.from_records(records)
+        engine.compute()
+        return [engine.coefficients(self.year, entity) for entity in engine.entities]
+
+    def get_data_for_years(self):
+        """Темп роста и отклонение по всем организациям за отчетный год (повторный вызов)"""
+        entities = [entity_name(number) for number in range(self.companies)]
+        return self.window.data_manager.get_data_for_years(self.year, entities=entities)
+
+    def get_data_for_years_cold(self):
+        """То же без кеша результатов: запрос и расчет каждый раз"""
+        self.window.data_manager._query_cache.clear()
+        return self.get_data_for_years()
+
+    def batch_analyze(self):
+        """Все производные показатели базы без интерфейса"""
+        return analyze(self.window.data_manager)
+
+    def close(self):
+        self.window.close()
+
+
+CASES = ('load_data', 'snapshot_table', 'update_table', 'handle_value_edited', 'calculate_coefficients',
+         'get_data_for_years', 'get_data_for_years_cold', 'batch_analyze')
+
+
+def measure(function, repeat):
+    """Медиана времени (мс) после прогрева и пик памяти Python (КБ) за один прогон"""
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time_ms': round(statistics.median(times), 3), 'peak_kb': round(peak / 1024, 1)}
+
+
+def compare(results, baseline):
+    """Сценарии, вышедшие за допуск базовой линии"""
+    regressions = []
+    for case, result in results.items():
+        base = baseline.get(case)
+        if base is None:
+            continue
+        if result['time_ms'] > base['time_ms'] * (1 + TIME_TOLERANCE) and \
+                result['time_ms'] - base['time_ms'] > MIN_TIME_DELTA_MS:
+            regressions.append(f"{case}: время {result['time_ms']:.1f} мс, база {base['time_ms']:.1f} мс")
+        if result['peak_kb'] > base['peak_kb'] * (1 + MEMORY_TOLERANCE) and \
+                result['peak_kb'] - base['peak_kb'] > MIN_MEMORY_DELTA_KB:
+            regressions.append(f"{case}: память {result['peak_kb']:.0f} КБ, база {base['peak_kb']:.0f} КБ")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=PRESETS, default='small')
+    parser.add_argument("--companies", type=int)
+    parser.add_argument("--rows", type=int)
+    parser.add_argument("--years", type=int)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", action="append", choices=CASES, dest="cases")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="записать результаты как базовую линию набора")
+    args = parser.parse_args()
+
+    size = dict(PRESETS[args.preset])
+    for key in size:
+        if getattr(args, key) is not None:
+            size[key] = getattr(args, key)
+    # Базовые линии хранятся только для наборов без переопределенных размеров
+    baseline_key = args.preset if size == PRESETS[args.preset] else None
+
+    app = QApplication.instance() or QApplication([])  # нужен окну и циклу событий
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "benchmark.db")
+        start = time.perf_counter()
+        generate_database(db_path, **size)
+        print(f"База: {size['companies']} организаций, {size['rows']} строк, {size['years']} лет "
+              f"({time.perf_counter() - start:.1f} с)")
+
+        scenarios = Scenarios(db_path, size['companies'])
+        results = {}
+        for case in args.cases or CASES:
+            results[case] = measure(getattr(scenarios, case), args.repeat)
+            print(f"  {case:<24} {results[case]['time_ms']:>10.2f} мс {results[case]['peak_kb']:>10.0f} КБ")
+        scenarios.close()
+        close_thread_connections()
+    # Пик памяти всего процесса, включая Qt и SQLite (в Linux ru_maxrss в КБ)
+    print(f"Пик RSS процесса: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} МБ")
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        if baseline_key is None:
+            parser.error("--save-baseline доступен только для наборов без изменения размеров")
+        baselines.setdefault(baseline_key, {}).update(results)
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Базовая линия '{baseline_key}' сохранена в {BASELINES_PATH}")
+        return 0
+
+    regressions = compare(results, baselines.get(baseline_key, {})) if baseline_key else []
+    for line in regressions:
+        print("Регрессия: " + line)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# benchmarks/synthetic.py
+"""Генератор синтетической базы отчетов для бенчмарков
+
+Размер задается числом организаций, строк в таблице и лет. Таблица
+собственного капитала содержит коды, по которым считаются коэффициенты
+(200, 050, 070, 150, 170), остальные строки добавляются до нужного
+числа. Генерация детерминирована: одинаковые параметры и seed дают
+одинаковую базу.
+
+    python benchmarks/synthetic.py out.db --companies 100 --rows 200 --years 10
+"""
+import argparse
+import os
+import random
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.analysis.coefficients import ASSETS_CODE, LIABILITY_CODES
+from src.database.connection import close_thread_connections
+from src.database.data_manager import (FinancialDataManager, CAPITAL_TABLE, COSTS_TABLE,
+                                       IMPORT_TABLE)
+
+FIRST_YEAR = 2013
+# Строк в одном разделе отчета
+SECTION_SIZE = 25
+TABLES = (CAPITAL_TABLE, COSTS_TABLE, IMPORT_TABLE)
+
+
+def entity_name(number: int) -> str:
+    return f"company_{number:05d}"
+
+
+def table_codes(table_name: str, rows: int):
+    """Коды строк таблицы; в таблице капитала сначала коды коэффициентов"""
+    codes = [ASSETS_CODE, *LIABILITY_CODES] if table_name == CAPITAL_TABLE else []
+    number = 1
+    while len(codes) < rows:
+        code = f"{number:03d}"
+        if code not in codes:
+            codes.append(code)
+        number += 1
+    return codes[:rows]
+
+
+def generate_rows(table_name: str, rows: int, years: int, rng: random.Random):
+    """Строки таблицы в формате окна: значения по годам под ключами-строками"""
+    result = []
+    for position, code in enumerate(table_codes(table_name, rows)):
+        value = rng.randint(1_000, 1_000_000)
+        row = {'code': code, 'parameter': f"Показатель {code}",
+               'section': f"Раздел {position // SECTION_SIZE + 1}"}
+        for year in range(FIRST_YEAR, FIRST_YEAR + years):
+            # Часть значений нулевая: нули не хранятся в базе
+            row[str(year)] = 0 if rng.random() < 0.1 else value
+            value = max(0, int(value * rng.uniform(0.8, 1.25)))
+        result.append(row)
+    return result
+
+
+def generate_database(db_path: str, companies: int = 10, rows: int = 100, years: int = 3,
+                      seed: int = 0) -> FinancialDataManager:
+    """Создает (или перезаписывает) базу с companies организациями"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    rng = random.Random(seed)
+    data_manager = FinancialDataManager(db_path)
+    for number in range(companies):
+        for table_name in TABLES:
+            data_manager.save_table(table_name, generate_rows(table_name, rows, years, rng),
+                                    entity_name(number))
+    return data_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_path")
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_database(args.db_path, args.companies, args.rows, args.years, args.seed)
+    close_thread_connections()
+    print(f"{args.db_path}: {args.companies} организаций x {len(TABLES)} таблицы x "
+          f"{args.rows} строк x {args.years} лет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# batch.py
+"""Пакетный расчет показателей без интерфейса
+
+Считает по базе (или по файлу Excel) значения, темп роста и абсолютное
+отклонение для всех строк отчетов и коэффициенты K1, K2 и ликвидности,
+и записывает их в metrics.<формат> и coefficients.<формат>. Qt не нужен.
+
+Запуск из каталога Project:
+
+    python -m src.analysis.batch --output-dir out
+    python -m src.analysis.batch --excel report.xlsx --format parquet --output-dir out
+    python -m src.analysis.batch --workers 0 --output-dir out   # все ядра
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from src.analysis.coefficients import CoefficientEngine
+from src.analysis.metrics import (COEFFICIENT_COLUMNS, METRIC_COLUMNS, coefficient_metrics,
+                                  row_metrics)
+from src.database.connection import FINANCIAL_DB_PATH, close_thread_connections
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, IMPORT_TABLE
+
+FORMATS = ('csv', 'parquet')
+
+# Порций организаций на процесс: мелкие порции выравнивают нагрузку
+SHARDS_PER_WORKER = 4
+
+
+def analyze(data_manager: FinancialDataManager, entities: Optional[Sequence[str]] = None,
+            tables: Optional[Sequence[str]] = None,
+            coefficients_table: str = CAPITAL_TABLE) -> Dict[str, List[Dict]]:
+    """Все производные показатели базы: {'metrics': [...], 'coefficients': [...]}
+
+    Коэффициенты считаются по таблице coefficients_table каждой
+    организации, у которой она есть.
+    """
+    metrics, engines = [], []
+    for entity in entities or data_manager.list_entities():
+        table_names = list(tables or data_manager.list_tables(entity))
+        if coefficients_table not in table_names:
+            table_names.append(coefficients_table)
+
+        for table_name, rows in data_manager.load_tables(table_names, entity).items():
+            if not rows:
+                continue
+            if tables is None or table_name in tables:
+                metrics.extend(row_metrics(rows, table_name, entity))
+            if table_name == coefficients_table:
+                engines.append(CoefficientEngine.from_rows(rows, entity))
+
+    coefficients = [row for engine in engines for row in coefficient_metrics(engine)]
+    return {'metrics': metrics, 'coefficients': coefficients}
+
+
+def _analyze_shard(db_path: str, entities: Sequence[str], tables: Optional[Sequence[str]],
+                   coefficients_table: str) -> Dict[str, List[Dict]]:
+    """Расчет порции организаций в процессе пула (свое соединение с базой)"""
+    try:
+        return analyze(FinancialDataManager(db_path), entities, tables, coefficients_table)
+    finally:
+        close_thread_connections()
+
+
+def analyze_parallel(db_path: str, entities: Optional[Sequence[str]] = None,
+                     tables: Optional[Sequence[str]] = None,
+                     coefficients_table: str = CAPITAL_TABLE,
+                     workers: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """То же, что analyze(), но организации делятся на порции между процессами
+
+    Каждый процесс открывает базу сам и считает свои организации целиком,
+    поэтому процессы не обмениваются данными до слияния результатов.
+    Результаты сливаются в порядке организаций, как при analyze().
+    """
+    workers = workers or os.cpu_count() or 1
+    if entities is None:
+        entities = FinancialDataManager(db_path).list_entities()
+    entities = list(entities)
+
+    shard_count = max(1, min(len(entities), workers * SHARDS_PER_WORKER))
+    shard_size = -(-len(entities) // shard_count)
+    shards = [entities[start:start + shard_size] for start in range(0, len(entities), shard_size)]
+
+    merged = {'metrics': [], 'coefficients': []}
+    # spawn: дочерние процессы не наследуют открытые соединения SQLite
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(_analyze_shard, db_path, shard, tables, coefficients_table)
+                   for shard in shards]
+        for future in futures:
+            result = future.result()
+            for name in merged:
+                merged[name].extend(result[name])
+    return merged
+
+
+def write_results(results: Dict[str, List[Dict]], output_dir: str, file_format: str = 'csv') -> List[str]:
+    """Записывает результаты analyze() в output_dir; возвращает пути файлов"""
+    import pandas as pd
+
+    os.makedirs(output_dir, exist_ok=True)
+    columns = {'metrics': METRIC_COLUMNS, 'coefficients': COEFFICIENT_COLUMNS}
+    paths = []
+    for name, rows in results.items():
+        df = pd.DataFrame(rows, columns=list(columns[name]))
+        path = os.path.join(output_dir, f"{name}.{file_format}")
+        if file_format == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Пакетный расчет показателей отчетов без интерфейса")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--db", default=FINANCIAL_DB_PATH, help="база данных (по умолчанию база приложения)")
+    source.add_argument("--excel", help="файл Excel; импортируется во временную базу")
+    parser.add_argument("--entity", action="append", dest="entities", help="организация (можно несколько)")
+    parser.add_argument("--table", action="append", dest="tables", help="таблица отчета (можно несколько)")
+    parser.add_argument("--coefficients-table", help="таблица для расчета коэффициентов")
+    parser.add_argument("--format", choices=FORMATS, default='csv')
+    parser.add_argument("--workers", type=int, default=1,
+                        help="число процессов; 0 - по числу ядер, 1 - без пула")
+    parser.add_argument("--output-dir", required=True)
+    args = parser.parse_args(argv)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.excel:
+                db_path = os.path.join(tmp, "import.db")
+                data_manager = FinancialDataManager(db_path)
+                data_manager.load_data_from_excel(args.excel)
+                coefficients_table = args.coefficients_table or IMPORT_TABLE
+            else:
+                db_path = args.db
+                data_manager = FinancialDataManager(db_path)
+                coefficients_table = args.coefficients_table or CAPITAL_TABLE
+
+            if args.workers == 1:
+                results = analyze(data_manager, args.entities, args.tables, coefficients_table)
+            else:
+                results = analyze_parallel(db_path, args.entities, args.tables, coefficients_table,
+                                           args.workers or None)
+            # Временную базу можно удалить только после закрытия соединений
+            close_thread_connections()
+    except (OSError, sqlite3.Error, ValueError, zipfile.BadZipFile) as e:
+        print(f"Ошибка при расчете показателей: {e}", file=sys.stderr)
+        return 1
+
+    for path in write_results(results, args.output_dir, args.format):
+        print(path)
+    print(f"Показателей: {len(results['metrics'])}, коэффициентов: {len(results['coefficients'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
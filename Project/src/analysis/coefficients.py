@@ -0,0 +1,131 @@
+# coefficients.py
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Активы - остаток на конец года
+ASSETS_CODE = '200'
+# Строки с изменениями капитала, принимаемые за обязательства
+LIABILITY_CODES = ('050', '070', '150', '170')
+
+# Доли, которыми пока приближаются отсутствующие в отчете показатели
+SHORT_TERM_SHARE = 0.3      # краткосрочные обязательства от общих
+NON_OVERDUE_SHARE = 0.8     # непросроченные обязательства от общих
+CASH_SHARE = 0.1            # денежные средства от активов
+INVESTMENTS_SHARE = 0.05    # финансовые вложения от активов
+
+COEFFICIENT_NAMES = ('k1', 'k2', 'liquidity')
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Поэлементное деление; при нулевом знаменателе результат 0"""
+    result = np.zeros(np.broadcast(numerator, denominator).shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
+
+
+class CoefficientEngine:
+    """Расчет коэффициентов K1, K2 и ликвидности сразу для всех организаций и лет
+
+    Значения таблицы собственного капитала хранятся массивом формы
+    (организации, коды, годы). Коэффициенты считаются векторно по всему
+    массиву и кешируются до следующего изменения значений.
+    """
+
+    def __init__(self, entities: Sequence[str], codes: Sequence[str], years: Sequence[int],
+                 values: np.ndarray):
+        self.entities = list(entities)
+        self.codes = list(codes)
+        self.years = [int(year) for year in years]
+        self.values = np.asarray(values, dtype=np.float64).reshape(
+            len(self.entities), len(self.codes), len(self.years))
+        self._entity_index = {entity: i for i, entity in enumerate(self.entities)}
+        self._code_index = {code: i for i, code in enumerate(self.codes)}
+        self._year_index = {year: i for i, year in enumerate(self.years)}
+        self._result: Optional[Dict[str, np.ndarray]] = None
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], entity: str = "default") -> "CoefficientEngine":
+        """Строит расчет по строкам таблицы в формате окна (годы - ключи-строки)"""
+        years = sorted({int(key) for row in rows for key in row if key.isdigit()})
+        codes = [row['code'] for row in rows]
+        values = np.array([[row.get(str(year)) or 0 for year in years] for row in rows],
+                          dtype=np.float64)
+        return cls([entity], codes, years, values.reshape(1, len(codes), len(years)))
+
+    @classmethod
+    def from_store(cls, store, entity: str = "default") -> "CoefficientEngine":
+        """Строит расчет по хранилищу таблицы (TableStore); значения копируются"""
+        values = np.array(store.values[:len(store)], dtype=np.float64)
+        return cls([entity], store.codes, store.years, values.reshape(1, len(store), len(store.years)))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, str, int, float]]) -> "CoefficientEngine":
+        """Строит расчет по записям длинного формата (организация, код, год, значение)"""
+        records = list(records)
+        if not records:
+            return cls([], [], [], np.zeros((0, 0, 0)))
+
+        entity_col, code_col, year_col, value_col = (np.asarray(column) for column in zip(*records))
+        entities, entity_idx = np.unique(entity_col, return_inverse=True)
+        codes, code_idx = np.unique(code_col, return_inverse=True)
+        years, year_idx = np.unique(year_col.astype(np.int64), return_inverse=True)
+
+        values = np.zeros((len(entities), len(codes), len(years)), dtype=np.float64)
+        values[entity_idx, code_idx, year_idx] = value_col.astype(np.float64)
+        return cls(entities.tolist(), codes.tolist(), years.tolist(), values)
+
+    def _rows(self, codes: Sequence[str]) -> np.ndarray:
+        """Срез значений по кодам: форма (организации, len(codes), годы); нет кода - нули"""
+        indexes = [self._code_index[code] for code in codes if code in self._code_index]
+        if not indexes:
+            return np.zeros((len(self.entities), 1, len(self.years)))
+        return self.values[:, indexes, :]
+
+    def compute(self) -> Dict[str, np.ndarray]:
+        """Возвращает массивы коэффициентов формы (организации, годы)"""
+        if self._result is not None:
+            return self._result
+
+        assets = self._rows([ASSETS_CODE]).sum(axis=1)
+        total_liabilities = np.abs(self._rows(LIABILITY_CODES)).sum(axis=1)
+
+        short_term_liabilities = total_liabilities * SHORT_TERM_SHARE
+        non_overdue_liabilities = total_liabilities * NON_OVERDUE_SHARE
+        liquid_assets = assets * (CASH_SHARE + INVESTMENTS_SHARE)
+
+        self._result = {
+            # K1 = Обязательства / Активы
+            'k1': _safe_divide(total_liabilities, assets),
+            # K2 = Непросроченные обязательства / Общие обязательства
+            'k2': _safe_divide(non_overdue_liabilities, total_liabilities),
+            # Ликвидность = (Денежные средства + Фин.вложения) / Краткосрочные обязательства
+            'liquidity': _safe_divide(liquid_assets, short_term_liabilities),
+        }
+        return self._result
+
+    def coefficients(self, year: int, entity: Optional[str] = None) -> Tuple[float, float, float]:
+        """Коэффициенты K1, K2 и ликвидности одной организации за год"""
+        year_index = self._year_index.get(int(year))
+        if year_index is None or not self.entities:
+            return 0.0, 0.0, 0.0
+        entity_index = self._entity_index[entity] if entity is not None else 0
+        result = self.compute()
+        return tuple(float(result[name][entity_index, year_index]) for name in COEFFICIENT_NAMES)
+
+    def series(self, code: str, entity: Optional[str] = None) -> List[float]:
+        """Значения показателя по всем годам (для графика и выгрузки)"""
+        code_index = self._code_index.get(code)
+        if code_index is None:
+            return [0.0] * len(self.years)
+        entity_index = self._entity_index[entity] if entity is not None else 0
+        return self.values[entity_index, code_index, :].tolist()
+
+    def set_value(self, code: str, year: int, value: float, entity: Optional[str] = None):
+        """Обновляет одно значение; коэффициенты пересчитаются при следующем обращении"""
+        code_index = self._code_index.get(code)
+        year_index = self._year_index.get(int(year))
+        if code_index is None or year_index is None:
+            return
+        entity_index = self._entity_index[entity] if entity is not None else 0
+        self.values[entity_index, code_index, year_index] = value or 0
+        self._result = None
@@ -0,0 +1,92 @@
+# dependencies.py
+from typing import Dict, List, Sequence
+from src.analysis.table_store import TableStore
+from src.database.data_manager import CAPITAL_TABLE, COSTS_TABLE
+
+# Итоговые строки отчетов: код итога -> коды слагаемых
+TOTAL_RULES: Dict[str, Dict[str, Sequence[str]]] = {
+    CAPITAL_TABLE: {
+        # Скорректированный остаток = остаток + корректировки
+        '040': ('010', '020', '030'),
+        # Увеличение собственного капитала - всего
+        '050': ('051', '052', '053', '054'),
+    },
+    COSTS_TABLE: {
+        # Всего (сумма строк с 110 по 133)
+        '134': tuple(f"{code:03d}" for code in range(110, 134)),
+    },
+}
+
+
+class DependencyGraph:
+    """Граф зависимостей итоговых строк от слагаемых
+
+    При изменении значения пересчитываются только итоги, в которые
+    строка входит прямо или через другие итоги, в порядке от нижних
+    итогов к верхним.
+    """
+
+    def __init__(self, rules: Dict[str, Sequence[str]]):
+        self.rules = {total: tuple(terms) for total, terms in rules.items()}
+        self.parents: Dict[str, List[str]] = {}
+        for total, terms in self.rules.items():
+            for term in terms:
+                self.parents.setdefault(term, []).append(total)
+        self.order = self._topological_order()
+
+    @classmethod
+    def for_table(cls, table_name: str) -> "DependencyGraph":
+        return cls(TOTAL_RULES.get(table_name, {}))
+
+    def _topological_order(self) -> Dict[str, int]:
+        """Номер итога в порядке пересчета: слагаемые раньше итогов"""
+        order: Dict[str, int] = {}
+        visiting = set()
+
+        def visit(code):
+            if code in order:
+                return
+            if code in visiting:
+                raise ValueError(f"Циклическая зависимость итоговых строк: {code}")
+            visiting.add(code)
+            for term in self.rules.get(code, ()):
+                visit(term)
+            visiting.discard(code)
+            if code in self.rules:
+                order[code] = len(order)
+
+        for total in self.rules:
+            visit(total)
+        return order
+
+    def affected(self, code: str) -> List[str]:
+        """Итоги, зависящие от строки code, в порядке пересчета"""
+        result = set()
+        stack = list(self.parents.get(code, ()))
+        while stack:
+            total = stack.pop()
+            if total not in result:
+                result.add(total)
+                stack.extend(self.parents.get(total, ()))
+        return sorted(result, key=self.order.__getitem__)
+
+    def propagate(self, code: str, year: int, store: TableStore) -> List[str]:
+        """Пересчитывает итоги после изменения строки code за год year
+
+        Итог - сумма столбца года по строкам слагаемых. Возвращает коды
+        итогов, значение которых изменилось. Итог, который в отчете не
+        совпадает с суммой слагаемых (строка 134 за 2013 год в начальных
+        данных), остается как есть, пока не изменено одно из слагаемых.
+        """
+        column = store.column(year)
+        changed = []
+        for total in self.affected(code):
+            total_row = store.row_of(total)
+            if total_row is None:
+                continue
+            term_rows = [row for row in map(store.row_of, self.rules[total]) if row is not None]
+            value = float(column[term_rows].sum()) if term_rows else 0.0
+            if column[total_row] != value:
+                store.set_value(total_row, year, value)
+                changed.append(total)
+        return changed
@@ -0,0 +1,374 @@
+# export.py
+"""Выгрузка отчетов в XLSX, CSV и PDF без интерфейса
+
+Для каждой организации выгружаются обе таблицы отчетов (значение,
+предыдущий год, темп роста и отклонение за выбранные годы), итоги
+разделов и таблиц (из section_totals и table_totals), коэффициенты K1,
+K2 и ликвидности и графики динамики показателей, как в окне графика.
+Организации читаются и записываются по одной, поэтому память не
+зависит от их числа: XLSX пишется в режиме write-only, CSV и PDF -
+построчно и постранично.
+
+Запуск из каталога Project:
+
+    python -m src.analysis.export --year 2015 --output report.xlsx
+    python -m src.analysis.export --format pdf --year 2014 --year 2015 --entity default --output report.pdf
+    python -m src.analysis.export --year 2015 --lag 2 --output report.csv   # сравнение с 2013 годом
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Sequence
+from src.analysis.coefficients import CoefficientEngine
+from src.analysis.metrics import growth_rate
+from src.analysis.table_store import TableStore
+from src.database.connection import FINANCIAL_DB_PATH, close_thread_connections
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, COSTS_TABLE
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'pdf')
+EXPORT_TABLES = (CAPITAL_TABLE, COSTS_TABLE)
+TABLE_TITLES = {CAPITAL_TABLE: "Собственный капитал", COSTS_TABLE: "Затраты на производство"}
+# Показатели, динамика которых выводится на графиках (как в окне графика)
+CHART_CODES = {
+    CAPITAL_TABLE: ('050', "Динамика увеличения собственного капитала по годам"),
+    COSTS_TABLE: ('002', "Динамика затрат на производство по годам"),
+}
+
+METRIC_HEADERS = ("Организация", "Таблица", "Раздел", "Код", "Показатель", "Год", "Предыдущий год",
+                  "Значение", "Значение предыдущего года", "Темп роста, %", "Абсолютное отклонение")
+COEFFICIENT_HEADERS = ("Организация", "Год", "K1", "K2", "Ликвидность")
+TOTAL_HEADERS = ("Организация", "Таблица", "Раздел", "Год", "Итог", "Итог предыдущего года",
+                 "Темп роста, %", "Абсолютное отклонение")
+# Название строки итога всей таблицы и раздела строк без раздела
+TABLE_TOTAL_TITLE = "Итого по таблице"
+NO_SECTION_TITLE = "Без раздела"
+
+# Организаций, для которых в XLSX строятся диаграммы; для остальных - только данные
+XLSX_CHART_LIMIT = 100
+# Строк таблицы на странице PDF
+PDF_ROWS_PER_PAGE = 50
+
+
+class ExportCancelled(Exception):
+    """Выгрузка остановлена пользователем; частично записанные файлы удалены"""
+
+
+def _comparison_years(table_years: Sequence[int], years: Sequence[int], lag: Optional[int]) -> List[int]:
+    """Годы для get_year_comparisons: все годы таблицы (lag None) или подряд идущие годы"""
+    if lag is None:
+        return list(table_years)
+    return list(range(min(years) - lag, max(years) + 1))
+
+
+def _sum_totals(rows: List[tuple]) -> List[tuple]:
+    """Итоги разделов и таблицы по строкам показателей (для сравнения через lag лет)
+
+    Итоги в базе (section_totals) сравнивают с предыдущим годом с данными,
+    поэтому при другом годе сравнения они суммируются здесь.
+    """
+    sums: Dict[tuple, List] = {}
+    for entity, title, section, _, _, year, prev, value, prev_value, _, _ in rows:
+        for key in ((title, section or NO_SECTION_TITLE, year), (title, TABLE_TOTAL_TITLE, year)):
+            total = sums.setdefault(key, [entity, 0.0, None])
+            total[1] += value
+            if prev is not None:
+                total[2] = (total[2] or 0.0) + prev_value
+    result = [(entity, title, section, year, total, prev_total, growth_rate(total, prev_total),
+               total - prev_total if prev_total is not None else None)
+              for (title, section, year), (entity, total, prev_total) in sums.items()]
+    # Итог таблицы - после разделов своего года, как в get_section_totals
+    return sorted(result, key=lambda row: (row[3], row[2] == TABLE_TOTAL_TITLE))
+
+
+def entity_report(data_manager: FinancialDataManager, entity: str, years: Sequence[int],
+                  tables: Sequence[str] = EXPORT_TABLES, lag: Optional[int] = None) -> Dict:
+    """Строки выгрузки одной организации: metrics, totals, coefficients и charts
+
+    Годы, за которые в таблице нет данных, пропускаются. Год сравнения -
+    предыдущий год таблицы, за который есть данные, или при заданном lag
+    год на lag лет раньше (без данных за него сравнения нет). Сравнения
+    считает data_manager.get_year_comparisons.
+    """
+    stores = {table_name: TableStore() for table_name in tables}
+    for table_name, rows in data_manager.iter_tables(list(tables), entity):
+        stores[table_name].append_rows(rows)
+
+    metrics = []
+    totals = []
+    charts = []
+    for table_name in tables:
+        store = stores[table_name]
+        selected = [year for year in years if store.has_year(year)]
+        title = TABLE_TITLES.get(table_name, table_name)
+        if selected:
+            table_metrics = {year: [] for year in selected}
+            for row in data_manager.get_year_comparisons(_comparison_years(store.years, selected, lag),
+                                                         [entity], table_name, lag or 1):
+                if row['year'] not in table_metrics:
+                    continue
+                # Год сравнения без данных в таблице - сравнения нет
+                prev = row['base_year'] if row['base_value'] is not None else None
+                table_metrics[row['year']].append(
+                    (entity, title, row['section'] or "", row['parameter_code'], row['parameter_name'],
+                     row['year'], prev, row['value'], row['base_value'], row['growth_rate'],
+                     row['absolute_change']))
+            table_rows = [row for year in selected for row in table_metrics[year]]
+            metrics += table_rows
+            if lag is not None:
+                totals += _sum_totals(table_rows)
+            else:
+                # Итоги уже посчитаны в базе при сохранении значений
+                for year in selected:
+                    for total in data_manager.get_section_totals(year, entity, table_name):
+                        section = TABLE_TOTAL_TITLE if total['section'] is None else \
+                            total['section'] or NO_SECTION_TITLE
+                        totals.append((entity, title, section, year, total['total'], total['previous_total'],
+                                       total['growth_rate'], total['absolute_change']))
+        if table_name in CHART_CODES and store.row_of(CHART_CODES[table_name][0]) is not None:
+            code, chart_title = CHART_CODES[table_name]
+            charts.append((chart_title, list(store.years), store.series(code)))
+
+    coefficients = []
+    if CAPITAL_TABLE in stores:
+        engine = CoefficientEngine.from_store(stores[CAPITAL_TABLE], entity)
+        coefficients = [(entity, year) + engine.coefficients(year)
+                        for year in years if year in engine.years]
+    return {'entity': entity, 'metrics': metrics, 'totals': totals, 'coefficients': coefficients,
+            'charts': charts}
+
+
+class CsvExporter:
+    """Показатели - в path, итоги и коэффициенты - в <path без .csv>_totals.csv и _coefficients.csv"""
+
+    def __init__(self, path: str):
+        stem = path[:-4] if path.lower().endswith(".csv") else path
+        self.paths = [path, stem + "_totals.csv", stem + "_coefficients.csv"]
+        # utf-8-sig: Excel открывает файл с кириллицей без выбора кодировки
+        self._files = [open(file_path, "w", newline="", encoding="utf-8-sig") for file_path in self.paths]
+        self._metrics, self._totals, self._coefficients = (csv.writer(f, delimiter=";") for f in self._files)
+        self._metrics.writerow(METRIC_HEADERS)
+        self._totals.writerow(TOTAL_HEADERS)
+        self._coefficients.writerow(COEFFICIENT_HEADERS)
+
+    def write(self, report: Dict):
+        self._metrics.writerows(report['metrics'])
+        self._totals.writerows(report['totals'])
+        self._coefficients.writerows(report['coefficients'])
+
+    def close(self) -> List[str]:
+        for f in self._files:
+            f.close()
+        return self.paths
+
+    def abort(self):
+        self.close()
+        for file_path in self.paths:
+            os.remove(file_path)
+
+
+class XlsxExporter:
+    """Книга write-only: листы с показателями, итогами, коэффициентами и графиками
+
+    Строки листов сразу уходят во временные файлы openpyxl, в памяти
+    остаются только диаграммы (не больше XLSX_CHART_LIMIT организаций).
+    Книга сохраняется во временный файл рядом с path и подменяет его
+    только после успешной выгрузки.
+    """
+
+    def __init__(self, path: str):
+        from openpyxl import Workbook
+
+        self.paths = [path]
+        fd, self._tmp_path = tempfile.mkstemp(prefix=".export-", suffix=".xlsx",
+                                              dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        self._workbook = Workbook(write_only=True)
+        self._metrics = self._workbook.create_sheet("Показатели")
+        self._totals = self._workbook.create_sheet("Итоги разделов")
+        self._coefficients = self._workbook.create_sheet("Коэффициенты")
+        self._charts = self._workbook.create_sheet("Графики")
+        self._metrics.append(METRIC_HEADERS)
+        self._totals.append(TOTAL_HEADERS)
+        self._coefficients.append(COEFFICIENT_HEADERS)
+        self._chart_row = 1  # Следующая строка листа графиков
+        self._entities = 0
+
+    def write(self, report: Dict):
+        from openpyxl.chart import LineChart, Reference
+
+        for row in report['metrics']:
+            self._metrics.append(row)
+        for row in report['totals']:
+            self._totals.append(row)
+        for row in report['coefficients']:
+            self._coefficients.append(row)
+
+        self._entities += 1
+        for title, years, values in report['charts']:
+            # Данные графика - две строки (годы и значения), диаграмма - справа от них
+            self._charts.append([report['entity'], title] + years)
+            self._charts.append(["", ""] + values)
+            if self._entities <= XLSX_CHART_LIMIT and years:
+                chart = LineChart()
+                chart.title = f"{report['entity']}: {title}"
+                chart.legend = None
+                chart.add_data(Reference(self._charts, min_col=3, max_col=2 + len(years),
+                                         min_row=self._chart_row + 1), from_rows=True)
+                chart.set_categories(Reference(self._charts, min_col=3, max_col=2 + len(years),
+                                               min_row=self._chart_row))
+                self._charts.add_chart(chart, f"A{self._chart_row + 2}")
+                # Под диаграмму оставляем место: около 15 строк
+                for _ in range(15):
+                    self._charts.append([])
+                self._chart_row += 15
+            self._chart_row += 2
+
+    def close(self) -> List[str]:
+        try:
+            self._workbook.save(self._tmp_path)
+            os.replace(self._tmp_path, self.paths[0])
+        except BaseException:
+            os.remove(self._tmp_path)
+            raise
+        return self.paths
+
+    def abort(self):
+        # Листы write-only закрывает и удаляет их временные файлы только
+        # сохранение книги; сохраняем во временный файл и удаляем его
+        try:
+            self._workbook.save(self._tmp_path)
+        except OSError:
+            pass  # Не мешаем исходной ошибке выгрузки; файлы листов openpyxl удалит при выходе
+        finally:
+            os.remove(self._tmp_path)
+
+
+class PdfExporter:
+    """PDF через matplotlib: страница графиков и коэффициентов, затем страницы таблиц
+
+    Каждая страница рисуется отдельной фигурой и сразу записывается в файл.
+    Используется Figure без pyplot: выгрузка идет не в потоке интерфейса.
+    """
+
+    def __init__(self, path: str):
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        self.paths = [path]
+        self._pdf = PdfPages(path)
+
+    def _page(self):
+        from matplotlib.figure import Figure
+
+        return Figure(figsize=(8.27, 11.69))  # A4
+
+    def write(self, report: Dict):
+        entity = report['entity']
+        figure = self._page()
+        figure.suptitle(f"Организация: {entity}", fontsize=14)
+        charts = report['charts']
+        for number, (title, years, values) in enumerate(charts):
+            axes = figure.add_subplot(len(charts) + 1, 1, number + 1)
+            axes.plot(years, values, marker='o', linestyle='-', color='#4CAF50')
+            axes.set_title(title, fontsize=10)
+            axes.set_xlabel('Год', fontsize=8)
+            axes.set_ylabel('Сумма, руб.', fontsize=8)
+            axes.grid(True, linestyle='--', alpha=0.7)
+        lines = ["Коэффициенты", f"{'Год':<6}{'K1':>12}{'K2':>12}{'Ликвидность':>14}"]
+        lines += [f"{year:<6}{k1:>12.4f}{k2:>12.4f}{liquidity:>14.4f}"
+                  for _, year, k1, k2, liquidity in report['coefficients']]
+        figure.text(0.1, 0.3, "\n".join(lines), family='monospace', fontsize=9, va='top')
+        self._pdf.savefig(figure)
+
+        # Итоги разделов идут перед строками показателей на тех же страницах
+        rows = [(section, "", year, value, prev_value, growth, change)
+                for _, _, section, year, value, prev_value, growth, change in report['totals']]
+        rows += [(name, code, year, value, prev_value, growth, change)
+                 for _, _, _, code, name, year, _, value, prev_value, growth, change in report['metrics']]
+        for start in range(0, len(rows), PDF_ROWS_PER_PAGE):
+            figure = self._page()
+            lines = [f"{entity}: итоги и показатели ({start + 1}-{min(start + PDF_ROWS_PER_PAGE, len(rows))}"
+                     f" из {len(rows)})", ""]
+            for name, code, year, value, prev_value, growth, change in rows[start:start + PDF_ROWS_PER_PAGE]:
+                lines.append(f"{code:<5}{name[:38]:<39}{year:<5}"
+                             f"{value if value is not None else 0:>14,.1f}"
+                             f"{prev_value if prev_value is not None else 0:>14,.1f}"
+                             f"{f'{growth:.2f}%' if growth is not None else '-':>10}"
+                             f"{f'{change:,.1f}' if change is not None else '-':>14}")
+            figure.text(0.03, 0.97, "\n".join(lines), family='monospace', fontsize=6.5, va='top')
+            self._pdf.savefig(figure)
+
+    def close(self) -> List[str]:
+        self._pdf.close()
+        return self.paths
+
+    def abort(self):
+        self._pdf.close()
+        if os.path.exists(self.paths[0]):
+            os.remove(self.paths[0])
+
+
+EXPORTERS = {'csv': CsvExporter, 'xlsx': XlsxExporter, 'pdf': PdfExporter}
+
+
+def export_reports(data_manager: FinancialDataManager, path: str, file_format: str,
+                   entities: Sequence[str], years: Sequence[int],
+                   tables: Sequence[str] = EXPORT_TABLES,
+                   progress: Optional[Callable[[int, int], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None,
+                   lag: Optional[int] = None) -> List[str]:
+    """Выгружает отчеты организаций в файл формата file_format; возвращает пути файлов
+
+    progress(готово, всего) вызывается после каждой организации. Если
+    is_cancelled() вернет True, выгрузка прерывается с ExportCancelled.
+    lag - сравнение с годом на lag лет раньше (см. entity_report).
+    """
+    exporter = EXPORTERS[file_format](path)
+    try:
+        for number, entity in enumerate(entities, start=1):
+            if is_cancelled is not None and is_cancelled():
+                raise ExportCancelled()
+            exporter.write(entity_report(data_manager, entity, years, tables, lag))
+            if progress is not None:
+                progress(number, len(entities))
+    except BaseException:
+        exporter.abort()
+        raise
+    return exporter.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Выгрузка отчетов в XLSX, CSV и PDF")
+    parser.add_argument("--db", default=FINANCIAL_DB_PATH, help="база данных (по умолчанию база приложения)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="по умолчанию - по расширению файла")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--year", action="append", type=int, dest="years",
+                        help="отчетный год (можно несколько); по умолчанию последний")
+    parser.add_argument("--entity", action="append", dest="entities",
+                        help="организация (можно несколько); по умолчанию все")
+    parser.add_argument("--lag", type=int,
+                        help="сравнивать с годом на N лет раньше; по умолчанию - с предыдущим годом с данными")
+    args = parser.parse_args(argv)
+    if args.lag is not None and args.lag < 1:
+        parser.error("--lag должен быть не меньше 1")
+
+    file_format = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if file_format not in EXPORT_FORMATS:
+        parser.error(f"Неизвестный формат: {file_format}")
+
+    data_manager = FinancialDataManager(args.db)
+    years = args.years or data_manager.list_years()[-1:]
+    entities = args.entities or data_manager.list_entities()
+    paths = export_reports(data_manager, args.output, file_format, entities, years,
+                           progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+                           lag=args.lag)
+    close_thread_connections()
+    print()
+    for path in paths:
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
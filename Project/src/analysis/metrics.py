@@ -0,0 +1,98 @@
+# metrics.py
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from src.analysis.coefficients import CoefficientEngine, COEFFICIENT_NAMES
+
+# Столбцы результата по показателям (порядок столбцов выгрузки)
+METRIC_COLUMNS = ('entity', 'table_name', 'section', 'code', 'parameter', 'year',
+                  'previous_year', 'value', 'previous_value', 'growth_rate', 'absolute_change')
+COEFFICIENT_COLUMNS = ('entity', 'year') + COEFFICIENT_NAMES
+
+
+def growth_rates(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """Темп роста по массивам значений, %; NaN, если одно из значений нулевое
+
+    Единственное определение темпа роста в Python; в SQL то же правило
+    задает data_manager._growth_sql.
+    """
+    current, previous = np.asarray(current, dtype=float), np.asarray(previous, dtype=float)
+    result = np.full(np.broadcast(current, previous).shape, np.nan)
+    np.divide(current * 100, previous, out=result, where=(current != 0) & (previous != 0))
+    return result
+
+
+def growth_rate(current: float, previous: float) -> Optional[float]:
+    """Темп роста, %; None, если одно из значений отсутствует (ноль)"""
+    rate = float(growth_rates(current or 0.0, previous or 0.0))
+    return None if math.isnan(rate) else rate
+
+
+def absolute_change(current: float, previous: float) -> float:
+    """Абсолютное отклонение от предыдущего года"""
+    return (current or 0) - (previous or 0)
+
+
+def previous_year(year: int, years: Sequence[int]) -> Optional[int]:
+    """Год сравнения: ближайший более ранний год, за который есть данные
+
+    Пропуск в годах (нет отчета за год) не оставляет год без сравнения -
+    так же value_changes в базе сравниваются с предыдущим годом таблицы.
+    """
+    return max((other for other in years if other < year), default=None)
+
+
+def years_of(rows: Iterable[Dict]) -> List[int]:
+    """Годы из ключей-строк записей таблицы"""
+    return sorted({int(key) for row in rows for key in row if key.isdigit()})
+
+
+def row_metrics(rows: List[Dict], table_name: str, entity: str) -> List[Dict]:
+    """Значения, темп роста и отклонение по каждой строке отчета и каждому году
+
+    Записи в формате окна: code, parameter, section и значения по годам
+    под ключами-строками. Для первого года previous_year равен None.
+    """
+    years = years_of(rows)
+    # Темп роста считается по столбцам года сразу для всех строк
+    columns = {year: np.array([row.get(str(year)) or 0 for row in rows], dtype=float) for year in years}
+    per_year = {}
+    for year in years:
+        prev = previous_year(year, years)
+        if prev is None:
+            per_year[year] = (None, [None] * len(rows), [None] * len(rows))
+            continue
+        growth = [None if math.isnan(rate) else rate
+                  for rate in growth_rates(columns[year], columns[prev]).tolist()]
+        per_year[year] = (prev, [row.get(str(prev)) or 0 for row in rows], growth)
+
+    result = []
+    for index, row in enumerate(rows):
+        for year in years:
+            prev, prev_values, growth = per_year[year]
+            value = row.get(str(year)) or 0
+            result.append({
+                'entity': entity,
+                'table_name': table_name,
+                'section': row.get('section'),
+                'code': row['code'],
+                'parameter': row['parameter'],
+                'year': year,
+                'previous_year': prev,
+                'value': value,
+                'previous_value': prev_values[index],
+                'growth_rate': growth[index],
+                'absolute_change': absolute_change(value, prev_values[index]) if prev else None,
+            })
+    return result
+
+
+def coefficient_metrics(engine: CoefficientEngine) -> List[Dict]:
+    """Коэффициенты K1, K2 и ликвидности по каждой организации и году"""
+    result = engine.compute()
+    return [
+        dict({'entity': entity, 'year': year},
+             **{name: float(result[name][entity_index, year_index]) for name in COEFFICIENT_NAMES})
+        for entity_index, entity in enumerate(engine.entities)
+        for year_index, year in enumerate(engine.years)
+    ]
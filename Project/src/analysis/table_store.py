@@ -0,0 +1,196 @@
+# table_store.py
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from src.analysis.metrics import growth_rates
+
+# Начальная емкость хранилища, строк; при заполнении удваивается
+INITIAL_CAPACITY = 64
+
+
+class RowView:
+    """Строка хранилища: ссылка на хранилище и номер строки, без копии значений"""
+
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store: "TableStore", row: int):
+        self.store = store
+        self.row = row
+
+    @property
+    def code(self) -> str:
+        return self.store.codes[self.row]
+
+    @property
+    def parameter(self) -> str:
+        return self.store.names[self.row]
+
+    @property
+    def section(self) -> Optional[str]:
+        return self.store.section_names[self.store.section_ids[self.row]]
+
+    def value(self, year: int) -> float:
+        return self.store.value(self.row, year)
+
+    def set_value(self, year: int, value: float):
+        self.store.set_value(self.row, year, value)
+
+
+class TableStore:
+    """Строки таблицы отчета в столбцовом виде
+
+    Значения лежат в массиве float64 (строки x годы), коды и названия
+    строк - в списках интернированных строк, разделы - номерами в списке
+    названий разделов. Строка выдается как RowView, поэтому на строку не
+    тратится отдельный словарь. Отсутствующее значение - ноль.
+    """
+
+    def __init__(self, years: Sequence[int] = ()):
+        self.years: List[int] = []
+        self._year_index: Dict[int, int] = {}
+        self._size = 0
+        self.values = np.zeros((0, 0), dtype=np.float64)
+        self.codes: List[str] = []
+        self.names: List[str] = []
+        self.section_ids = np.zeros(0, dtype=np.int32)
+        self.section_names: List[Optional[str]] = []
+        self._section_index: Dict[Optional[str], int] = {}
+        self.code_to_row: Dict[str, int] = {}
+        self._set_years(years)
+
+    def _set_years(self, years: Sequence[int]):
+        self.years = [int(year) for year in years]
+        self._year_index = {year: i for i, year in enumerate(self.years)}
+        self.values = np.zeros((max(len(self.values), INITIAL_CAPACITY), len(self.years)), dtype=np.float64)
+        self.section_ids = np.zeros(len(self.values), dtype=np.int32)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> "TableStore":
+        """Строит хранилище из строк в формате базы: code, parameter, section и годы строками"""
+        store = cls()
+        store.append_rows(rows)
+        return store
+
+    @classmethod
+    def from_arrays(cls, years: Sequence[int], codes: Sequence[str], names: Sequence[str],
+                    sections: Sequence[Optional[str]], values: np.ndarray) -> "TableStore":
+        """Строит хранилище из готовых столбцов (снимок базы); values - строки x годы"""
+        store = cls(years)
+        store._reserve(len(codes))
+        store.values[:len(codes)] = values
+        for code, name, section in zip(codes, names, sections):
+            store._append_row(code, name, section)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, size: int):
+        """Увеличивает емкость массивов не меньше чем до size строк (с запасом)"""
+        if size <= len(self.values):
+            return
+        capacity = max(size, len(self.values) * 2, INITIAL_CAPACITY)
+        values = np.zeros((capacity, len(self.years)), dtype=np.float64)
+        values[:self._size] = self.values[:self._size]
+        section_ids = np.zeros(capacity, dtype=np.int32)
+        section_ids[:self._size] = self.section_ids[:self._size]
+        self.values, self.section_ids = values, section_ids
+
+    def _section_id(self, section: Optional[str]) -> int:
+        section_id = self._section_index.get(section)
+        if section_id is None:
+            section_id = self._section_index[section] = len(self.section_names)
+            self.section_names.append(sys.intern(section) if section is not None else None)
+        return section_id
+
+    def _append_row(self, code: str, name: str, section: Optional[str]) -> int:
+        row = self._size
+        self.codes.append(sys.intern(code))
+        self.names.append(name)
+        self.section_ids[row] = self._section_id(section)
+        self.code_to_row[self.codes[row]] = row
+        self._size += 1
+        return row
+
+    def append_rows(self, rows: Iterable[Dict]) -> range:
+        """Добавляет строки в формате базы; возвращает номера добавленных строк
+
+        Годы берутся из ключей первой строки, если хранилище еще пустое.
+        """
+        rows = list(rows)
+        if not rows:
+            return range(self._size, self._size)
+        if not self.years and not self._size:
+            self._set_years(sorted(int(key) for key in rows[0] if key.isdigit()))
+
+        first = self._size
+        self._reserve(first + len(rows))
+        year_keys = [str(year) for year in self.years]
+        for row in rows:
+            index = self._append_row(row['code'], row['parameter'], row.get('section'))
+            self.values[index] = [row.get(key) or 0 for key in year_keys]
+        return range(first, self._size)
+
+    def extend(self, other: "TableStore") -> range:
+        """Добавляет строки другого хранилища с теми же годами (порцию загрузки)"""
+        if not self.years and not self._size:
+            self._set_years(other.years)
+        if other.years != self.years:
+            raise ValueError(f"Годы порции {other.years} не совпадают с годами таблицы {self.years}")
+
+        first = self._size
+        self._reserve(first + len(other))
+        self.values[first:first + len(other)] = other.values[:len(other)]
+        for row in range(len(other)):
+            self._append_row(other.codes[row], other.names[row],
+                             other.section_names[other.section_ids[row]])
+        return range(first, self._size)
+
+    def row(self, index: int) -> RowView:
+        return RowView(self, index)
+
+    def row_of(self, code: str) -> Optional[int]:
+        return self.code_to_row.get(code)
+
+    def by_code(self, code: str) -> Optional[RowView]:
+        index = self.code_to_row.get(code)
+        return RowView(self, index) if index is not None else None
+
+    def section(self, index: int) -> Optional[str]:
+        return self.section_names[self.section_ids[index]]
+
+    def has_year(self, year: int) -> bool:
+        return int(year) in self._year_index
+
+    def value(self, index: int, year: int) -> float:
+        """Значение строки за год; год вне таблицы - ноль"""
+        year_index = self._year_index.get(int(year))
+        return float(self.values[index, year_index]) if year_index is not None else 0.0
+
+    def set_value(self, index: int, year: int, value: float):
+        year_index = self._year_index.get(int(year))
+        if year_index is None:
+            raise KeyError(f"Год {year} отсутствует в таблице")
+        self.values[index, year_index] = value or 0
+
+    def column(self, year: int) -> np.ndarray:
+        """Значения всех строк за год (представление, не копия); год вне таблицы - нули"""
+        year_index = self._year_index.get(int(year))
+        if year_index is None:
+            return np.zeros(self._size)
+        return self.values[:self._size, year_index]
+
+    def series(self, code: str) -> List[float]:
+        """Значения строки по всем годам"""
+        index = self.code_to_row.get(code)
+        if index is None:
+            return [0.0] * len(self.years)
+        return self.values[index].tolist()
+
+    def growth_rates(self, year: int, previous_year: int) -> np.ndarray:
+        """Темп роста всех строк, %; NaN, если одно из значений нулевое"""
+        return growth_rates(self.column(year), self.column(previous_year))
+
+    def absolute_changes(self, year: int, previous_year: int) -> np.ndarray:
+        """Абсолютное отклонение всех строк от предыдущего года"""
+        return self.column(year) - self.column(previous_year)
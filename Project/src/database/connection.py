@@ -0,0 +1,119 @@
+# connection.py
+import atexit
+import os
+import sqlite3
+import threading
+from typing import Dict
+
+# Базы данных лежат рядом с модулем, а не в текущем рабочем каталоге
+DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+USERS_DB_PATH = os.path.join(DATABASE_DIR, "users.db")
+FINANCIAL_DB_PATH = os.path.join(DATABASE_DIR, "financial_data.db")
+# Прежнее имя базы отчетов - относительно текущего рабочего каталога
+LEGACY_FINANCIAL_DB = "financial_data.db"
+
+# Ожидание снятия блокировки другой транзакцией, мс
+BUSY_TIMEOUT_MS = 5000
+# Число подготовленных выражений, которые sqlite3 держит на соединение
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA foreign_keys = ON",
+)
+
+_local = threading.local()
+_all_connections = []
+_all_connections_lock = threading.Lock()
+
+
+def _normalize_path(db_path: str) -> str:
+    return db_path if db_path == ":memory:" else os.path.abspath(db_path)
+
+
+def adopt_legacy_database(db_path: str = FINANCIAL_DB_PATH, legacy_path: str = LEGACY_FINANCIAL_DB) -> bool:
+    """Копирует базу отчетов со старого места, если на новом ее еще нет
+
+    Раньше база открывалась в текущем рабочем каталоге; без копии данные
+    пользователя остались бы там, а на новом месте появилась бы пустая
+    база с начальными данными. Копия снимается через backup API SQLite во
+    временный файл и подменяет его целиком. Старый файл не удаляется.
+    Возвращает True, если база скопирована.
+    """
+    db_path = _normalize_path(db_path)
+    legacy_path = _normalize_path(legacy_path)
+    if legacy_path == db_path or os.path.exists(db_path) or not os.path.isfile(legacy_path):
+        return False
+
+    tmp_path = db_path + ".legacy-copy"
+    source = sqlite3.connect(legacy_path)
+    try:
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    print(f"База отчетов перенесена: {legacy_path} скопирована в {db_path}")
+    return True
+
+
+def get_connection(db_path: str = FINANCIAL_DB_PATH) -> sqlite3.Connection:
+    """Возвращает соединение текущего потока с базой db_path
+
+    Соединение открывается один раз на поток и базу, настраивается
+    (WAL, busy_timeout, кеш страниц) и дальше переиспользуется вместе
+    с кешем подготовленных выражений. Закрывать его не нужно.
+    """
+    db_path = _normalize_path(db_path)
+    connections: Dict[str, sqlite3.Connection] = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        connections[db_path] = conn
+        with _all_connections_lock:
+            _all_connections.append(conn)
+    return conn
+
+
+def close_thread_connections():
+    """Закрывает соединения текущего потока (для рабочих потоков перед завершением)"""
+    connections = getattr(_local, "connections", None)
+    if not connections:
+        return
+    with _all_connections_lock:
+        for conn in connections.values():
+            conn.close()
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+    connections.clear()
+
+
+@atexit.register
+def close_all_connections():
+    """Закрывает все соединения пула при завершении приложения"""
+    with _all_connections_lock:
+        for conn in _all_connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _all_connections.clear()
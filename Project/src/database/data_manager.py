@@ -1,83 +1,1091 @@
 # data_manager.py
+import json
+import os
+import re
 import sqlite3
-import pandas as pd
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from src.database.connection import adopt_legacy_database, get_connection, FINANCIAL_DB_PATH
+from src.profiler import profiled
+
+# Организация по умолчанию, если в отчете она не указана
+DEFAULT_ENTITY = "default"
+
+# Имена таблиц отчетов в нормализованном хранилище
+IMPORT_TABLE = "financial_data"
+CAPITAL_TABLE = "capital_data"
+COSTS_TABLE = "production_costs"
+
+# Результатов get_data_for_years, хранимых в кеше менеджера
+QUERY_CACHE_SIZE = 64
+
+# Заголовок столбца с годом: "2013", "2013 год", "year_2013", "y2013"
+YEAR_HEADER = re.compile(r"^(?:year_|y)?(\d{4})(?:\s*г(?:од)?\.?)?$")
+
+def _growth_sql(value: str, base: str) -> str:
+	"""SQL-выражение темпа роста, %: NULL, если одно из значений нулевое или отсутствует
+
+	То же правило, что у analysis.metrics.growth_rates; все запросы берут его отсюда.
+	"""
+	return f"CASE WHEN {value} != 0 AND {base} != 0 THEN {value} * 100.0 / {base} END"
+
+
+# Сравнение каждого из выбранных лет (:years, JSON-список) с годом на :lag
+# позиций раньше в этом списке: одна оконная выборка вместо запроса на пару лет.
+# Значение года, за который в таблице нет данных, - NULL (по derived_years),
+# поэтому сравнение с таким годом дает NULL, а не сравнение с нулем
+YEAR_WINDOW_QUERY = f"""
+    SELECT entity, parameter_name, parameter_code, section, position, ordinal, year, value,
+           base_year, base_value,
+           {_growth_sql('value', 'base_value')} AS growth_rate,
+           value - base_value AS absolute_change
+    FROM (
+        SELECT entity, parameter_name, parameter_code, section, position, ordinal, year,
+               COALESCE(value, 0.0) AS value,
+               LAG(year, :lag) OVER w AS base_year,
+               LAG(value, :lag) OVER w AS base_value
+        FROM (
+            SELECT p.entity, p.parameter_name, p.code AS parameter_code, p.section, p.position,
+                   y.key AS ordinal, y.value AS year,
+                   CASE WHEN dy.year IS NOT NULL THEN COALESCE(v.value, 0.0) END AS value
+            FROM parameters p
+            CROSS JOIN json_each(:years) y
+            LEFT JOIN derived_years dy
+                   ON dy.entity = p.entity AND dy.table_name = p.table_name AND dy.year = y.value
+            LEFT JOIN financial_values v
+                   ON v.entity = p.entity AND v.table_name = p.table_name
+                  AND v.code = p.code AND v.year = y.value
+            WHERE p.table_name = :table AND p.entity IN ({{entity_marks}})
+        )
+        WINDOW w AS (PARTITION BY entity, parameter_code ORDER BY ordinal)
+    )
+"""
+
+
+def _migration_long_format(conn):
+	"""Миграция 1: таблицы длинного формата и перенос старой таблицы по годам"""
+	# Строки отчетов: название, раздел и порядок вывода
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS parameters (
+            entity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            code TEXT NOT NULL,
+            parameter_name TEXT NOT NULL,
+            section TEXT,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (entity, table_name, code)
+        ) WITHOUT ROWID
+        """)
+	conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_parameters_position
+        ON parameters (entity, table_name, position)
+        """)
+
+	# Значения показателей; первичный ключ кластеризует строки по коду
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS financial_values (
+            entity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            code TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (entity, table_name, code, year)
+        ) WITHOUT ROWID
+        """)
+	# Покрывающий индекс для выборок по диапазону лет
+	conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_values_year
+        ON financial_values (entity, table_name, year, code, value)
+        """)
+
+	# Отметки о прогрессе загрузки для продолжения прерванного импорта
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS import_progress (
+            file_path TEXT NOT NULL,
+            sheet_name TEXT NOT NULL,
+            file_stamp TEXT NOT NULL,
+            rows_done INTEGER NOT NULL,
+            PRIMARY KEY (file_path, sheet_name)
+        )
+        """)
+
+	# Служебные значения: версия начальных данных и т.п.
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS app_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """)
+
+	exists = conn.execute(
+		"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'financial_data'").fetchone()
+	if not exists:
+		return
+
+	# Строки с повторяющимся кодом не сливаются: первая (по id) сохраняет код,
+	# следующие получают коды "<код>-2", "<код>-3" и т.д.
+	parameters = []
+	values = []
+	seen: Dict[str, int] = {}
+	for row_id, name, code, *year_values in conn.execute(
+			"SELECT id, parameter_name, parameter_code, year_2013, year_2014, year_2015 "
+			"FROM financial_data ORDER BY id"):
+		seen[code] = seen.get(code, 0) + 1
+		if seen[code] > 1:
+			code = f"{code}-{seen[code]}"
+		parameters.append((DEFAULT_ENTITY, IMPORT_TABLE, code, name, None, row_id))
+		values.extend((DEFAULT_ENTITY, IMPORT_TABLE, code, year, value)
+					  for year, value in zip((2013, 2014, 2015), year_values) if value)
+	conn.executemany("""
+        INSERT OR IGNORE INTO parameters (entity, table_name, code, parameter_name, section, position)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, parameters)
+	conn.executemany("""
+        INSERT OR REPLACE INTO financial_values (entity, table_name, code, year, value)
+        VALUES (?, ?, ?, ?, ?)
+        """, values)
+	# Столбцы разбивки капитала (unpaid_capital ... net_profit, total) в длинный
+	# формат не переносятся: старая таблица остается в базе под другим именем
+	conn.execute("ALTER TABLE financial_data RENAME TO financial_data_legacy")
+
+
+def _migration_data_version(conn):
+	"""Миграция 2: счетчик версии данных в app_meta"""
+	conn.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('data_version', 0)")
+
+
+def _bump_data_version(conn):
+	"""Увеличивает версию данных в текущей транзакции записи
+
+	Кеши результатов запросов сверяют с ней свою версию, поэтому запись из
+	любого соединения, потока или процесса делает их недействительными.
+	Счетчик увеличивается один раз на операцию записи, а не триггером на
+	каждую строку: построчный триггер замедлял массовую загрузку в 1,7 раза.
+	"""
+	conn.execute("UPDATE app_meta SET value = value + 1 WHERE key = 'data_version'")
+
+
+def _migration_derived_metrics(conn):
+	"""Миграция 3: материализованные темпы роста, отклонения и итоги разделов и таблиц"""
+	# Годы, по которым посчитаны производные показатели таблицы организации
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS derived_years (
+            entity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            PRIMARY KEY (entity, table_name, year)
+        ) WITHOUT ROWID
+        """)
+	# Значение строки за год и сравнение с предыдущим годом таблицы (с 5-й
+	# миграции - ближайшим более ранним годом с данными); для каждого года
+	# таблицы, в том числе нулевые значения. Для первого года таблицы
+	# previous_value, growth_rate и absolute_change - NULL
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS value_changes (
+            entity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            code TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            value REAL NOT NULL,
+            previous_value REAL,
+            growth_rate REAL,
+            absolute_change REAL,
+            PRIMARY KEY (entity, table_name, code, year)
+        ) WITHOUT ROWID
+        """)
+	# Суммы значений строк раздела (строки без раздела - раздел '')
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS section_totals (
+            entity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            section TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            total REAL NOT NULL,
+            previous_total REAL,
+            growth_rate REAL,
+            absolute_change REAL,
+            PRIMARY KEY (entity, table_name, section, year)
+        ) WITHOUT ROWID
+        """)
+	conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_parameters_section
+        ON parameters (entity, table_name, section)
+        """)
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_totals (
+            entity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            total REAL NOT NULL,
+            previous_total REAL,
+            growth_rate REAL,
+            absolute_change REAL,
+            PRIMARY KEY (entity, table_name, year)
+        ) WITHOUT ROWID
+        """)
+	_refresh_stale_derived(conn)
+
+
+def _migration_ingested_files(conn):
+	"""Миграция 4: файлы, найденные в папке автоматического импорта"""
+	# Для каждого файла папки: отметка (размер и время изменения), хэш байтов
+	# файла и хэш содержимого ячеек, состояние и число загруженных строк
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            file_path TEXT PRIMARY KEY,
+            file_stamp TEXT NOT NULL,
+            file_hash TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            status TEXT NOT NULL,
+            rows INTEGER NOT NULL DEFAULT 0,
+            message TEXT NOT NULL DEFAULT '',
+            updated_at REAL NOT NULL
+        )
+        """)
+	conn.execute("CREATE INDEX IF NOT EXISTS idx_ingested_file_hash ON ingested_files (file_hash)")
+	conn.execute("CREATE INDEX IF NOT EXISTS idx_ingested_content_hash ON ingested_files (content_hash)")
+
+
+def _migration_previous_available_year(conn):
+	"""Миграция 5: сравнение с предыдущим годом таблицы, за который есть данные
+
+	Раньше value_changes сравнивались с годом year - 1; пересчитываются
+	только таблицы с пропусками в годах - у остальных результат тот же.
+	Версия данных увеличивается: снимки хранят темпы роста по-старому.
+	"""
+	gaps = conn.execute("""
+        DELETE FROM derived_years WHERE (entity, table_name) IN (
+            SELECT entity, table_name FROM derived_years
+            GROUP BY entity, table_name
+            HAVING MAX(year) - MIN(year) + 1 != COUNT(*)
+        )
+        """).rowcount
+	if gaps:
+		_refresh_stale_derived(conn)
+		_bump_data_version(conn)
+
+
+def _migration_table_versions(conn):
+	"""Миграция 6: версия данных последнего изменения каждой таблицы организации
+
+	По ней снимок базы (snapshot.py) устаревает по таблицам, а не целиком.
+	Существующим таблицам ставится текущая версия данных.
+	"""
+	conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            entity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (entity, table_name)
+        ) WITHOUT ROWID
+        """)
+	conn.execute("""
+        INSERT OR IGNORE INTO table_versions (entity, table_name, version)
+        SELECT DISTINCT entity, table_name, (SELECT value FROM app_meta WHERE key = 'data_version')
+        FROM parameters
+        """)
+
+
+def _touch_tables(conn, pairs: Iterable[Tuple[str, str]]):
+	"""Отмечает таблицы (организация, таблица) измененными в текущей версии данных
+
+	Вызывается после _bump_data_version той же транзакции.
+	"""
+	conn.executemany("""
+        INSERT OR REPLACE INTO table_versions (entity, table_name, version)
+        SELECT ?, ?, value FROM app_meta WHERE key = 'data_version'
+        """, pairs)
+
+
+def _table_years(conn, entity: str, table_name: str) -> List[int]:
+	"""Годы, за которые в таблице организации есть значения
+
+	Каждый следующий год ищется по индексу idx_values_year, поэтому
+	стоимость зависит от числа лет, а не от числа строк таблицы.
+	"""
+	return [year for year, in conn.execute("""
+        WITH RECURSIVE years (year) AS (
+            SELECT MIN(year) FROM financial_values WHERE entity = :entity AND table_name = :table
+            UNION ALL
+            SELECT (SELECT MIN(year) FROM financial_values
+                    WHERE entity = :entity AND table_name = :table AND year > years.year)
+            FROM years WHERE years.year IS NOT NULL
+        )
+        SELECT year FROM years WHERE year IS NOT NULL
+        """, {'entity': entity, 'table': table_name})]
+
+
+def _mark_derived_stale(conn, pairs: Iterable[Tuple[str, str]]):
+	"""Помечает производные показатели таблиц (организация, таблица) устаревшими"""
+	conn.executemany("DELETE FROM derived_years WHERE entity = ? AND table_name = ?", pairs)
+
+
+def _delete_derived(conn, entity: str, table_name: str):
+	for table in ('derived_years', 'value_changes', 'section_totals', 'table_totals'):
+		conn.execute(f"DELETE FROM {table} WHERE entity = ? AND table_name = ?", (entity, table_name))
+
+
+def _refresh_derived(conn, entity: str, table_name: str, codes: Optional[Iterable[str]] = None):
+	"""Пересчитывает производные показатели таблицы организации в текущей транзакции
+
+	codes - коды измененных строк: если набор лет таблицы не изменился,
+	пересчитываются только эти строки и итоги их разделов. Иначе (или без
+	codes) пересчитывается вся таблица. Показатели обновляются вызовом
+	после записи, а не триггерами: построчные триггеры замедляли бы
+	массовую загрузку так же, как счетчик версии данных.
+	"""
+	years = _table_years(conn, entity, table_name)
+	known = [year for year, in conn.execute(
+		"SELECT year FROM derived_years WHERE entity = ? AND table_name = ? ORDER BY year",
+		(entity, table_name))]
+	if years != known:
+		codes = None
+		_delete_derived(conn, entity, table_name)
+		conn.executemany("INSERT INTO derived_years (entity, table_name, year) VALUES (?, ?, ?)",
+						 [(entity, table_name, year) for year in years])
+
+	params = {'entity': entity, 'table': table_name,
+			  'codes': json.dumps(list(codes)) if codes is not None else None}
+	# Отбор измененных строк; без codes - вся таблица
+	row_filter = "AND p.code IN (SELECT value FROM json_each(:codes))" if codes is not None else ""
+
+	conn.execute(f"""
+        DELETE FROM value_changes WHERE entity = :entity AND table_name = :table
+        {"AND code IN (SELECT value FROM json_each(:codes))" if codes is not None else ""}
+        """, params)
+	conn.execute(f"""
+        INSERT INTO value_changes (entity, table_name, code, year, value, previous_value,
+                                   growth_rate, absolute_change)
+        SELECT entity, table_name, code, year, value, previous_value,
+               {_growth_sql('value', 'previous_value')},
+               value - previous_value
+        FROM (
+            SELECT p.entity, p.table_name, p.code, y.year,
+                   COALESCE(v.value, 0.0) AS value,
+                   CASE WHEN y.previous_year IS NOT NULL THEN COALESCE(pv.value, 0.0) END AS previous_value
+            FROM parameters p
+            JOIN (
+                -- Год сравнения - предыдущий год таблицы, за которым есть данные
+                SELECT year, LAG(year) OVER (ORDER BY year) AS previous_year
+                FROM derived_years WHERE entity = :entity AND table_name = :table
+            ) y
+            LEFT JOIN financial_values v
+                   ON v.entity = p.entity AND v.table_name = p.table_name
+                  AND v.code = p.code AND v.year = y.year
+            LEFT JOIN financial_values pv
+                   ON pv.entity = p.entity AND pv.table_name = p.table_name
+                  AND pv.code = p.code AND pv.year = y.previous_year
+            WHERE p.entity = :entity AND p.table_name = :table {row_filter}
+        )
+        """, params)
+
+	if codes is None:
+		conn.execute("DELETE FROM section_totals WHERE entity = :entity AND table_name = :table", params)
+		sections = [section for section, in conn.execute(
+			"SELECT DISTINCT section FROM parameters WHERE entity = :entity AND table_name = :table",
+			params)]
+	else:
+		sections = [section for section, in conn.execute(f"""
+            SELECT DISTINCT p.section FROM parameters p
+            WHERE p.entity = :entity AND p.table_name = :table {row_filter}
+            """, params)]
+	for section in sections:
+		_refresh_section_total(conn, entity, table_name, section)
+
+	# Итоги таблицы - по итогам разделов, их немного
+	conn.execute("DELETE FROM table_totals WHERE entity = :entity AND table_name = :table", params)
+	conn.execute(f"""
+        INSERT INTO table_totals (entity, table_name, year, total, previous_total,
+                                  growth_rate, absolute_change)
+        SELECT :entity, :table, year, total, previous_total,
+               {_growth_sql('total', 'previous_total')},
+               total - previous_total
+        FROM (
+            SELECT year, SUM(total) AS total, SUM(previous_total) AS previous_total
+            FROM section_totals
+            WHERE entity = :entity AND table_name = :table
+            GROUP BY year
+        )
+        """, params)
+
+
+def _refresh_section_total(conn, entity: str, table_name: str, section: Optional[str]):
+	"""Пересчитывает итоги раздела по value_changes (строки без раздела - раздел '')"""
+	params = {'entity': entity, 'table': table_name, 'section': section}
+	conn.execute("""
+        DELETE FROM section_totals
+        WHERE entity = :entity AND table_name = :table AND section = COALESCE(:section, '')
+        """, params)
+	# Строки раздела берутся по индексу idx_parameters_section, их значения -
+	# по первичному ключу value_changes (CROSS JOIN фиксирует этот порядок).
+	# SUM пустого набора - NULL: итог предыдущего года NULL, если года нет в таблице
+	conn.execute(f"""
+        INSERT INTO section_totals (entity, table_name, section, year, total, previous_total,
+                                    growth_rate, absolute_change)
+        SELECT :entity, :table, COALESCE(:section, ''), year, total, previous_total,
+               {_growth_sql('total', 'previous_total')},
+               total - previous_total
+        FROM (
+            SELECT vc.year, SUM(vc.value) AS total, SUM(vc.previous_value) AS previous_total
+            FROM parameters p
+            CROSS JOIN value_changes vc
+            WHERE p.entity = :entity AND p.table_name = :table AND p.section IS :section
+              AND vc.entity = p.entity AND vc.table_name = p.table_name AND vc.code = p.code
+            GROUP BY vc.year
+        )
+        """, params)
+
+
+def _refresh_stale_derived(conn):
+	"""Пересчитывает показатели всех таблиц, помеченных устаревшими (например, после импорта)"""
+	stale = conn.execute("""
+        SELECT DISTINCT entity, table_name FROM parameters
+        EXCEPT
+        SELECT DISTINCT entity, table_name FROM derived_years
+        """).fetchall()
+	for entity, table_name in stale:
+		_refresh_derived(conn, entity, table_name)
+
+
+# Миграции схемы по порядку; номер версии - позиция в списке
+MIGRATIONS = (_migration_long_format, _migration_data_version, _migration_derived_metrics,
+			  _migration_ingested_files, _migration_previous_available_year, _migration_table_versions)
 
 
 class FinancialDataManager:
-	def __init__(self, db_path: str = "financial_data.db"):
+	"""Хранилище показателей в длинном формате (организация, таблица, код, год, значение)
+
+	Каждое значение - отдельная строка financial_values, поэтому новый год
+	не требует изменения схемы. Нулевые значения не хранятся: отсутствие
+	строки означает ноль. Названия, разделы и порядок строк отчета лежат
+	в таблице parameters.
+	"""
+
+	# Соответствие заголовков Excel служебным столбцам
+	EXCEL_COLUMNS = {
+		'показатель': 'parameter_name',
+		'наименование показателя': 'parameter_name',
+		'parameter_name': 'parameter_name',
+		'код': 'parameter_code',
+		'код строки': 'parameter_code',
+		'parameter_code': 'parameter_code',
+		'раздел': 'section',
+		'section': 'section',
+		'организация': 'entity',
+		'компания': 'entity',
+		'entity': 'entity',
+	}
+	# Листы, данные которых загружаются в таблицы окна (название листа в нижнем регистре)
+	SHEET_TABLES = {
+		'собственный капитал': CAPITAL_TABLE,
+		'capital_data': CAPITAL_TABLE,
+		'затраты на производство': COSTS_TABLE,
+		'production_costs': COSTS_TABLE,
+	}
+
+	def __init__(self, db_path: str = FINANCIAL_DB_PATH):
 		self.db_path = db_path
+		# Кеш результатов запросов: (годы, организации, таблица, версия данных) -> строки
+		self._query_cache: OrderedDict = OrderedDict()
+		self._query_cache_lock = threading.Lock()
+		if os.path.abspath(db_path) == FINANCIAL_DB_PATH:
+			# Первый запуск после переноса базы из текущего каталога к модулю
+			adopt_legacy_database(db_path)
 		self._init_db()
 
 	def _init_db(self):
-		conn = sqlite3.connect(self.db_path)
-		cursor = conn.cursor()
+		"""Приводит схему базы к текущей версии
 
-		# Создаем таблицу для хранения данных
-		cursor.execute("""
-        CREATE TABLE IF NOT EXISTS financial_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            parameter_name TEXT NOT NULL,
-            parameter_code TEXT NOT NULL,
-            year_2013 REAL,
-            year_2014 REAL,
-            year_2015 REAL,
-            unpaid_capital REAL,
-            own_shares REAL,
-            reserve_capital_1 REAL,
-            reserve_capital_2 REAL,
-            reserve_capital_3 REAL,
-            additional_capital_1 REAL,
-            additional_capital_2 REAL,
-            additional_capital_3 REAL,
-            retained_earnings_1 REAL,
-            retained_earnings_2 REAL,
-            retained_earnings_3 REAL,
-            net_profit REAL,
-            total REAL
-        )
-        """)
-		conn.commit()
-		conn.close()
-
-	def load_data_from_excel(self, file_path: str):
-		"""Загрузка данных из Excel в базу данных"""
-
-	# Здесь будет код для парсинга вашего Excel файла
-	# и загрузки данных в SQLite
-
-	def get_data_for_years(self, main_year: int) -> Dict:
-		"""Получение данных для выбранного года и предыдущего"""
-		conn = sqlite3.connect(self.db_path)
-
-		if main_year == 2013:
-			# Для 2013 года нет предыдущего года данных
-			query = """
-            SELECT parameter_name, parameter_code, 
-                   year_2013 as main_year, 
-                   NULL as previous_year
-            FROM financial_data
-            """
-		elif main_year == 2014:
-			query = """
-            SELECT parameter_name, parameter_code, 
-                   year_2014 as main_year, 
-                   year_2013 as previous_year
-            FROM financial_data
-            """
-		elif main_year == 2015:
-			query = """
-            SELECT parameter_name, parameter_code, 
-                   year_2015 as main_year, 
-                   year_2014 as previous_year
-            FROM financial_data
-            """
-
-		df = pd.read_sql_query(query, conn)
-		conn.close()
-
-		# Рассчитываем дополнительные показатели
-		df['growth_rate'] = (df['main_year'] / df['previous_year']) * 100
-		df['absolute_change'] = df['main_year'] - df['previous_year']
-
-		return df.to_dict('records')
\ No newline at end of file
+		Номер примененной миграции хранится в PRAGMA user_version, поэтому
+		на уже подготовленной базе запуск сводится к чтению одного числа.
+		Каждая миграция выполняется в своей транзакции. Если импорт книги
+		был прерван (остались отметки import_progress), производные
+		показатели его таблиц пересчитываются здесь же.
+		"""
+		conn = get_connection(self.db_path)
+		version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+		for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+			with conn:
+				conn.execute("BEGIN")
+				migration(conn)
+				conn.execute(f"PRAGMA user_version = {number}")
+
+		if conn.execute("SELECT 1 FROM import_progress LIMIT 1").fetchone():
+			with conn:
+				_refresh_stale_derived(conn)
+
+	@profiled('sql.load_data_from_excel')
+	def load_data_from_excel(self, file_path: str, batch_size: int = 1000,
+							 progress_callback: Optional[Callable[[int, int], None]] = None,
+							 entity: str = DEFAULT_ENTITY, table_name: str = IMPORT_TABLE) -> int:
+		"""Загрузка данных из Excel в базу данных
+
+		Книга читается построчно в режиме read-only, строки пишутся пачками
+		по batch_size через executemany. Каждая пачка вместе с отметкой о
+		прогрессе фиксируется одной транзакцией, поэтому прерванная загрузка
+		продолжается с последней сохраненной строки. Столбцы лет определяются
+		по заголовкам, организация берется из столбца "Организация" или из
+		аргумента entity. Каждый лист загружается в таблицу по своему
+		названию (SHEET_TABLES), остальные листы - в table_name; если два
+		листа попадают в одну таблицу, книга не загружается (ValueError).
+		Возвращает число загруженных строк отчета.
+		"""
+		from openpyxl import load_workbook
+
+		file_key = os.path.abspath(file_path)
+		file_stamp = self._file_stamp(file_path)
+		workbook = load_workbook(file_path, read_only=True, data_only=True)
+		conn = get_connection(self.db_path)
+		inserted = 0
+
+		try:
+			sheets = self._report_sheets(workbook, table_name)
+			total_rows = sum(max((sheet.max_row or 1) - 1, 0) for sheet, _, _, _ in sheets)
+			processed = 0
+
+			for sheet, sheet_table, columns, years in sheets:
+				rows = sheet.iter_rows(values_only=True)
+				next(rows, None)  # Заголовок
+
+				done = self._get_checkpoint(conn, file_key, sheet.title, file_stamp)
+				processed += done
+
+				batch = []
+				last_row = done
+				for row_number, row in enumerate(rows, start=1):
+					if row_number <= done:
+						# Эти строки уже загружены в прошлый раз
+						continue
+
+					record = self._parse_row(row, columns, years, entity, sheet_table, row_number)
+					if record is not None:
+						batch.append(record)
+					last_row = row_number
+
+					if last_row - done >= batch_size:
+						inserted += self._write_batch(conn, batch, file_key, sheet.title,
+													  file_stamp, last_row)
+						processed += last_row - done
+						done = last_row
+						batch = []
+						if progress_callback:
+							progress_callback(processed, total_rows)
+
+				if last_row > done:
+					inserted += self._write_batch(conn, batch, file_key, sheet.title,
+												  file_stamp, last_row)
+					processed += last_row - done
+					if progress_callback:
+						progress_callback(processed, total_rows)
+
+			# Загрузка завершена - отметки о прогрессе больше не нужны;
+			# производные показатели загруженных таблиц считаются один раз в конце
+			with conn:
+				conn.execute("DELETE FROM import_progress WHERE file_path = ?", (file_key,))
+				_refresh_stale_derived(conn)
+		except BaseException:
+			# Уже записанные пачки остаются в базе: их показатели нужны до
+			# продолжения загрузки. Если база недоступна, их пересчитает _init_db
+			try:
+				with conn:
+					_refresh_stale_derived(conn)
+			except sqlite3.Error:
+				pass
+			raise
+		finally:
+			workbook.close()
+
+		return inserted
+
+	def _report_sheets(self, workbook, table_name: str) -> List[tuple]:
+		"""Листы отчетов книги: (лист, таблица, столбцы, годы)
+
+		Лист без столбцов названия и кода показателя - не отчет. Номера
+		строк листа служат порядком вывода, поэтому два листа в одной
+		таблице затирали бы строки друг друга - такая книга отклоняется.
+		"""
+		sheets = []
+		targets: Dict[str, str] = {}
+		for sheet in workbook.worksheets:
+			header = next(sheet.iter_rows(values_only=True, max_row=1), None)
+			if header is None:
+				continue
+			columns, years = self._map_columns(header)
+			if 'parameter_name' not in columns.values() or 'parameter_code' not in columns.values():
+				continue
+			sheet_table = self.SHEET_TABLES.get(sheet.title.strip().lower(), table_name)
+			if sheet_table in targets:
+				raise ValueError(f"Листы «{targets[sheet_table]}» и «{sheet.title}» загружаются "
+								 f"в одну таблицу {sheet_table}; переименуйте листы "
+								 f"или разделите книгу")
+			targets[sheet_table] = sheet.title
+			sheets.append((sheet, sheet_table, columns, years))
+		return sheets
+
+	@staticmethod
+	def _file_stamp(file_path: str) -> str:
+		"""Размер и время изменения файла - для проверки, что файл не менялся"""
+		stat = os.stat(file_path)
+		return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+	def _map_columns(self, header):
+		"""Сопоставляет номера столбцов листа служебным полям и годам"""
+		columns = {}
+		years = {}
+		for index, title in enumerate(header):
+			if title is None:
+				continue
+			title = str(title).strip().lower()
+			name = self.EXCEL_COLUMNS.get(title)
+			if name and name not in columns.values():
+				columns[index] = name
+				continue
+			match = YEAR_HEADER.match(title)
+			if match:
+				years[index] = int(match.group(1))
+		return columns, years
+
+	@staticmethod
+	def _parse_value(value) -> float:
+		"""Приводит значение ячейки к числу; пустые ячейки и "-" дают ноль"""
+		if isinstance(value, str):
+			value = value.replace(" ", "").replace("\xa0", "").replace(",", ".")
+			try:
+				return float(value) if value not in ("", "-") else 0.0
+			except ValueError:
+				return 0.0
+		return float(value) if value is not None else 0.0
+
+	def _parse_row(self, row, columns: Dict[int, str], years: Dict[int, int],
+				   entity: str, table_name: str, position: int) -> Optional[tuple]:
+		"""Преобразует строку листа в описание показателя и его значения по годам"""
+		fields = {}
+		for index, name in columns.items():
+			value = row[index] if index < len(row) else None
+			fields[name] = str(value).strip() if value is not None else ""
+
+		if not fields['parameter_name'] or not fields['parameter_code']:
+			return None
+
+		row_entity = fields.get('entity') or entity
+		parameter = (row_entity, table_name, fields['parameter_code'], fields['parameter_name'],
+					 fields.get('section') or None, position)
+		values = [(year, self._parse_value(row[index] if index < len(row) else None))
+				  for index, year in years.items()]
+		return parameter, values
+
+	@staticmethod
+	def _get_checkpoint(conn, file_key: str, sheet_name: str, file_stamp: str) -> int:
+		"""Возвращает число уже загруженных строк листа"""
+		row = conn.execute(
+			"SELECT file_stamp, rows_done FROM import_progress WHERE file_path = ? AND sheet_name = ?",
+			(file_key, sheet_name)).fetchone()
+		if row is None or row[0] != file_stamp:
+			# Файл изменился с момента прерванной загрузки - начинаем заново
+			return 0
+		return row[1]
+
+	def _write_batch(self, conn, batch: List[tuple], file_key: str, sheet_name: str,
+					 file_stamp: str, rows_done: int) -> int:
+		"""Записывает пачку строк и отметку о прогрессе одной транзакцией"""
+		with conn:
+			self._write_records(conn, batch)
+			conn.execute(
+				"INSERT OR REPLACE INTO import_progress (file_path, sheet_name, file_stamp, rows_done) "
+				"VALUES (?, ?, ?, ?)",
+				(file_key, sheet_name, file_stamp, rows_done))
+		return len(batch)
+
+	@staticmethod
+	def _write_records(conn, records: Iterable[tuple]):
+		"""Пишет показатели и их значения; нулевые значения удаляются
+
+		Производные показатели затронутых таблиц помечаются устаревшими;
+		пересчитать их должен вызывающий (_refresh_derived или
+		_refresh_stale_derived).
+		"""
+		_bump_data_version(conn)
+		parameters = []
+		values = []
+		zeros = []
+		for parameter, year_values in records:
+			parameters.append(parameter)
+			key = parameter[:3]
+			for year, value in year_values:
+				if value:
+					values.append(key + (year, value))
+				else:
+					zeros.append(key + (year,))
+
+		conn.executemany("""
+            INSERT INTO parameters (entity, table_name, code, parameter_name, section, position)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (entity, table_name, code) DO UPDATE SET
+                parameter_name = excluded.parameter_name,
+                section = excluded.section
+            """, parameters)
+		conn.executemany("""
+            INSERT OR REPLACE INTO financial_values (entity, table_name, code, year, value)
+            VALUES (?, ?, ?, ?, ?)
+            """, values)
+		conn.executemany("""
+            DELETE FROM financial_values
+            WHERE entity = ? AND table_name = ? AND code = ? AND year = ?
+            """, zeros)
+		tables = {parameter[:2] for parameter in parameters}
+		_touch_tables(conn, tables)
+		_mark_derived_stale(conn, tables)
+
+	@staticmethod
+	def _table_records(table_name: str, rows: Iterable[Dict], entity: str) -> List[tuple]:
+		"""Преобразует строки в формате окна в записи для _write_records"""
+		records = []
+		for position, row in enumerate(rows):
+			parameter = (entity, table_name, row['code'], row['parameter'], row.get('section'), position)
+			year_values = [(int(key), float(value or 0)) for key, value in row.items() if key.isdigit()]
+			records.append((parameter, year_values))
+		return records
+
+	@staticmethod
+	def _clear_table(conn, table_name: str, entity: str):
+		_bump_data_version(conn)
+		conn.execute("DELETE FROM financial_values WHERE entity = ? AND table_name = ?",
+					 (entity, table_name))
+		conn.execute("DELETE FROM parameters WHERE entity = ? AND table_name = ?",
+					 (entity, table_name))
+		_delete_derived(conn, entity, table_name)
+		_touch_tables(conn, [(entity, table_name)])
+
+	@profiled('sql.save_table')
+	def save_table(self, table_name: str, rows: Iterable[Dict], entity: str = DEFAULT_ENTITY,
+				   replace: bool = False):
+		"""Сохраняет строки отчета в формате окна: code, parameter, section и годы строками
+
+		При replace=True прежнее содержимое таблицы организации удаляется.
+		Все изменения выполняются одной транзакцией.
+		"""
+		records = self._table_records(table_name, rows, entity)
+
+		conn = get_connection(self.db_path)
+		with conn:
+			if replace:
+				self._clear_table(conn, table_name, entity)
+			self._write_records(conn, records)
+			_refresh_derived(conn, entity, table_name)
+
+	@profiled('sql.save_values')
+	def save_values(self, changes: Iterable[tuple]):
+		"""Сохраняет отдельные значения (организация, таблица, код, год, значение)
+
+		Все изменения пишутся одной транзакцией; нулевые значения удаляются.
+		Производные показатели пересчитываются только для измененных строк.
+		"""
+		values = []
+		zeros = []
+		changed: Dict[Tuple[str, str], set] = {}
+		for entity, table_name, code, year, value in changes:
+			changed.setdefault((entity, table_name), set()).add(code)
+			if value:
+				values.append((entity, table_name, code, int(year), float(value)))
+			else:
+				zeros.append((entity, table_name, code, int(year)))
+
+		conn = get_connection(self.db_path)
+		with conn:
+			_bump_data_version(conn)
+			conn.executemany("""
+            INSERT OR REPLACE INTO financial_values (entity, table_name, code, year, value)
+            VALUES (?, ?, ?, ?, ?)
+            """, values)
+			conn.executemany("""
+            DELETE FROM financial_values
+            WHERE entity = ? AND table_name = ? AND code = ? AND year = ?
+            """, zeros)
+			_touch_tables(conn, list(changed))
+			for (entity, table_name), codes in changed.items():
+				_refresh_derived(conn, entity, table_name, sorted(codes))
+
+	def data_version(self) -> int:
+		"""Версия данных: увеличивается при каждой записи в таблицы отчетов"""
+		return self.get_meta('data_version')
+
+	@profiled('sql.table_versions')
+	def table_versions(self) -> Dict[Tuple[str, str], int]:
+		"""Версия данных последнего изменения каждой таблицы: (организация, таблица) -> версия
+
+		Удаленная таблица остается в списке с версией удаления.
+		"""
+		conn = get_connection(self.db_path)
+		return {(entity, table_name): version for entity, table_name, version in conn.execute(
+			"SELECT entity, table_name, version FROM table_versions")}
+
+	@profiled('sql.get_meta')
+	def get_meta(self, key: str, default: int = 0) -> int:
+		"""Возвращает служебное значение из app_meta"""
+		row = get_connection(self.db_path).execute(
+			"SELECT value FROM app_meta WHERE key = ?", (key,)).fetchone()
+		return row[0] if row else default
+
+	@profiled('sql.apply_seed')
+	def apply_seed(self, version: int, tables: Dict[str, Iterable[Dict]],
+				   entity: str = DEFAULT_ENTITY) -> bool:
+		"""Записывает начальные данные, если их версия новее уже записанной
+
+		Заполняются только таблицы, в которых у организации еще нет строк:
+		в таблицах окна хранятся правки пользователя, и новая версия
+		начальных данных не должна их затирать. Изменить уже записанные
+		данные можно только миграцией. Таблицы и номер версии пишутся одной
+		транзакцией. Возвращает True, если записана хоть одна таблица.
+		"""
+		if self.get_meta('seed_version') >= version:
+			return False
+
+		conn = get_connection(self.db_path)
+		written = False
+		with conn:
+			for table_name, rows in tables.items():
+				if conn.execute("SELECT 1 FROM parameters WHERE entity = ? AND table_name = ? LIMIT 1",
+								(entity, table_name)).fetchone():
+					continue
+				self._write_records(conn, self._table_records(table_name, rows, entity))
+				_refresh_derived(conn, entity, table_name)
+				written = True
+			conn.execute("INSERT OR REPLACE INTO app_meta (key, value) VALUES ('seed_version', ?)",
+						 (version,))
+		return written
+
+	@profiled('sql.list_entities')
+	def list_entities(self) -> List[str]:
+		"""Организации, по которым в базе есть строки отчетов"""
+		conn = get_connection(self.db_path)
+		return [entity for entity, in conn.execute(
+			"SELECT DISTINCT entity FROM parameters ORDER BY entity")]
+
+	@profiled('sql.list_tables')
+	def list_tables(self, entity: str = DEFAULT_ENTITY) -> List[str]:
+		"""Таблицы отчетов организации"""
+		conn = get_connection(self.db_path)
+		return [table_name for table_name, in conn.execute(
+			"SELECT DISTINCT table_name FROM parameters WHERE entity = ? ORDER BY table_name",
+			(entity,))]
+
+	def load_table(self, table_name: str, entity: str = DEFAULT_ENTITY) -> List[Dict]:
+		"""Возвращает строки отчета в порядке вывода; значения по годам - под ключами-строками"""
+		return self.load_tables([table_name], entity)[table_name]
+
+	def load_tables(self, table_names: List[str], entity: str = DEFAULT_ENTITY) -> Dict[str, List[Dict]]:
+		"""Читает несколько таблиц отчетов одним запросом"""
+		result = {table_name: [] for table_name in table_names}
+		for table_name, rows in self.iter_tables(table_names, entity):
+			result[table_name].extend(rows)
+		return result
+
+	@profiled('sql.iter_tables')
+	def iter_tables(self, table_names: List[str], entity: str = DEFAULT_ENTITY,
+					chunk_size: int = 1000) -> Iterator[Tuple[str, List[Dict]]]:
+		"""Выдает строки таблиц отчетов порциями по chunk_size: (таблица, строки)
+
+		Все таблицы читаются одним запросом в порядке вывода; отсутствующие
+		значения за известные годы заполняются нулями.
+		"""
+		conn = get_connection(self.db_path)
+		marks = ", ".join("?" * len(table_names))
+		years = {table_name: [] for table_name in table_names}
+		for table_name, year in conn.execute(f"""
+            SELECT DISTINCT table_name, year FROM financial_values
+            WHERE entity = ? AND table_name IN ({marks})
+            ORDER BY year
+            """, (entity, *table_names)):
+			years[table_name].append(str(year))
+
+		cursor = conn.execute(f"""
+            SELECT p.table_name, p.code, p.parameter_name, p.section, v.year, v.value
+            FROM parameters p
+            LEFT JOIN financial_values v
+                   ON v.entity = p.entity AND v.table_name = p.table_name AND v.code = p.code
+            WHERE p.entity = ? AND p.table_name IN ({marks})
+            ORDER BY p.table_name, p.position, v.year
+            """, (entity, *table_names))
+
+		chunk = []
+		row = None
+		row_table = None
+		for table_name, code, name, section, year, value in cursor:
+			if row is None or row['code'] != code or row_table != table_name:
+				if chunk and (len(chunk) >= chunk_size or row_table != table_name):
+					yield row_table, chunk
+					chunk = []
+				row = {'code': code, 'parameter': name, 'section': section}
+				# Отсутствующее значение - ноль
+				row.update((year_key, 0) for year_key in years[table_name])
+				row_table = table_name
+				chunk.append(row)
+			if year is not None:
+				row[str(year)] = value
+
+		if chunk:
+			yield row_table, chunk
+
+	@profiled('sql.get_data_for_years')
+	def get_data_for_years(self, main_year: int, previous_year: Optional[int] = None,
+						   entities: Optional[List[str]] = None,
+						   table_name: str = IMPORT_TABLE) -> Tuple[Mapping, ...]:
+		"""Получение данных для выбранного года и предыдущего
+
+		По умолчанию каждая организация сравнивается с предыдущим годом своей
+		таблицы, за который есть данные: тогда темп роста и отклонение
+		читаются готовыми из value_changes. Для явно заданного previous_year
+		показатели считает оконный запрос. Данные выбираются одним запросом
+		для всех указанных организаций. Если года сравнения нет или за него
+		нет данных, previous_year, growth_rate и absolute_change - None.
+
+		Результаты кешируются (до QUERY_CACHE_SIZE) по годам, организациям и
+		версии данных; повторный вызов без изменений в базе стоит одного
+		чтения версии. Результат общий для повторных вызовов, поэтому он
+		неизменяемый: кортеж строк только для чтения (MappingProxyType);
+		для изменения строку нужно скопировать через dict(row).
+		"""
+		if entities is None:
+			entities = [DEFAULT_ENTITY]
+
+		# Версия читается до запроса: запись во время запроса даст промах в следующий раз
+		key = (main_year, previous_year, tuple(entities), table_name, self.data_version())
+		with self._query_cache_lock:
+			cached = self._query_cache.get(key)
+			if cached is not None:
+				self._query_cache.move_to_end(key)
+				return cached
+
+		result = tuple(MappingProxyType(row)
+					   for row in self._query_data_for_years(main_year, previous_year, entities, table_name))
+
+		with self._query_cache_lock:
+			self._query_cache[key] = result
+			while len(self._query_cache) > QUERY_CACHE_SIZE:
+				self._query_cache.popitem(last=False)
+		return result
+
+	@profiled('sql.list_years')
+	def list_years(self, entity: Optional[str] = None, table_name: Optional[str] = None) -> List[int]:
+		"""Годы, за которые есть данные: всей базы, организации или ее таблицы"""
+		conn = get_connection(self.db_path)
+		if entity is not None and table_name is not None:
+			return _table_years(conn, entity, table_name)
+		# derived_years - несколько строк на таблицу, в отличие от financial_values
+		query = "SELECT DISTINCT year FROM derived_years"
+		params: tuple = ()
+		if entity is not None:
+			query += " WHERE entity = ?"
+			params = (entity,)
+		return [year for year, in conn.execute(query + " ORDER BY year", params)]
+
+	@profiled('sql.get_year_comparisons')
+	def get_year_comparisons(self, years: Iterable[int], entities: Optional[List[str]] = None,
+							 table_name: str = IMPORT_TABLE, lag: int = 1) -> List[Dict]:
+		"""Значения строк за каждый из years и сравнение с годом на lag позиций раньше
+
+		years - любые годы в нужном порядке: пара [2010, 2020], окно
+		range(2006, 2016) или вся история из list_years(). При lag=1 каждый
+		год сравнивается с предыдущим в списке, при lag=N в окне подряд
+		идущих лет - с годом N лет назад. Все сравнения считает один
+		оконный запрос (LAG). base_year и base_value - год и значение
+		сравнения: None для первых lag лет; base_value None и для года без
+		данных в таблице.
+		"""
+		years = [int(year) for year in years]
+		if entities is None:
+			entities = [DEFAULT_ENTITY]
+		entity_marks = ", ".join(f":e{i}" for i in range(len(entities)))
+		params = {'years': json.dumps(years), 'lag': lag, 'table': table_name}
+		params.update((f"e{i}", entity) for i, entity in enumerate(entities))
+
+		cursor = get_connection(self.db_path).execute(f"""
+            SELECT entity, parameter_name, parameter_code, section, year, value, base_year, base_value,
+                   growth_rate, absolute_change
+            FROM ({YEAR_WINDOW_QUERY.format(entity_marks=entity_marks)})
+            ORDER BY entity, position, ordinal
+            """, params)
+		columns = [column[0] for column in cursor.description]
+		return [dict(zip(columns, row)) for row in cursor]
+
+	@profiled('sql.get_section_totals')
+	def get_section_totals(self, year: int, entity: str = DEFAULT_ENTITY,
+						   table_name: str = IMPORT_TABLE) -> List[Dict]:
+		"""Итоги разделов таблицы за год с темпом роста и отклонением (из section_totals)
+
+		Строки без раздела собраны в раздел ''. Последний элемент - итог
+		всей таблицы с section = None.
+		"""
+		conn = get_connection(self.db_path)
+		cursor = conn.execute("""
+            SELECT section, total, previous_total, growth_rate, absolute_change
+            FROM section_totals
+            WHERE entity = ? AND table_name = ? AND year = ?
+            ORDER BY (SELECT MIN(p.position) FROM parameters p
+                      WHERE p.entity = section_totals.entity AND p.table_name = section_totals.table_name
+                        AND COALESCE(p.section, '') = section_totals.section)
+            """, (entity, table_name, year))
+		columns = [column[0] for column in cursor.description]
+		result = [dict(zip(columns, row)) for row in cursor]
+		cursor = conn.execute("""
+            SELECT NULL AS section, total, previous_total, growth_rate, absolute_change
+            FROM table_totals WHERE entity = ? AND table_name = ? AND year = ?
+            """, (entity, table_name, year))
+		result.extend(dict(zip(columns, row)) for row in cursor)
+		return result
+
+	def _query_data_for_years(self, main_year: int, previous_year: Optional[int], entities: List[str],
+							  table_name: str) -> List[Dict]:
+		"""Запрос показателей за два года с темпом роста и отклонением (без кеша)
+
+		Сравнение с предыдущим годом с данными (previous_year None) читается
+		из материализованной таблицы value_changes по первичному ключу; для
+		других пар лет показатели считаются запросом. Темп роста - NULL, если
+		одно из значений нулевое.
+		"""
+		entity_marks = ", ".join(f":e{i}" for i in range(len(entities)))
+		params = {'main': main_year, 'table': table_name}
+		params.update((f"e{i}", entity) for i, entity in enumerate(entities))
+
+		if previous_year is None:
+			# Если отчетного года нет в таблице, строки value_changes за него нет -
+			# значение берется из строки последнего более раннего года таблицы
+			query = f"""
+                SELECT p.entity, p.parameter_name, p.code AS parameter_code,
+                       COALESCE(vc.value, 0.0) AS main_year,
+                       CASE WHEN vc.year IS NOT NULL THEN vc.previous_value ELSE pvc.value END
+                           AS previous_year,
+                       vc.growth_rate,
+                       CASE WHEN vc.year IS NOT NULL THEN vc.absolute_change ELSE -pvc.value END
+                           AS absolute_change
+                FROM parameters p
+                LEFT JOIN value_changes vc
+                       ON vc.entity = p.entity AND vc.table_name = p.table_name
+                      AND vc.code = p.code AND vc.year = :main
+                LEFT JOIN value_changes pvc
+                       ON vc.year IS NULL AND pvc.entity = p.entity AND pvc.table_name = p.table_name
+                      AND pvc.code = p.code
+                      AND pvc.year = (SELECT MAX(dy.year) FROM derived_years dy
+                                      WHERE dy.entity = p.entity AND dy.table_name = p.table_name
+                                        AND dy.year < :main)
+                WHERE p.table_name = :table AND p.entity IN ({entity_marks})
+                ORDER BY p.entity, p.position
+                """
+		else:
+			# Любая другая пара лет - тем же оконным запросом, что и get_year_comparisons
+			params['years'] = json.dumps([previous_year, main_year])
+			params['lag'] = 1
+			query = f"""
+                SELECT entity, parameter_name, parameter_code, value AS main_year,
+                       base_value AS previous_year, growth_rate, absolute_change
+                FROM ({YEAR_WINDOW_QUERY.format(entity_marks=entity_marks)})
+                WHERE ordinal = 1
+                ORDER BY entity, position
+                """
+
+		cursor = get_connection(self.db_path).execute(query, params)
+		columns = [column[0] for column in cursor.description]
+		return [dict(zip(columns, row)) for row in cursor]
@@ -1,14 +1,31 @@
 # database.py
+import csv
 import sqlite3
-import os
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+from src.database.connection import get_connection, USERS_DB_PATH
+from src.profiler import profiled
+from src.database.security import (dummy_hash, hash_password, needs_rehash, verify_password,
+                                   VerifiedSessionCache)
 
 # Определяем путь к базе данных
-DB_PATH = os.path.join(os.path.dirname(__file__), "users.db")
+DB_PATH = USERS_DB_PATH
+
+# Таблица users создается при первом обращении, а не при импорте модуля
+_database_ready = False
+
+# Состояния строк пачки в add_users
+USER_CREATED = 'created'  # Пользователь добавлен
+USER_EXISTS = 'exists'  # Логин уже есть в базе
+USER_REPEATED = 'repeated'  # Логин уже встречался раньше в этой пачке
+USER_FAILED = 'failed'  # Строка не записана из-за ошибки
+
+# Успешные входы за сеанс: повторная проверка не запускает PBKDF2
+session_cache = VerifiedSessionCache()
 
 def create_database():
     """Создает базу данных и таблицу users в папке src/database/"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection(DB_PATH)
     cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -18,41 +35,152 @@ def create_database():
         )
     """)
     conn.commit()
-    conn.close()
 
-def add_user(username: str, password: str) -> bool:
-    """Добавляет пользователя в базу данных"""
+def _get_users_connection():
+    """Соединение с базой пользователей; при первом вызове создает таблицу"""
+    global _database_ready
+    if not _database_ready:
+        create_database()
+        _database_ready = True
+    return get_connection(DB_PATH)
+
+@profiled('sql.users.add_user')
+def add_user(username: str, password: str, iterations: Optional[int] = None) -> bool:
+    """Добавляет пользователя в базу данных; пароль сохраняется соленым хэшем
+
+    Хэширование медленное намеренно - вызывайте вне потока интерфейса.
+    """
+    password_hash = hash_password(password, iterations)
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)",
-                      (username, password))
-        conn.commit()
+        conn = _get_users_connection()
+        with conn:
+            conn.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                         (username, password_hash))
         return True
     except sqlite3.IntegrityError:
         return False  # Пользователь уже существует
     except sqlite3.Error as e:
         print(f"Ошибка при добавлении пользователя: {e}")
         return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
-def check_user(username: str, password: str) -> bool:
-    """Проверяет существование пользователя"""
+@profiled('sql.users.add_users')
+def add_users(users: Iterable[Tuple[str, str]], iterations: Optional[int] = None,
+              workers: Optional[int] = None) -> List[Tuple[str, str, str]]:
+    """Добавляет пользователей пачкой: пары (логин, пароль)
+
+    Пароли хэшируются параллельно в пуле потоков (PBKDF2 отпускает GIL),
+    затем новые пользователи записываются одним executemany в одной
+    транзакции; строка, пароль которой не удалось хэшировать, в пачку не
+    попадает. Возвращает (логин, состояние, сообщение) для каждой строки в
+    порядке входа; состояние - USER_CREATED, USER_EXISTS (логин уже есть в
+    базе), USER_REPEATED (логин раньше в этой же пачке) или USER_FAILED
+    (сообщение - текст ошибки).
+    """
+    users = [(username, password) for username, password in users]
+    conn = _get_users_connection()
+    results = [None] * len(users)
+
+    # Первое вхождение логина в пачке; повторы и существующие не хэшируем
+    candidates = {}
+    for row, (username, password) in enumerate(users):
+        if not username:
+            results[row] = (username, USER_FAILED, "Пустой логин")
+        elif username in candidates:
+            results[row] = (username, USER_REPEATED, "")
+        else:
+            candidates[username] = (row, password)
+    existing = _existing_usernames(conn, candidates)
+    pending = []
+    for username, (row, password) in candidates.items():
+        if username in existing:
+            results[row] = (username, USER_EXISTS, "")
+        else:
+            pending.append((username, row, password))
+
+    def hash_row(item):
+        try:
+            return hash_password(item[2], iterations), ""
+        except (AttributeError, TypeError, ValueError) as e:
+            return None, f"Неверный пароль: {e}"
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        hashes = list(executor.map(hash_row, pending))
+
+    rows = []
+    for (username, row, _), (password_hash, message) in zip(pending, hashes):
+        if password_hash is None:
+            results[row] = (username, USER_FAILED, message)
+        else:
+            rows.append((username, row, password_hash))
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE username = ? AND password = ?",
-                      (username, password))
-        user = cursor.fetchone()
-        return user is not None
+        with conn:
+            # Блокировка записи до вставки: между проверкой и вставкой никто не добавит тот же логин
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+                             [(username, password_hash) for username, _, password_hash in rows])
+            # Хэш с солью уникален: чужой хэш - логин добавили после первой проверки
+            stored = _stored_passwords(conn, [username for username, _, _ in rows])
+        for username, row, password_hash in rows:
+            results[row] = (username, USER_CREATED if stored.get(username) == password_hash else USER_EXISTS, "")
+    except sqlite3.Error as e:
+        # Транзакция не началась или не зафиксирована: не добавлен никто из новых
+        print(f"Ошибка при добавлении пользователей: {e}")
+        for username, row, _ in rows:
+            results[row] = (username, USER_FAILED, str(e))
+
+    return results
+
+def add_users_from_csv(file_path: str, iterations: Optional[int] = None,
+                       workers: Optional[int] = None) -> List[Tuple[str, str, str]]:
+    """Добавляет пользователей из CSV со столбцами username и password"""
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        users = [(row["username"].strip(), row["password"]) for row in csv.DictReader(f)
+                 if row.get("username")]
+    return add_users(users, iterations, workers)
+
+def _existing_usernames(conn, usernames) -> set:
+    """Логины из списка, которые уже есть в базе"""
+    return set(_stored_passwords(conn, usernames))
+
+def _stored_passwords(conn, usernames) -> dict:
+    """Сохраненные пароли логинов из списка, которые есть в базе (запросы по 500 параметров)"""
+    usernames = list(usernames)
+    stored = {}
+    for start in range(0, len(usernames), 500):
+        chunk = usernames[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        stored.update(conn.execute(
+            f"SELECT username, password FROM users WHERE username IN ({placeholders})", chunk))
+    return stored
+
+@profiled('sql.users.check_user')
+def check_user(username: str, password: str, iterations: Optional[int] = None) -> bool:
+    """Проверяет логин и пароль пользователя
+
+    Пароли, сохраненные открытым текстом или с другой стоимостью хэша,
+    после успешной проверки перезаписываются хэшем с текущей стоимостью.
+    """
+    try:
+        conn = _get_users_connection()
+        row = conn.execute("SELECT password FROM users WHERE username = ?",
+                           (username,)).fetchone()
+        if row is None:
+            # Та же работа PBKDF2, что и для существующего логина
+            verify_password(password, dummy_hash(iterations))
+            return False
+        stored = row[0]
+        if session_cache.check(username, password, stored):
+            return True
+        if not verify_password(password, stored):
+            return False
+
+        if needs_rehash(stored, iterations):
+            stored = hash_password(password, iterations)
+            with conn:
+                conn.execute("UPDATE users SET password = ? WHERE username = ?",
+                             (stored, username))
+        session_cache.remember(username, password, stored)
+        return True
     except sqlite3.Error as e:
         print(f"Ошибка при проверке пользователя: {e}")
         return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
-
-# Создаем базу данных при импорте модуля
-create_database()
\ No newline at end of file
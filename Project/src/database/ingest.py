@@ -0,0 +1,235 @@
+# ingest.py
+"""Автоматический импорт книг Excel из папки
+
+Папка просматривается целиком при каждом вызове scan_folder; для каждой
+книги результат сохраняется в таблице ingested_files. Книга загружается
+через FinancialDataManager.load_data_from_excel, только если ее
+содержимое новое:
+
+- отметка файла (размер и время изменения) не менялась - файл не читается;
+- отметка изменилась, но совпал хэш байтов или хэш значений ячеек с уже
+  загруженным содержимым этого файла - книгу пересохранили без изменений;
+- содержимое совпало с другим загруженным файлом - дубликат, не загружается.
+
+Хэш содержимого считается по значениям ячеек, а не по байтам файла:
+Excel при пересохранении меняет дату в свойствах книги и порядок общих
+строк, но не значения. Книга, которую еще копируют в папку (изменялась
+меньше SETTLE_SECONDS назад), пропускается до следующего просмотра.
+
+Запуск из каталога Project:
+
+    python -m src.database.ingest --folder /srv/reports            # один просмотр
+    python -m src.database.ingest --folder /srv/reports --watch    # просмотр раз в --interval с
+"""
+import argparse
+import fnmatch
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+import zipfile
+from typing import Callable, Dict, List, Optional, Sequence
+from src.database.connection import FINANCIAL_DB_PATH, get_connection, close_thread_connections
+from src.database.data_manager import FinancialDataManager
+
+# Файлы папки, которые считаются книгами отчетов; временные файлы Excel (~$) пропускаются
+WORKBOOK_PATTERNS = ("*.xlsx", "*.xlsm")
+# Сколько секунд файл не должен меняться, прежде чем его читать
+SETTLE_SECONDS = 2.0
+# Блок чтения файла при подсчете хэша байтов
+HASH_BLOCK_SIZE = 1 << 20
+
+# Состояния файлов в ingested_files и в отчете о просмотре
+IMPORTED = 'imported'  # Загружен
+UNCHANGED = 'unchanged'  # Пересохранен без изменений; только в отчете, в базе - прежнее состояние
+DUPLICATE = 'duplicate'  # То же содержимое, что у другого загруженного файла
+ERROR = 'error'  # Не прочитан или не загружен; повторная попытка - см. ingest_file
+WAITING = 'waiting'  # Еще копируется; только в отчете, в базу не пишется
+
+
+def file_hash(file_path: str) -> str:
+    """SHA-256 байтов файла"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 значений ячеек книги: листы по порядку, строки без пустых ячеек в конце
+
+    Книга читается построчно в режиме read-only, как и при загрузке.
+    Пустые строки и пустые ячейки в конце строк не учитываются: после
+    пересохранения Excel может изменить размеры листа.
+    """
+    from openpyxl import load_workbook
+
+    digest = hashlib.sha256()
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            digest.update(b"\x00sheet" + sheet.title.encode())
+            for row in sheet.iter_rows(values_only=True):
+                size = len(row)
+                while size and row[size - 1] is None:
+                    size -= 1
+                if size:
+                    digest.update(repr(row[:size]).encode() + b"\n")
+    finally:
+        workbook.close()
+    return digest.hexdigest()
+
+
+def list_ingested(db_path: str = FINANCIAL_DB_PATH) -> List[Dict]:
+    """Сохраненные состояния файлов, последние изменения первыми"""
+    cursor = get_connection(db_path).execute("""
+        SELECT file_path, status, rows, message, updated_at
+        FROM ingested_files ORDER BY updated_at DESC
+        """)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def _record(conn, file_path: str, stamp: str, raw_hash: str, cell_hash: str, status: str,
+            rows: int = 0, message: str = ""):
+    with conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO ingested_files
+                (file_path, file_stamp, file_hash, content_hash, status, rows, message, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (file_path, stamp, raw_hash, cell_hash, status, rows, message, time.time()))
+
+
+def _loaded_copy(conn, file_path: str, column: str, value: str) -> Optional[tuple]:
+    """Другой загруженный файл с тем же хэшем (column - file_hash или content_hash)
+
+    Возвращает (путь файла, хэш содержимого) или None.
+    """
+    return conn.execute(
+        f"SELECT file_path, content_hash FROM ingested_files "
+        f"WHERE {column} = ? AND status = ? AND file_path != ?",
+        (value, IMPORTED, file_path)).fetchone()
+
+
+def _workbooks(folder: str) -> List[str]:
+    """Книги папки (без подпапок) в порядке времени изменения"""
+    paths = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and not entry.name.startswith("~$") and \
+                    any(fnmatch.fnmatch(entry.name.lower(), pattern) for pattern in WORKBOOK_PATTERNS):
+                paths.append((entry.stat().st_mtime_ns, os.path.abspath(entry.path)))
+    return [path for _, path in sorted(paths)]
+
+
+def ingest_file(data_manager: FinancialDataManager, file_path: str,
+                settle_seconds: float = SETTLE_SECONDS) -> Optional[Dict]:
+    """Загружает книгу, если ее содержимое новое
+
+    Возвращает состояние файла (file_path, status, rows, message) или None,
+    если файл с прошлого просмотра не менялся. Книга неверного формата
+    запоминается с отметкой файла и повторно читается после его изменения.
+    Временные ошибки (база занята записью правок, файл открыт в Excel) не
+    записываются: следующий просмотр загрузит книгу еще раз.
+    """
+    file_path = os.path.abspath(file_path)
+    conn = get_connection(data_manager.db_path)
+    stat = os.stat(file_path)
+    stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+    if time.time() - stat.st_mtime < settle_seconds:
+        return {'file_path': file_path, 'status': WAITING, 'rows': 0, 'message': ""}
+
+    known = conn.execute(
+        "SELECT file_stamp, file_hash, content_hash, status, rows, message FROM ingested_files "
+        "WHERE file_path = ?",
+        (file_path,)).fetchone()
+    if known is not None and known[0] == stamp:
+        return None
+    # Содержимое, которое уже учтено для этого файла: загружено или признано дубликатом
+    settled = known is not None and known[3] in (IMPORTED, DUPLICATE)
+
+    def result(status, raw_hash, cell_hash="", rows=0, message="", stored_status=None):
+        _record(conn, file_path, stamp, raw_hash, cell_hash, stored_status or status, rows, message)
+        return {'file_path': file_path, 'status': status, 'rows': rows, 'message': message}
+
+    raw_hash = ""
+    try:
+        raw_hash = file_hash(file_path)
+        if settled and known[1] == raw_hash:
+            # Файл перезаписан теми же байтами; в базе остается прежнее состояние
+            return result(UNCHANGED, raw_hash, known[2], known[4], known[5], known[3])
+        # Хэш байтов дешевле разбора книги: побайтная копия находится без чтения ячеек
+        original = _loaded_copy(conn, file_path, 'file_hash', raw_hash)
+        if original is not None:
+            return result(DUPLICATE, raw_hash, original[1], message=original[0])
+        cell_hash = content_hash(file_path)
+        if settled and known[2] == cell_hash:
+            return result(UNCHANGED, raw_hash, cell_hash, known[4], known[5], known[3])
+        original = _loaded_copy(conn, file_path, 'content_hash', cell_hash)
+        if original is not None:
+            return result(DUPLICATE, raw_hash, cell_hash, message=original[0])
+        rows = data_manager.load_data_from_excel(file_path)
+    except (OSError, sqlite3.Error) as e:
+        # Прежнее состояние файла в базе не затирается: загруженная книга
+        # остается образцом для поиска дубликатов
+        return {'file_path': file_path, 'status': ERROR, 'rows': 0, 'message': str(e) or type(e).__name__}
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        # openpyxl сообщает о поврежденной книге через BadZipFile, KeyError и ValueError
+        return result(ERROR, raw_hash, message=str(e) or type(e).__name__)
+    return result(IMPORTED, raw_hash, cell_hash, rows)
+
+
+def scan_folder(data_manager: FinancialDataManager, folder: str,
+                on_status: Optional[Callable[[Dict], None]] = None,
+                is_cancelled: Optional[Callable[[], bool]] = None,
+                settle_seconds: float = SETTLE_SECONDS) -> List[Dict]:
+    """Просматривает папку и загружает новые книги; возвращает состояния измененных файлов
+
+    on_status(состояние) вызывается после каждого такого файла. Если
+    is_cancelled() вернет True, просмотр прекращается перед следующим файлом.
+    """
+    statuses = []
+    for file_path in _workbooks(folder):
+        if is_cancelled is not None and is_cancelled():
+            break
+        try:
+            status = ingest_file(data_manager, file_path, settle_seconds)
+        except FileNotFoundError:
+            # Файл удалили или переименовали во время просмотра
+            continue
+        if status is None:
+            continue
+        statuses.append(status)
+        if on_status is not None:
+            on_status(status)
+    return statuses
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Импорт книг Excel из папки")
+    parser.add_argument("--db", default=FINANCIAL_DB_PATH, help="база данных (по умолчанию база приложения)")
+    parser.add_argument("--folder", required=True)
+    parser.add_argument("--watch", action="store_true", help="просматривать папку, пока не прервут")
+    parser.add_argument("--interval", type=float, default=10.0, help="пауза между просмотрами, с")
+    args = parser.parse_args(argv)
+
+    data_manager = FinancialDataManager(args.db)
+    show = lambda status: print(f"{status['status']:<10} {status['file_path']} "
+                                f"{status['rows'] or ''} {status['message']}".rstrip())
+    try:
+        while True:
+            scan_folder(data_manager, args.folder, on_status=show)
+            if not args.watch:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_thread_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# security.py
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+# Число итераций PBKDF2-SHA256 для новых паролей (стоимость проверки).
+# Время входа при разной стоимости показывает benchmarks/login_latency.py
+PASSWORD_ITERATIONS = 200_000
+SALT_SIZE = 16
+HASH_ALGORITHM = "pbkdf2_sha256"
+
+# Сколько секунд проверенный пароль принимается без повторного PBKDF2
+SESSION_CACHE_TTL = 15 * 60
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """Хэш пароля со случайной солью в виде 'pbkdf2_sha256$итерации$соль$хэш'"""
+    iterations = iterations or PASSWORD_ITERATIONS
+    salt = os.urandom(SALT_SIZE)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{HASH_ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def _parse(stored: str) -> Optional[Tuple[int, bytes, bytes]]:
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != HASH_ALGORITHM:
+        return None
+    try:
+        return int(parts[1]), bytes.fromhex(parts[2]), bytes.fromhex(parts[3])
+    except ValueError:
+        return None
+
+
+def is_hashed(stored: str) -> bool:
+    """False для паролей, сохраненных открытым текстом до перехода на хэши"""
+    return _parse(stored) is not None
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Сравнивает пароль с сохраненным хэшем за постоянное время
+
+    Пароли старого формата (открытый текст) сравниваются напрямую -
+    после успешного входа их нужно перезаписать хэшем.
+    """
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    iterations, salt, expected = parsed
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return hmac.compare_digest(digest, expected)
+
+
+@lru_cache(maxsize=None)
+def dummy_hash(iterations: Optional[int] = None) -> str:
+    """Постоянный хэш для проверки пароля несуществующего пользователя
+
+    Проверка по нему занимает столько же времени, сколько по настоящему
+    хэшу, и время ответа не выдает, есть ли такой логин.
+    """
+    return hash_password(secrets.token_hex(16), iterations)
+
+
+def needs_rehash(stored: str, iterations: Optional[int] = None) -> bool:
+    """Нужно ли перезаписать пароль: открытый текст или другая стоимость"""
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] != (iterations or PASSWORD_ITERATIONS)
+
+
+class VerifiedSessionCache:
+    """Кэш успешных проверок пароля на время сеанса
+
+    Хранит не пароль, а HMAC от него на случайном ключе процесса, и
+    сохраненный хэш, с которым пароль был сверен: смена пароля в базе
+    делает запись недействительной. Записи живут ttl секунд.
+    """
+
+    def __init__(self, ttl: float = SESSION_CACHE_TTL):
+        self.ttl = ttl
+        self._key = secrets.token_bytes(32)
+        self._entries: Dict[str, Tuple[str, bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def _token(self, password: str) -> bytes:
+        return hmac.new(self._key, password.encode("utf-8"), hashlib.sha256).digest()
+
+    def check(self, username: str, password: str, stored: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return False
+            cached_stored, token, expires = entry
+            if time.monotonic() >= expires:
+                del self._entries[username]
+                return False
+        return cached_stored == stored and hmac.compare_digest(token, self._token(password))
+
+    def remember(self, username: str, password: str, stored: str):
+        with self._lock:
+            self._entries[username] = (stored, self._token(password), time.monotonic() + self.ttl)
+
+    def forget(self, username: Optional[str] = None):
+        """Удаляет запись пользователя (или все записи)"""
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
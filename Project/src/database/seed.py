@@ -0,0 +1,165 @@
+# seed.py
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, COSTS_TABLE
+
+# Версия начальных данных; увеличивается, когда в них появляется новая
+# таблица: при следующем запуске записываются только пустые таблицы, а
+# исправления уже записанных строк делаются миграцией (apply_seed)
+SEED_VERSION = 1
+
+SEED_COLUMNS = ('code', 'parameter', '2013', '2014', '2015', 'section')
+
+# Данные для таблицы 1 (Собственный капитал)
+CAPITAL_SEED = [
+    ("010", "Остаток на 31.12.2013 года", 40255, 32846, 28015, "Основные данные"),
+    ("020", "Корректировки (учетная политика)", 0, 0, 0, "Основные данные"),
+    ("030", "Корректировки (исправление ошибок)", 0, 0, 0, "Основные данные"),
+    ("040", "Скорректированный остаток на 31.12.2013 года", 40255, 32846, 28015, "Основные данные"),
+    ("050", "Увеличение собственного капитала - всего", 0, 6500, 3552, "Основные данные"),
+    ("051", "    В том числе: чистая прибыль", 0, 0, 0, "Основные данные"),
+    ("052", "    переоценка долгосрочных активов", 0, 0, 0, "Основные данные"),
+    ("053", "    доходы от прочих операций...", 0, 0, 0, "Основные данные"),
+    ("054", "    выпуск дополнительных акций", 0, 6500, 3552, "Основные данные"),
+    ("070", "Изменение уставного капитала", 0, 909, 1279, "Основные данные"),
+    ("100", "Остаток на 31.12.2014 года", 40255, 40255, 32846, "Основные данные"),
+    ("150", "Увеличение собственного капитала - всего", 0, 0, 6500, "Основные данные"),
+    ("154", "    выпуск дополнительных акций", 0, 0, 6500, "Основные данные"),
+    ("170", "Изменение уставного капитала", 0, 0, 909, "Основные данные"),
+    ("200", "Остаток на 31.12.2015 года", 40255, 40255, 40255, "Основные данные"),
+]
+
+# Данные для таблицы 2 (Затраты на производство)
+COSTS_SEED = [
+    # Раздел I
+    ("001",
+     "Объем производства продукции (работ, услуг) в отпускных ценах за вычетом налогов и сборов, исчисляемых из выручки",
+     552219, 444964, 420396, "Раздел I"),
+    ("002", "Затраты на производство продукции (работ, услуг)", 390660, 329104, 275832, "Раздел I"),
+    ("003", "материальные затраты", 219913, 170476, 182752, "Раздел I"),
+    ("004", "сырье, материалы, покупные комплектующие изделия и полуфабрикаты", 179129, 136870, 143680,
+     "Раздел I"),
+    ("005", "из них импортные", 141298, 111927, 117322, "Раздел I"),
+    ("006", "топливо", 18184, 12099, 20655, "Раздел I"),
+    ("007", "из него импортное", 16672, 10684, 19904, "Раздел I"),
+    ("008", "электрическая энергия", 19284, 18258, 15607, "Раздел I"),
+    ("009", "тепловая энергия", 1604, 1225, 1355, "Раздел I"),
+    ("010", "затраты на оплату труда", 90033, 82560, 58000, "Раздел I"),
+    ("011", "отчисления на социальные нужды", 28129, 25347, 18512, "Раздел I"),
+    ("012",
+     "амортизация основных средств и нематериальных активов, используемых в предпринимательской деятельности",
+     34224, 34398, 1577, "Раздел I"),
+    ("013", "амортизация основных средств", 33537, 33757, 1134, "Раздел I"),
+    ("014", "амортизация нематериальных активов", 687, 641, 443, "Раздел I"),
+    ("015", "прочие затраты", 18361, 16323, 14991, "Раздел I"),
+    ("016", "расходы на рекламу - всего", 114, 10, 90, "Раздел I"),
+    ("017", "из них на: наружную", 0, 0, 0, "Раздел I"),
+    ("018", "телевизионную", 0, 0, 0, "Раздел I"),
+    ("019", "интернет-рекламу", 0, 0, 0, "Раздел I"),
+    ("203", "Плата за природные ресурсы (из строки 003)", 291, 229, 226, "Раздел I"),
+    ("215", "Отдельные статьи затрат (из строки 015)", 13921, 12598, 10447, "Раздел I"),
+
+    # Раздел II
+    ("020",
+     "Объем производства продукции (работ, услуг) в отпускных ценах за вычетом налогов и сборов, исчисляемых из выручки",
+     454453, 389711, 342288, "Раздел II"),
+    ("021", "Затраты на производство продукции (работ, услуг)", 313933, 287262, 219072, "Раздел II"),
+    ("022", "материальные затраты", 176457, 148361, 145344, "Раздел II"),
+    ("023", "сырье и материалы", 65941, 46936, 53868, "Раздел II"),
+    ("024", "покупные комплектующие изделия и полуфабрикаты", 77469, 71642, 59932, "Раздел II"),
+    ("025", "работы (услуги) производственного характера, выполненные другими организациями", 921, 1527, 981,
+     "Раздел II"),
+    ("026", "перевозка грузов", 0, 0, 0, "Раздел II"),
+    ("027", "текущий и капитальный ремонт зданий и сооружений", 460, 725, 235, "Раздел II"),
+    ("028", "техническое обслуживание и ремонт офисных машин и вычислительной техники", 58, 78, 39,
+     "Раздел II"),
+    ("029", "техническое обслуживание и ремонт автомобилей и мотоциклов", 403, 724, 707, "Раздел II"),
+    ("030", "топливо", 14854, 10741, 16692, "Раздел II"),
+    ("031", "электрическая энергия", 15747, 16196, 12595, "Раздел II"),
+    ("032", "тепловая энергия", 1295, 1138, 1099, "Раздел II"),
+    ("033", "прочие материальные затраты", 230, 181, 177, "Раздел II"),
+    ("034", "плата за природные ресурсы", 230, 181, 177, "Раздел II"),
+    ("035", "налог на добавленную стоимость, включенный в затраты", 0, 0, 0, "Раздел II"),
+    ("036", "затраты на оплату труда", 72225, 71987, 45944, "Раздел II"),
+    ("037", "из них расходы на форменную и фирменную одежду, обмундирование", 0, 0, 0, "Раздел II"),
+    ("038", "отчисления на социальные нужды", 22536, 22059, 14629, "Раздел II"),
+    ("039",
+     "амортизация основных средств и нематериальных активов, используемых в предпринимательской деятельности",
+     27868, 30571, 1266, "Раздел II"),
+    ("040", "прочие затраты", 14847, 14284, 11889, "Раздел II"),
+    ("041", "арендная плата", 104, 114, 172, "Раздел II"),
+    ("042", "вознаграждения за рационализаторские предложения и выплата авторских гонораров", 0, 0, 0,
+     "Раздел II"),
+    ("043", "суточные и подъемные", 1209, 148, 512, "Раздел II"),
+    ("044",
+     "начисленные налоги, сборы (пошлины), платежи, включаемые в затраты на производство продукции (работ, услуг)",
+     1704, 1977, 1870, "Раздел II"),
+    ("045", "представительские расходы", 10, 11, 10, "Раздел II"),
+    ("046", "услуги других организаций", 11284, 11043, 8207, "Раздел II"),
+    ("047", "гостиниц и прочих мест временного проживания", 263, 135, 45, "Раздел II"),
+    ("048", "пассажирского транспорта", 104, 151, 71, "Раздел II"),
+    ("049", "связи", 261, 297, 287, "Раздел II"),
+    ("050", "по созданию и обновлению web-сайтов", 0, 0, 0, "Раздел II"),
+    ("051", "по научным разработкам", 0, 0, 0, "Раздел II"),
+    ("052", "по охране имущества", 143, 186, 53, "Раздел II"),
+    ("053", "банков и небанковских кредитно-финансовых организаций", 1406, 1174, 593, "Раздел II"),
+    ("054", "консультационные, аудиторские", 107, 320, 785, "Раздел II"),
+    ("055", "по уборке территории, сбору и вывозу отходов", 390, 407, 381, "Раздел II"),
+    ("056", "образования", 107, 34, 39, "Раздел II"),
+    ("057", "здравоохранения", 64, 117, 100, "Раздел II"),
+    ("058", "другие затраты", 536, 991, 1118, "Раздел II"),
+    ("059",
+     "Прирост (+) или уменьшение (–) остатка незавершенного производства, полуфабрикатов и приспособлений собственной выработки, не включаемых в стоимость продукции",
+     -6219, -6416, 3787, "Раздел II"),
+    ("060", "Внутризаводской оборот, включаемый в затраты на производство продукции (работ, услуг)", 0, 0, 0,
+     "Раздел II"),
+    ("061", "Внутризаводской оборот, включаемый в объем продукции (работ, услуг)", 0, 0, 0, "Раздел II"),
+    ("062", "Командировочные расходы", 1425, 1604, 1154, "Раздел II"),
+    ("063", "семена и посадочный материал", 0, 0, 0, "Раздел II"),
+    ("064", "из них покупные", 0, 0, 0, "Раздел II"),
+    ("065", "корма", 0, 0, 0, "Раздел II"),
+    ("066", "из них покупные", 0, 0, 0, "Раздел II"),
+    ("067", "минеральные удобрения", 0, 0, 0, "Раздел II"),
+    ("068", "средства защиты растений и животных", 0, 0, 0, "Раздел II"),
+    ("069", "подстилка, яйцо для инкубации, навоз", 0, 0, 0, "Раздел II"),
+
+    # Раздел IV
+    ("110", "Продукты и услуги сельского хозяйства и охоты", 0, 0, 0, "Раздел IV"),
+    ("111", "Продукты и услуги лесного хозяйства", 5, 5, 6, "Раздел IV"),
+    ("112", "Продукты и услуги рыболовства и рыбоводства", 0, 0, 0, "Раздел IV"),
+    ("113", "Уголь", 0, 0, 0, "Раздел IV"),
+    ("114", "Торф", 0, 0, 0, "Раздел IV"),
+    ("115", "Сырая нефть и природный газ", 14218, 0, 0, "Раздел IV"),
+    ("116", "Металлические руды и прочие продукты горнодобывающей промышленности", 263, 263, 270, "Раздел IV"),
+    ("117", "Пищевые продукты, включая напитки, табачные изделия", 130, 130, 250, "Раздел IV"),
+    ("118", "Продукты и услуги текстильного производства, одежда, меха и меховые изделия", 880, 1062, 986,
+     "Раздел IV"),
+    ("119", "Кожа, изделия из кожи, обувь", 0, 0, 0, "Раздел IV"),
+    ("120",
+     "Продукты обработки древесины, изделия из дерева и пробки, кроме мебели, изделия из соломки и материалов для плетения",
+     47, 47, 202, "Раздел IV"),
+    ("121",
+     "Целлюлоза, древесная масса, бумага, картон и изделия из них. Издательская и полиграфическая продукция",
+     13981, 2820, 4188, "Раздел IV"),
+    ("122", "Кокс, ядерные материалы", 0, 0, 0, "Раздел IV"),
+    ("123", "Нефтепродукты", 1774, 24, 28, "Раздел IV"),
+    ("124", "Химическая продукция", 16291, 1417, 2755, "Раздел IV"),
+    ("125", "Резиновые и пластмассовые изделия", 50, 27, 112, "Раздел IV"),
+    ("126", "Прочие неметаллические минеральные продукты", 39973, 4915, 3817, "Раздел IV"),
+    ("127", "Продукты и услуги металлургического производства и готовые металлические изделия", 38425, 19009,
+     13939, "Раздел IV"),
+    ("128", "Машины и оборудование", 4168, 3448, 1944, "Раздел IV"),
+    ("129", "Электрическое оборудование, электронное и оптическое оборудование", 528, 1824, 254, "Раздел IV"),
+    ("130", "Транспортные средства и оборудование", 204, 438, 527, "Раздел IV"),
+    ("131", "Мебель и прочая промышленная продукция, не включенная в другие строки. Обработка вторичного сырья",
+     0, 0, 0, "Раздел IV"),
+    ("132", "Электрическая энергия, газообразное топливо, пар и горячая вода", 13694, 0, 0, "Раздел IV"),
+    ("133", "Услуги по сбору, очистке и распределению воды", 0, 0, 0, "Раздел IV"),
+    ("134", "Всего (сумма строк с 110 по 133)", 144186, 35429, 29278, "Раздел IV"),
+]
+
+
+def ensure_seed_data(data_manager: FinancialDataManager) -> bool:
+    """Записывает начальные данные один раз для каждой версии SEED_VERSION"""
+    return data_manager.apply_seed(SEED_VERSION, {
+        CAPITAL_TABLE: (dict(zip(SEED_COLUMNS, row)) for row in CAPITAL_SEED),
+        COSTS_TABLE: (dict(zip(SEED_COLUMNS, row)) for row in COSTS_SEED),
+    })
@@ -0,0 +1,284 @@
+# snapshot.py
+"""Столбцовый снимок базы отчетов в формате Arrow IPC
+
+Снимок - файл рядом с базой (financial_data.db.arrow), в котором каждая
+таблица каждой организации лежит отдельным пакетом записей: код,
+название, раздел, значения по годам и производные показатели (темп
+роста и отклонение от предыдущего года таблицы, за который есть
+данные). Файл открывается через memory-map, поэтому открытие стоит
+чтения оглавления, а чтение таблицы - только страниц ее пакета, без
+разбора всей базы.
+
+Снимок помечен версией данных базы (app_meta.data_version) на момент
+записи. Таблица в снимке действительна, пока ее версия в table_versions
+не новее: правка одной организации не отменяет снимок остальных. При
+перезаписи неизмененные таблицы копируются из прежнего снимка, из
+SQLite читаются только измененные. Без pyarrow снимки не пишутся и не
+читаются - данные загружаются из SQLite.
+
+Запуск из каталога Project (например, после массового импорта):
+
+    python -m src.database.snapshot --db src/database/financial_data.db
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.analysis.metrics import previous_year
+from src.analysis.table_store import TableStore
+from src.database.connection import FINANCIAL_DB_PATH, get_connection, close_thread_connections
+from src.database.data_manager import FinancialDataManager
+from src.profiler import profiled
+
+SNAPSHOT_SUFFIX = ".arrow"
+# Строк в порции при чтении таблицы из базы для снимка
+READ_CHUNK_SIZE = 5000
+
+
+def snapshot_path(db_path: str = FINANCIAL_DB_PATH) -> str:
+    return db_path + SNAPSHOT_SUFFIX
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _years_of_tables(db_path: str) -> Dict[Tuple[str, str], List[int]]:
+    """Годы, за которые есть значения, по каждой таблице каждой организации"""
+    years = {}
+    for entity, table_name in get_connection(db_path).execute(
+            "SELECT DISTINCT entity, table_name FROM parameters ORDER BY entity, table_name"):
+        years[(entity, table_name)] = []
+    for entity, table_name, year in get_connection(db_path).execute(
+            "SELECT DISTINCT entity, table_name, year FROM financial_values ORDER BY entity, table_name, year"):
+        years.setdefault((entity, table_name), []).append(year)
+    return dict(sorted(years.items()))
+
+
+def _schema(all_years: Sequence[int], metadata: Dict[bytes, bytes]):
+    import pyarrow as pa
+
+    fields = [pa.field('code', pa.string()), pa.field('parameter', pa.string()),
+              pa.field('section', pa.string())]
+    fields += [pa.field(str(year), pa.float64()) for year in all_years]
+    # Производные показатели - для каждого года, кроме первого
+    for year in all_years[1:]:
+        fields += [pa.field(f"growth_{year}", pa.float64()), pa.field(f"change_{year}", pa.float64())]
+    return pa.schema(fields, metadata=metadata)
+
+
+def _record_batch(store: TableStore, schema):
+    """Пакет записей таблицы; годы, которых нет в таблице, - нули, их показатели - null"""
+    import pyarrow as pa
+
+    size = len(store)
+    columns = {
+        'code': pa.array(store.codes, pa.string()),
+        'parameter': pa.array(store.names, pa.string()),
+        # Словарное кодирование не годится: в файле IPC словарь один на все пакеты
+        'section': pa.array([store.section(row) for row in range(size)], pa.string()),
+    }
+    for field in schema:
+        name = field.name
+        if name.isdigit():
+            columns[name] = pa.array(store.column(int(name)), pa.float64())
+        elif name.startswith('growth_') or name.startswith('change_'):
+            year = int(name.split('_')[1])
+            prev = previous_year(year, store.years)
+            if store.has_year(year) and prev is not None:
+                data = (store.growth_rates(year, prev) if name.startswith('growth_')
+                        else store.absolute_changes(year, prev))
+                columns[name] = pa.array(data, pa.float64(), from_pandas=True)  # NaN -> null
+            else:
+                columns[name] = pa.nulls(size, pa.float64())
+    return pa.record_batch([columns[field.name] for field in schema], schema=schema)
+
+
+@profiled('snapshot.write')
+def write_snapshot(data_manager: FinancialDataManager, path: Optional[str] = None) -> str:
+    """Записывает снимок всей базы; возвращает путь файла
+
+    Таблицы, которые не менялись после записи прежнего снимка (и годы
+    базы те же), копируются из него; остальные читаются из базы. Файл
+    пишется во временный и подменяет прежний целиком, поэтому уже
+    открытые снимки дочитываются без ошибок. Версии данных читаются до
+    чтения таблиц: запись в базу во время снимка сделает устаревшими
+    только измененные ею таблицы.
+    """
+    import pyarrow as pa
+
+    path = path or snapshot_path(data_manager.db_path)
+    version = data_manager.data_version()
+    table_versions = data_manager.table_versions()
+    years = _years_of_tables(data_manager.db_path)
+    all_years = sorted({year for table_years in years.values() for year in table_years})
+
+    previous = open_snapshot(path)
+    if previous is not None and previous.years != all_years:
+        # Другой набор столбцов лет - пакеты прежнего снимка не подходят
+        previous.close()
+        previous = None
+
+    # Оглавление: (организация, таблица) -> номер пакета и годы таблицы
+    index = [[entity, table_name, number, table_years]
+             for number, ((entity, table_name), table_years) in enumerate(years.items())]
+    schema = _schema(all_years, {b'data_version': str(version).encode(),
+                                 b'index': json.dumps(index, ensure_ascii=False).encode()})
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    os.close(fd)
+    try:
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+                entities = {}
+                for entity, table_name in years:
+                    entities.setdefault(entity, []).append(table_name)
+                for entity, table_names in entities.items():
+                    stale = [table_name for table_name in table_names
+                             if previous is None or not previous.is_fresh(entity, table_name, table_versions)]
+                    stores = {table_name: TableStore(years[(entity, table_name)]) for table_name in stale}
+                    if stale:
+                        for table_name, rows in data_manager.iter_tables(stale, entity,
+                                                                           chunk_size=READ_CHUNK_SIZE):
+                            stores[table_name].append_rows(rows)
+                    # Пакеты идут в порядке оглавления: организации и таблицы по алфавиту
+                    for table_name in table_names:
+                        if table_name in stores:
+                            batch = _record_batch(stores[table_name], schema)
+                        else:
+                            batch = pa.record_batch(previous.metrics(entity, table_name).columns,
+                                                    schema=schema)
+                        writer.write_batch(batch)
+        finally:
+            if previous is not None:
+                # До подмены файла: в Windows нельзя заменить отображенный в память файл
+                previous.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+def _float_values(array) -> np.ndarray:
+    """Значения столбца float64 без null как массив numpy поверх отображенного файла
+
+    Array.to_numpy при первом вызове загружает pandas (около 0,3 с),
+    поэтому буфер значений читается напрямую.
+    """
+    return np.frombuffer(array.buffers()[1], dtype=np.float64, count=len(array), offset=array.offset * 8)
+
+
+class Snapshot:
+    """Открытый через memory-map снимок базы
+
+    Таблицы читаются из отображенного файла по запросу; в память
+    копируются только значения запрошенной таблицы.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+
+        self.path = path
+        self._source = pa.memory_map(path, 'r')
+        try:
+            self._reader = pa.ipc.open_file(self._source)
+            metadata = self._reader.schema.metadata or {}
+            self.data_version = int(metadata[b'data_version'])
+            self._index = {(entity, table_name): (number, table_years)
+                           for entity, table_name, number, table_years in json.loads(metadata[b'index'])}
+            self.years = [int(field.name) for field in self._reader.schema if field.name.isdigit()]
+        except Exception:
+            self._source.close()
+            raise
+
+    def entities(self) -> List[str]:
+        return sorted({entity for entity, _ in self._index})
+
+    def tables(self, entity: str) -> List[str]:
+        return sorted(table_name for table_entity, table_name in self._index if table_entity == entity)
+
+    def has_table(self, entity: str, table_name: str) -> bool:
+        return (entity, table_name) in self._index
+
+    def is_fresh(self, entity: str, table_name: str, table_versions: Dict[Tuple[str, str], int]) -> bool:
+        """Совпадает ли таблица в снимке с базой
+
+        table_versions - FinancialDataManager.table_versions(). Таблица,
+        которой нет ни в снимке, ни в базе, тоже считается совпадающей.
+        """
+        version = table_versions.get((entity, table_name))
+        if version is None or version > self.data_version:
+            # Таблица изменена после снимка или создана до учета версий таблиц
+            return version is None and not self.has_table(entity, table_name)
+        return True
+
+    def _batch(self, entity: str, table_name: str):
+        number, _ = self._index[(entity, table_name)]
+        return self._reader.get_batch(number)
+
+    @profiled('snapshot.table')
+    def table(self, entity: str, table_name: str) -> TableStore:
+        """Строки таблицы организации; KeyError, если таблицы нет в снимке"""
+        batch = self._batch(entity, table_name)
+        _, years = self._index[(entity, table_name)]
+        values = np.empty((batch.num_rows, len(years)), dtype=np.float64)
+        for column, year in enumerate(years):
+            values[:, column] = _float_values(batch.column(str(year)))
+        return TableStore.from_arrays(years, batch.column('code').to_pylist(),
+                                      batch.column('parameter').to_pylist(),
+                                      batch.column('section').to_pylist(), values)
+
+    def metrics(self, entity: str, table_name: str):
+        """Пакет записей таблицы с производными показателями (pyarrow.RecordBatch, без копии)"""
+        return self._batch(entity, table_name)
+
+    def close(self):
+        self._source.close()
+
+
+def open_snapshot(path: str, data_version: Optional[int] = None) -> Optional[Snapshot]:
+    """Открывает снимок; None, если pyarrow нет, файла нет или он поврежден
+
+    С data_version - также None, если снимок записан при другой версии
+    данных (устарел целиком). Устаревание отдельных таблиц проверяет
+    Snapshot.is_fresh.
+    """
+    if not os.path.exists(path) or not arrow_available():
+        return None
+    try:
+        snapshot = Snapshot(path)
+    except (OSError, KeyError, ValueError):
+        # pyarrow.ArrowInvalid - подкласс ValueError
+        return None
+    if data_version is not None and snapshot.data_version != data_version:
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Запись столбцового снимка базы отчетов")
+    parser.add_argument("--db", default=FINANCIAL_DB_PATH, help="база данных (по умолчанию база приложения)")
+    parser.add_argument("--output", help="файл снимка (по умолчанию <база>.arrow)")
+    args = parser.parse_args(argv)
+
+    if not arrow_available():
+        print("Для снимков нужен pyarrow")
+        return 1
+    path = write_snapshot(FinancialDataManager(args.db), args.output)
+    close_thread_connections()
+    print(f"Снимок записан в {path} ({os.path.getsize(path) / 2**20:.1f} МБ)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
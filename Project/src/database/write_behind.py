@@ -0,0 +1,177 @@
+# write_behind.py
+import sqlite3
+import threading
+import time
+from typing import Dict, Tuple
+from src.database.connection import close_thread_connections
+from src.database.data_manager import FinancialDataManager, DEFAULT_ENTITY
+
+# Пауза без новых правок, после которой изменения записываются в базу, с
+FLUSH_DELAY = 1.0
+# Паузы между повторными попытками записи при закрытии очереди, с
+CLOSE_RETRY_DELAYS = (0.1, 0.5, 2.0)
+
+
+class WriteBehindQueue:
+    """Отложенная запись правок таблицы в базу
+
+    Правки копятся в словаре по ключу (организация, таблица, код, год),
+    повторная правка той же ячейки заменяет предыдущую. Фоновый поток
+    ждет, пока правки не прекратятся на FLUSH_DELAY секунд, и записывает
+    всю пачку одной транзакцией. close() дописывает остаток и завершает
+    поток.
+
+    Пачка, которую не удалось записать из-за ошибки базы, возвращается в
+    очередь. Если пачка не записывается по другой причине, правки пишутся
+    по одной: неверные откладываются в failed, остальные сохраняются, и
+    поток продолжает работу.
+    """
+
+    def __init__(self, data_manager: FinancialDataManager, delay: float = FLUSH_DELAY):
+        self.data_manager = data_manager
+        self.delay = delay
+        self._dirty: Dict[Tuple[str, str, str, int], float] = {}
+        self._deadline = 0.0
+        self._flush_requested = False
+        self._closing = False
+        self._writing = False  # Пачка забрана из очереди, но еще не записана
+        self.failed: Dict[Tuple[str, str, str, int], float] = {}  # Правки, которые нельзя записать
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, table_name: str, code: str, year: int, value: float,
+                   entity: str = DEFAULT_ENTITY):
+        """Ставит значение в очередь на запись и откладывает запись на delay секунд"""
+        with self._condition:
+            self._dirty[(entity, table_name, code, int(year))] = value
+            self._deadline = time.monotonic() + self.delay
+            self._condition.notify_all()
+
+    def flush(self):
+        """Просит записать накопленные правки, не дожидаясь паузы"""
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+
+    def flush_and_wait(self, timeout: float = None) -> bool:
+        """Записывает накопленные правки и ждет окончания записи
+
+        Возвращает False, если за timeout секунд записать не удалось
+        (например, база заблокирована и пачка вернулась в очередь).
+        """
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._dirty and not self._writing, timeout)
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._dirty)
+
+    def close(self) -> bool:
+        """Записывает оставшиеся правки и останавливает фоновый поток
+
+        Неудачная запись повторяется с паузами CLOSE_RETRY_DELAYS. Возвращает
+        False, если сохранено не все: правки, не записанные из-за ошибки
+        базы, остаются в очереди (pending), и повторный close() попробует
+        записать их еще раз уже в вызывающем потоке; неверные правки - в failed.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+        else:
+            try:
+                self._drain()
+            finally:
+                close_thread_connections()
+        with self._condition:
+            return not self._dirty and not self.failed
+
+    def _next_batch(self):
+        """Ждет паузы в правках (или закрытия) и забирает накопленную пачку"""
+        with self._condition:
+            while not self._dirty and not self._closing and not self._flush_requested:
+                self._condition.wait()
+
+            while not self._closing and not self._flush_requested:
+                remaining = self._deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch, self._dirty = self._dirty, {}
+            self._flush_requested = False
+            self._writing = bool(batch)
+            return batch, self._closing
+
+    def _run(self):
+        try:
+            while True:
+                batch, closing = self._next_batch()
+                if batch:
+                    try:
+                        self._write(batch)
+                    finally:
+                        with self._condition:
+                            self._writing = False
+                            self._condition.notify_all()
+                if closing:
+                    break
+            # Пачка, вернувшаяся в очередь при закрытии, пишется повторно
+            self._drain()
+        finally:
+            close_thread_connections()
+
+    def _drain(self) -> bool:
+        """Записывает всю очередь, повторяя неудачную запись с паузами CLOSE_RETRY_DELAYS"""
+        delays = iter(CLOSE_RETRY_DELAYS)
+        while True:
+            with self._condition:
+                batch, self._dirty = self._dirty, {}
+            if not batch:
+                return True
+            if self._write(batch):
+                continue
+            delay = next(delays, None)
+            if delay is None:
+                return False
+            time.sleep(delay)
+
+    def _requeue(self, batch):
+        # Возвращаем правки в очередь, не затирая более новые
+        with self._condition:
+            for key, value in batch.items():
+                self._dirty.setdefault(key, value)
+            self._deadline = time.monotonic() + self.delay
+
+    def _write(self, batch) -> bool:
+        """Записывает пачку; False, если часть правок вернулась в очередь"""
+        try:
+            self.data_manager.save_values(key + (value,) for key, value in batch.items())
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении изменений: {e}")
+            self._requeue(batch)
+            return False
+        except Exception as e:
+            print(f"Ошибка при сохранении изменений, правки записываются по одной: {e!r}")
+        return self._write_each(batch)
+
+    def _write_each(self, batch) -> bool:
+        """Записывает правки по одной, чтобы неверная правка не мешала остальным"""
+        saved = True
+        for key, value in batch.items():
+            try:
+                self.data_manager.save_values([key + (value,)])
+            except sqlite3.Error:
+                self._requeue({key: value})
+                saved = False
+            except Exception as e:
+                print(f"Правка {key} = {value!r} не сохранена: {e!r}")
+                with self._condition:
+                    self.failed[key] = value
+        return saved
@@ -1,14 +1,26 @@
 # main.py
+import os
 import sys
+
+# Модули приложения импортируются как пакет src из каталога Project
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SRC_DIR))
+
 from PySide6.QtWidgets import QApplication
-from ui.login_window import LoginWindow
+from src.ui.login_window import LoginWindow
+from src.ui.preload import preload_in_background
 
 app = QApplication(sys.argv)
 
 # Подключение стилей (опционально)
-with open("ui/styles.css", "r") as f:
+with open(os.path.join(SRC_DIR, "ui", "styles.css"), "r") as f:
     app.setStyleSheet(f.read())
 
 window = LoginWindow()
 window.show()
-sys.exit(app.exec())
\ No newline at end of file
+
+# Главное окно, matplotlib и numpy загружаются заранее, пока открыто окно входа:
+# модули без Qt - в фоновом потоке, окна - в потоке интерфейса
+preload_in_background()
+
+sys.exit(app.exec())
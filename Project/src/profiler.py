@@ -0,0 +1,169 @@
+# profiler.py
+"""Замеры времени горячих путей (включаются по желанию)
+
+Профилирование включается переменной окружения RGR_PROFILE: значение -
+путь к JSON-файлу, в который при выходе записываются счетчики, суммарное
+и максимальное время и гистограммы по каждой операции (1 - файл
+profile.json в текущем каталоге). Без переменной декоратор profiled
+только проверяет флаг и вызывает функцию.
+
+    RGR_PROFILE=profile.json python src/main.py
+"""
+import atexit
+import bisect
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Верхние границы корзин гистограммы, мс; последняя корзина - все, что дольше
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+HISTOGRAM_LABELS = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+# Сколько последних операций хранится для списка самых медленных
+RECENT_SIZE = 500
+
+
+class OperationStats:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.histogram[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'histogram': {label: n for label, n in zip(HISTOGRAM_LABELS, self.histogram) if n},
+        }
+
+
+class Profiler:
+    """Счетчики и гистограммы времени по именам операций (потокобезопасно)"""
+
+    def __init__(self, output_path: Optional[str] = None):
+        self.enabled = output_path is not None
+        self.output_path = output_path
+        self._stats: Dict[str, OperationStats] = {}
+        self._recent = deque(maxlen=RECENT_SIZE)  # (время окончания, операция, мс)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ms: float):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = OperationStats()
+            stats.add(elapsed_ms)
+            self._recent.append((time.time(), name, elapsed_ms))
+
+    def measure(self, name: str):
+        """Контекстный менеджер: with PROFILER.measure('операция'): ..."""
+        return _Measure(self, name)
+
+    def slowest_recent(self, limit: int = 10) -> List[Tuple[float, str, float]]:
+        """Самые долгие из последних RECENT_SIZE операций: (время, операция, мс)"""
+        with self._lock:
+            recent = list(self._recent)
+        return sorted(recent, key=lambda item: -item[2])[:limit]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stats.items())}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent.clear()
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        """Записывает статистику в JSON; возвращает путь файла"""
+        path = path or self.output_path
+        if not path:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({'histogram_bounds_ms': HISTOGRAM_BOUNDS_MS, 'operations': self.snapshot()},
+                      f, ensure_ascii=False, indent=2)
+        return path
+
+
+class _Measure:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profiler.enabled:
+            self.profiler.record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+def _output_path_from_env() -> Optional[str]:
+    value = os.environ.get("RGR_PROFILE")
+    if not value or value == "0":
+        return None
+    return "profile.json" if value == "1" else value
+
+
+PROFILER = Profiler(_output_path_from_env())
+
+
+@atexit.register
+def _export_on_exit():
+    if PROFILER.enabled:
+        try:
+            print(f"Профиль записан в {PROFILER.export()}")
+        except OSError as e:
+            print(f"Не удалось записать профиль: {e}")
+
+
+def profiled(name: str):
+    """Декоратор: время каждого вызова записывается под именем name
+
+    Для генераторов учитывается время от первого до последнего элемента
+    (вместе с обработкой элементов вызывающим кодом).
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not PROFILER.enabled:
+                    yield from func(*args, **kwargs)
+                    return
+                start = time.perf_counter()
+                try:
+                    yield from func(*args, **kwargs)
+                finally:
+                    PROFILER.record(name, (time.perf_counter() - start) * 1000)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
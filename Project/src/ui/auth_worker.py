@@ -0,0 +1,33 @@
+# ui/auth_worker.py
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+
+class AuthSignals(QObject):
+    # Результат проверки или регистрации: True - успех
+    finished = Signal(bool)
+
+
+class AuthWorker(QRunnable):
+    """Проверка пароля или регистрация пользователя в пуле потоков
+
+    Хэширование пароля намеренно медленное, поэтому окно входа не
+    вызывает database напрямую, а запускает эту задачу и ждет сигнала.
+    action - 'login' или 'register'.
+    """
+
+    def __init__(self, action: str, username: str, password: str):
+        super().__init__()
+        self.action = action
+        self.username = username
+        self.password = password
+        self.signals = AuthSignals()
+
+    def run(self):
+        # Модуль базы пользователей загружается при первом обращении
+        from src.database.database import add_user, check_user
+
+        if self.action == 'register':
+            result = add_user(self.username, self.password)
+        else:
+            result = check_user(self.username, self.password)
+        self.signals.finished.emit(result)
@@ -0,0 +1,153 @@
+# ui/export_dialog.py
+from PySide6.QtCore import Qt, QThreadPool
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListWidget,
+                               QListWidgetItem, QComboBox, QPushButton, QProgressBar,
+                               QFileDialog)
+from src.ui.workers import ExportWorker
+
+# Формат выгрузки: подпись в списке и фильтр окна выбора файла
+FORMAT_CHOICES = {
+    'xlsx': ("Excel (XLSX)", "Книга Excel (*.xlsx)"),
+    'csv': ("CSV", "Файлы CSV (*.csv)"),
+    'pdf': ("PDF", "Документ PDF (*.pdf)"),
+}
+
+
+class ExportDialog(QDialog):
+    """Выбор лет, организаций, года сравнения и формата выгрузки; выгрузка идет в пуле потоков
+
+    Пока файл пишется, окно показывает ход выгрузки; кнопка «Отмена» и
+    закрытие окна останавливают ее, частично записанный файл удаляется.
+    """
+
+    def __init__(self, years, current_year, entities, current_entity, db_path,
+                 write_behind=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Выгрузка отчетов")
+        self.setMinimumWidth(420)
+        self.entities = list(entities) or [current_entity]
+        self.current_entity = current_entity
+        self.db_path = db_path
+        self.write_behind = write_behind
+        self.worker = None
+
+        # Годы: по умолчанию отмечен отчетный год окна
+        self.years_list = QListWidget()
+        for year in years:
+            item = QListWidgetItem(str(year))
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if year == current_year else Qt.Unchecked)
+            self.years_list.addItem(item)
+        self.years_list.itemChanged.connect(self.update_buttons)
+
+        self.entity_combo = QComboBox()
+        self.entity_combo.addItem(f"Текущая: {current_entity}")
+        if len(self.entities) > 1:
+            self.entity_combo.addItem(f"Все организации ({len(self.entities)})")
+
+        # Год сравнения: предыдущий год с данными или на N лет раньше отчетного
+        self.compare_combo = QComboBox()
+        self.compare_combo.addItem("С предыдущим годом с данными", None)
+        for lag in range(1, max(len(years), 2)):
+            word = "год" if lag == 1 else "года" if lag < 5 else "лет"
+            self.compare_combo.addItem(f"С годом на {lag} {word} раньше", lag)
+
+        self.format_combo = QComboBox()
+        for file_format, (title, _) in FORMAT_CHOICES.items():
+            self.format_combo.addItem(title, file_format)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        self.status_label = QLabel("")
+
+        self.export_btn = QPushButton("Выгрузить...")
+        self.export_btn.clicked.connect(self.start_export)
+        self.cancel_btn = QPushButton("Закрыть")
+        self.cancel_btn.clicked.connect(self.reject)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.export_btn)
+        buttons.addWidget(self.cancel_btn)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Годы:"))
+        layout.addWidget(self.years_list)
+        layout.addWidget(QLabel("Организации:"))
+        layout.addWidget(self.entity_combo)
+        layout.addWidget(QLabel("Сравнение:"))
+        layout.addWidget(self.compare_combo)
+        layout.addWidget(QLabel("Формат:"))
+        layout.addWidget(self.format_combo)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addLayout(buttons)
+        self.update_buttons()
+
+    def selected_years(self):
+        return [int(self.years_list.item(row).text()) for row in range(self.years_list.count())
+                if self.years_list.item(row).checkState() == Qt.Checked]
+
+    def selected_entities(self):
+        return self.entities if self.entity_combo.currentIndex() == 1 else [self.current_entity]
+
+    def update_buttons(self, *_):
+        running = self.worker is not None
+        self.export_btn.setEnabled(not running and bool(self.selected_years()))
+        for widget in (self.years_list, self.entity_combo, self.compare_combo, self.format_combo):
+            widget.setEnabled(not running)
+        self.cancel_btn.setText("Отмена" if running else "Закрыть")
+
+    def start_export(self):
+        file_format = self.format_combo.currentData()
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчет", f"report.{file_format}",
+                                              FORMAT_CHOICES[file_format][1])
+        if path:
+            self.export(path, file_format)
+
+    def export(self, path, file_format):
+        """Запускает выгрузку в path без окна выбора файла"""
+        if not path.lower().endswith("." + file_format):
+            path += "." + file_format
+        entities = self.selected_entities()
+        self.worker = ExportWorker(path, file_format, entities, self.selected_years(),
+                                   db_path=self.db_path, write_behind=self.write_behind,
+                                   lag=self.compare_combo.currentData())
+        self.worker.signals.progress.connect(self.on_progress)
+        self.worker.signals.finished.connect(self.on_finished)
+        self.worker.signals.error.connect(self.on_error)
+        self.worker.signals.cancelled.connect(self.on_cancelled)
+        self.progress_bar.setRange(0, len(entities))
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setText("Выгрузка...")
+        self.update_buttons()
+        QThreadPool.globalInstance().start(self.worker)
+
+    def on_progress(self, done, total):
+        self.progress_bar.setValue(done)
+        self.status_label.setText(f"Выгружено организаций: {done} из {total}")
+
+    def _finish(self, message):
+        self.worker = None
+        self.progress_bar.hide()
+        self.status_label.setText(message)
+        self.update_buttons()
+
+    def on_finished(self, paths):
+        self._finish("Сохранено: " + ", ".join(paths))
+
+    def on_error(self, message):
+        self._finish(f"Ошибка выгрузки: {message}")
+
+    def on_cancelled(self):
+        self._finish("Выгрузка отменена")
+
+    def reject(self):
+        # Во время выгрузки кнопка и закрытие окна только отменяют ее;
+        # задача, завершившаяся без сигнала, окно не держит
+        if self.worker is not None and not self.worker.done:
+            self.worker.cancel()
+            self.status_label.setText("Отмена...")
+            return
+        super().reject()
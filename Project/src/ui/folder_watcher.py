@@ -0,0 +1,109 @@
+# ui/folder_watcher.py
+from PySide6.QtCore import QObject, QFileSystemWatcher, QThreadPool, QTimer, Signal
+from src.database.connection import FINANCIAL_DB_PATH
+from src.database.ingest import SETTLE_SECONDS, WAITING
+from src.ui.workers import IngestWorker
+
+# Пауза после события файловой системы до просмотра папки, мс:
+# копирование книги дает серию событий, просмотр запускается один раз
+DEBOUNCE_MS = 500
+# Просмотр по таймеру: на сетевых дисках события приходят не всегда, мс
+POLL_INTERVAL_MS = 30_000
+
+
+class FolderWatcher(QObject):
+    """Следит за папкой импорта и загружает новые книги в фоне
+
+    Просмотр запускается при изменении папки (QFileSystemWatcher), по
+    таймеру и вручную (rescan). Одновременно идет не больше одного
+    просмотра; изменения во время просмотра дают еще один после него.
+    Книги, которые еще копируются, просматриваются повторно через
+    SETTLE_SECONDS.
+    """
+
+    # Состояние файла: словарь file_path, status, rows, message
+    file_status = Signal(object)
+    # Загружены новые книги: словарь entities (организации базы) и changed
+    # (организации с измененными таблицами)
+    ingested = Signal(object)
+    # Просмотр начат (True) или закончен (False)
+    busy_changed = Signal(bool)
+
+    def __init__(self, db_path=FINANCIAL_DB_PATH, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.folder = None
+        self.statuses = {}  # Путь файла -> последнее состояние за сеанс
+        self.worker = None
+        self._rescan = False
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self.schedule)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self.rescan)
+        self._poll = QTimer(self)
+        self._poll.setInterval(POLL_INTERVAL_MS)
+        self._poll.timeout.connect(self.rescan)
+
+    def set_folder(self, folder):
+        """Начинает следить за folder (None - перестать следить)"""
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self.folder = folder or None
+        self.statuses.clear()
+        if self.folder is None:
+            self._poll.stop()
+            return
+        self._watcher.addPath(self.folder)
+        self._poll.start()
+        self.rescan()
+
+    def schedule(self, *_):
+        self._debounce.start(DEBOUNCE_MS)
+
+    def rescan(self):
+        if self.folder is None:
+            return
+        if self.worker is not None:
+            self._rescan = True
+            return
+        self.worker = IngestWorker(self.folder, self.db_path)
+        self.worker.signals.file_status.connect(self.on_file_status)
+        self.worker.signals.finished.connect(self.on_finished)
+        self.worker.signals.error.connect(self.on_error)
+        self.busy_changed.emit(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def stop(self):
+        """Останавливает наблюдение; текущий просмотр прерывается после текущего файла"""
+        self._poll.stop()
+        self._debounce.stop()
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self.folder = None
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_file_status(self, status):
+        self.statuses[status['file_path']] = status
+        self.file_status.emit(status)
+        if status['status'] == WAITING:
+            # Копирование еще идет: смотрим снова, когда файл должен успокоиться
+            self._debounce.start(int(SETTLE_SECONDS * 1000) + DEBOUNCE_MS)
+
+    def _finish(self):
+        self.worker = None
+        self.busy_changed.emit(False)
+        if self._rescan:
+            self._rescan = False
+            self.rescan()
+
+    def on_finished(self, result):
+        if result['imported']:
+            self.ingested.emit(result)
+        self._finish()
+
+    def on_error(self, message):
+        print(f"Ошибка при просмотре папки импорта: {message}")
+        self._finish()
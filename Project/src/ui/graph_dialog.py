@@ -0,0 +1,107 @@
+# ui/graph_dialog.py
+from collections import OrderedDict
+from PySide6.QtWidgets import QDialog, QVBoxLayout
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from src.profiler import profiled
+
+
+class GraphDialog(QDialog):
+    """Окно графика, переиспользуемое между показами
+
+    Фигура, оси и линия создаются один раз. Новые данные подставляются
+    в существующую линию; если масштаб и подписи не изменились, заново
+    рисуется только линия поверх сохраненного фона (blitting). Готовые
+    изображения кешируются по ключу (таблица, код, версия данных).
+    """
+
+    CACHE_SIZE = 32
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("График параметра")
+        self.setMinimumSize(800, 600)
+
+        # Создаем фигуру matplotlib
+        self.figure = Figure(figsize=(8, 6), dpi=100)
+        self.canvas = FigureCanvas(self.figure)
+
+        # Оси и линия создаются один раз; линия рисуется отдельно от фона
+        self.axes = self.figure.add_subplot(111)
+        self.line, = self.axes.plot([], [], marker='o', linestyle='-', color='#4CAF50',
+                                    linewidth=2, markersize=8, animated=True)
+
+        # Настройки графика, не зависящие от данных
+        self.axes.set_xlabel('Год', fontsize=12)
+        self.axes.grid(True, linestyle='--', alpha=0.7)
+        self.axes.set_facecolor('#f0f0f0')
+        self.axes.tick_params(axis='both', which='major', labelsize=10)
+
+        self._layout = None  # Подписи и масштаб, заданные последним plot_data
+        self._background = None  # Фон осей без линии для blitting
+        self._background_layout = None  # Подписи и масштаб, при которых снят фон
+        self._cache_key = None
+        self._cache = OrderedDict()  # ключ -> (изображение фигуры, размер холста)
+
+        # После каждой полной перерисовки снимаем фон и дорисовываем линию
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+        # Настройка layout
+        layout = QVBoxLayout()
+        layout.addWidget(self.canvas)
+        self.setLayout(layout)
+
+    @profiled('chart.plot_data')
+    def plot_data(self, years, values, title, ylabel, cache_key=None):
+        """Отрисовывает график на основе переданных данных"""
+        x = [int(year) for year in years]
+        self.line.set_data(x, values)
+        self._cache_key = cache_key
+
+        # Масштаб по данным с небольшим запасом
+        low, high = (min(values), max(values)) if values else (0, 1)
+        margin = (high - low) * 0.05 or abs(high) * 0.05 or 1
+        layout = (title, ylabel, tuple(x), (low - margin, high + margin))
+        if layout != self._layout:
+            self._apply_layout(layout)
+
+        # Готовое изображение из кеша - только копируем пиксели на холст
+        cached = self._cache.get(cache_key) if cache_key is not None else None
+        if cached is not None and cached[1] == self.canvas.get_width_height():
+            self._cache.move_to_end(cache_key)
+            self.canvas.restore_region(cached[0])
+            self.canvas.blit(self.figure.bbox)
+            return
+
+        if self._background is None or layout != self._background_layout:
+            # Изменились подписи или масштаб - нужна полная перерисовка
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self.axes.draw_artist(self.line)
+            self.canvas.blit(self.axes.bbox)
+            self._store_cache()
+
+    def _apply_layout(self, layout):
+        title, ylabel, x, ylim = layout
+        self.axes.set_title(title, fontsize=14, pad=20)
+        self.axes.set_ylabel(ylabel, fontsize=12)
+        self.axes.set_xticks(x)
+        self.axes.set_xlim((x[0] - 0.5, x[-1] + 0.5) if x else (0, 1))
+        self.axes.set_ylim(ylim)
+        self._layout = layout
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.axes.bbox)
+        self._background_layout = self._layout
+        self.axes.draw_artist(self.line)
+        self._store_cache()
+
+    def _store_cache(self):
+        if self._cache_key is None:
+            return
+        self._cache[self._cache_key] = (self.canvas.copy_from_bbox(self.figure.bbox),
+                                        self.canvas.get_width_height())
+        self._cache.move_to_end(self._cache_key)
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
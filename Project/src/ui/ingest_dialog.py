@@ -0,0 +1,102 @@
+# ui/ingest_dialog.py
+import os
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog)
+from src.database.ingest import IMPORTED, UNCHANGED, DUPLICATE, ERROR, WAITING, list_ingested
+
+STATUS_TITLES = {
+    IMPORTED: "Загружен",
+    UNCHANGED: "Без изменений",
+    DUPLICATE: "Дубликат",
+    ERROR: "Ошибка",
+    WAITING: "Копируется",
+}
+
+
+class IngestDialog(QDialog):
+    """Папка автоматического импорта и состояние ее файлов
+
+    Наблюдение ведет FolderWatcher главного окна и продолжается после
+    закрытия окна; здесь выбирается папка и показываются состояния файлов:
+    сохраненные в базе и полученные за сеанс.
+    """
+
+    COLUMNS = ("Файл", "Состояние", "Строк", "Примечание")
+
+    def __init__(self, watcher, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Папка импорта")
+        self.setMinimumSize(700, 400)
+        self.watcher = watcher
+        self.rows = {}  # Путь файла -> строка таблицы
+
+        self.folder_label = QLabel()
+        choose_btn = QPushButton("Выбрать папку...")
+        choose_btn.clicked.connect(self.choose_folder)
+        self.rescan_btn = QPushButton("Проверить сейчас")
+        self.rescan_btn.clicked.connect(self.watcher.rescan)
+        self.stop_btn = QPushButton("Не следить")
+        self.stop_btn.clicked.connect(self.stop_watching)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.folder_label, 1)
+        buttons.addWidget(choose_btn)
+        buttons.addWidget(self.rescan_btn)
+        buttons.addWidget(self.stop_btn)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(buttons)
+        layout.addWidget(self.table)
+
+        # Сохраненные состояния (старые внизу), поверх них - состояния сеанса
+        for status in reversed(list_ingested(self.watcher.db_path)):
+            self.show_status(status)
+        for status in self.watcher.statuses.values():
+            self.show_status(status)
+        self.watcher.file_status.connect(self.show_status)
+        self.watcher.busy_changed.connect(self.update_folder)
+        self.update_folder()
+
+    def update_folder(self, busy=False):
+        folder = self.watcher.folder
+        text = f"Папка: {folder}" if folder else "Папка не выбрана"
+        self.folder_label.setText(text + (" (просмотр...)" if busy else ""))
+        self.rescan_btn.setEnabled(folder is not None)
+        self.stop_btn.setEnabled(folder is not None)
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Папка импорта", self.watcher.folder or "")
+        if folder:
+            self.watcher.set_folder(folder)
+            self.update_folder()
+
+    def stop_watching(self):
+        self.watcher.stop()
+        self.update_folder()
+
+    def show_status(self, status):
+        """Добавляет файл в таблицу или обновляет его строку; новые файлы - сверху"""
+        row = self.rows.get(status['file_path'])
+        if row is None:
+            self.table.insertRow(0)
+            self.rows = {path: number + 1 for path, number in self.rows.items()}
+            row = self.rows[status['file_path']] = 0
+        values = (os.path.basename(status['file_path']),
+                  STATUS_TITLES.get(status['status'], status['status']),
+                  str(status['rows']) if status['rows'] else "",
+                  status['message'])
+        for column, value in enumerate(values):
+            self.table.setItem(row, column, QTableWidgetItem(value))
+        self.table.item(row, 0).setToolTip(status['file_path'])
+
+    def done(self, result):
+        self.watcher.file_status.disconnect(self.show_status)
+        self.watcher.busy_changed.disconnect(self.update_folder)
+        super().done(result)
@@ -1,9 +1,8 @@
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 							   QLabel, QLineEdit, QPushButton, QMessageBox, QDialog)
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool
+from src.ui.auth_worker import AuthWorker
 import os
-from src.database.database import add_user, check_user
-from src.ui.main_window import MainWindow
 
 
 class RegisterWindow(QDialog):
@@ -120,7 +119,20 @@ class RegisterWindow(QDialog):
 			QMessageBox.warning(self, "Ошибка", "Пароли не совпадают")
 			return
 
-		if add_user(username, password):
+		# Хэширование пароля выполняется в пуле потоков, окно остается отзывчивым
+		self.register_button.setEnabled(False)
+		self.register_button.setText("Создание аккаунта...")
+		worker = AuthWorker('register', username, password)
+		worker.signals.finished.connect(self.on_register_finished)
+		self._auth_worker = worker  # Сигналы живут, пока есть ссылка на задачу
+		QThreadPool.globalInstance().start(worker)
+
+	def on_register_finished(self, created):
+		self._auth_worker = None
+		self.register_button.setEnabled(True)
+		self.register_button.setText("Создать аккаунт")
+
+		if created:
 			QMessageBox.information(self, "Успех", "Аккаунт успешно создан!")
 			self.close()
 		else:
@@ -238,7 +250,20 @@ class LoginWindow(QMainWindow):
 			QMessageBox.warning(self, "Ошибка", "Пожалуйста, заполните все поля")
 			return
 
-		if check_user(username, password):
+		# Проверка пароля (PBKDF2) выполняется в пуле потоков
+		self.login_button.setEnabled(False)
+		self.login_button.setText("Проверка...")
+		worker = AuthWorker('login', username, password)
+		worker.signals.finished.connect(self.on_login_finished)
+		self._auth_worker = worker  # Сигналы живут, пока есть ссылка на задачу
+		QThreadPool.globalInstance().start(worker)
+
+	def on_login_finished(self, verified):
+		self._auth_worker = None
+		self.login_button.setEnabled(True)
+		self.login_button.setText("Войти в систему")
+
+		if verified:
 			self.open_main_window()
 		else:
 			QMessageBox.warning(self, "Ошибка", "Неверный логин или пароль")
@@ -248,6 +273,10 @@ class LoginWindow(QMainWindow):
 		self.register_window.exec_()
 
 	def open_main_window(self):
+		# Главное окно (matplotlib, numpy) загружается при первом входе
+		# или заранее в фоне через preload_in_background
+		from src.ui.main_window import MainWindow
+
 		self.main_window = MainWindow()
 		self.main_window.show()
 		self.close()
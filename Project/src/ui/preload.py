@@ -0,0 +1,74 @@
+# ui/preload.py
+import importlib
+import threading
+
+# Модули без Qt, не нужные окну входа: загружаются в фоновом потоке, пока
+# пользователь вводит пароль
+PRELOAD_MODULES = (
+    "numpy",
+    "matplotlib.figure",
+    "src.database.database",
+    "src.database.seed",
+    "src.database.snapshot",
+    "src.analysis.coefficients",
+    "src.analysis.dependencies",
+    "src.ui.table_index",
+)
+# Необязательные зависимости: без них модуль просто не загружается заранее
+OPTIONAL_MODULES = (
+    "pyarrow.ipc",  # снимок базы, src/database/snapshot.py
+)
+# Модули с виджетами Qt и бэкендом matplotlib: их инициализация допустима
+# только в потоке интерфейса, поэтому они загружаются там по одному, после
+# фоновых - иначе поток интерфейса ждал бы блокировку импорта
+GUI_MODULES = (
+    "src.ui.main_window",
+    "src.ui.graph_dialog",
+)
+# Пауза между проверками, закончилась ли фоновая загрузка, мс
+GUI_PRELOAD_POLL_MS = 50
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            if name in OPTIONAL_MODULES:
+                continue
+            # Модуль будет загружен (и ошибка показана) при первом обращении
+            print(f"Не удалось заранее загрузить {name}: {e}")
+
+
+def _preload_gui_modules(thread: threading.Thread, modules):
+    """Загружает modules в потоке интерфейса по одному за проход цикла событий"""
+    from PySide6.QtCore import QTimer
+
+    modules = list(modules)
+
+    def step():
+        if not modules:
+            return
+        if thread.is_alive():
+            QTimer.singleShot(GUI_PRELOAD_POLL_MS, step)
+            return
+        _import_all([modules.pop(0)])
+        QTimer.singleShot(0, step)
+
+    QTimer.singleShot(0, step)
+
+
+def preload_in_background(modules=PRELOAD_MODULES + OPTIONAL_MODULES,
+                          gui_modules=GUI_MODULES) -> threading.Thread:
+    """Запускает заблаговременную загрузку тяжелых модулей (matplotlib, numpy, главное окно)
+
+    Модули без Qt загружаются в фоновом потоке, модули с Qt - в потоке
+    интерфейса через QTimer после фоновых; вызывать после показа окна
+    входа. Если пользователь войдет раньше, импорт в потоке интерфейса
+    дождется фоновой загрузки через блокировку импорта Python.
+    """
+    thread = threading.Thread(target=_import_all, args=(modules,), name="preload", daemon=True)
+    thread.start()
+    if gui_modules:
+        _preload_gui_modules(thread, gui_modules)
+    return thread
@@ -0,0 +1,57 @@
+# ui/profiler_overlay.py
+import time
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import QLabel
+from src.profiler import PROFILER
+
+# Период обновления списка, мс
+REFRESH_INTERVAL_MS = 1000
+# Сколько самых долгих операций показывать
+OVERLAY_ROWS = 10
+
+
+class ProfilerOverlay(QLabel):
+    """Полупрозрачная панель поверх окна с самыми долгими недавними операциями
+
+    Не перехватывает мышь; обновляется по таймеру, только пока видима.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.PlainText)
+        self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.setStyleSheet("""
+            background-color: rgba(0, 0, 0, 180);
+            color: #9be79e;
+            font-family: monospace;
+            font-size: 12px;
+            padding: 8px;
+            border-radius: 6px;
+        """)
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_INTERVAL_MS)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self._timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start()
+
+    def refresh(self):
+        lines = ["Самые долгие операции (последние):"]
+        now = time.time()
+        for finished, name, elapsed_ms in PROFILER.slowest_recent(OVERLAY_ROWS):
+            lines.append(f"{elapsed_ms:9.1f} мс  {name:<32} {now - finished:5.0f} с назад")
+        if len(lines) == 1:
+            lines.append("нет данных")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 20, 20)
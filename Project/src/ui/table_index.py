@@ -0,0 +1,76 @@
+# ui/table_index.py
+from typing import Dict, List, Optional, Tuple
+from src.analysis.table_store import RowView, TableStore
+
+
+class TableIndex:
+    """Индексы строк отчета для поиска за O(1)
+
+    Строки таблицы на экране - это строки хранилища, перед каждым новым
+    разделом которых вставлена строка с названием раздела. Индекс
+    строится один раз при загрузке и связывает строку таблицы со строкой
+    хранилища, код показателя со строкой таблицы, раздел с диапазоном строк.
+    """
+
+    def __init__(self, store: TableStore):
+        self.store = store
+        self.row_to_data: List[int] = []  # -1 - строка раздела
+        self.code_to_row: Dict[str, int] = {}
+        self.section_rows: Dict[int, str] = {}  # строка заголовка -> название раздела
+        self.section_ranges: Dict[str, Tuple[int, int]] = {}  # раздел -> [первая, последняя] строки данных
+        self._current_section = None
+        self._index(range(len(store)))
+
+    def extend(self, chunk: TableStore):
+        """Добавляет порцию строк в конец хранилища (при постепенной загрузке)"""
+        self._index(self.store.extend(chunk))
+
+    def rows_added(self, chunk: TableStore) -> int:
+        """Сколько строк таблицы добавит extend(chunk) с учетом новых разделов"""
+        count = 0
+        current_section = self._current_section
+        for data_row in range(len(chunk)):
+            section = chunk.section(data_row)
+            if section is not None and section != current_section:
+                current_section = section
+                count += 1
+            count += 1
+        return count
+
+    def _index(self, data_rows: range):
+        store = self.store
+        for data_row in data_rows:
+            section = store.section(data_row)
+            if section is not None and section != self._current_section:
+                self._current_section = section
+                self.section_rows[len(self.row_to_data)] = section
+                self.row_to_data.append(-1)
+
+            row = len(self.row_to_data)
+            self.row_to_data.append(data_row)
+            self.code_to_row[store.codes[data_row]] = row
+
+            first, _ = self.section_ranges.get(self._current_section, (row, row))
+            self.section_ranges[self._current_section] = (first, row)
+
+    @property
+    def row_count(self) -> int:
+        """Число строк таблицы с учетом заголовков разделов"""
+        return len(self.row_to_data)
+
+    def record(self, table_row: int) -> Optional[RowView]:
+        """Строка данных для строки таблицы; None для разделов и строк вне данных"""
+        if 0 <= table_row < len(self.row_to_data):
+            data_row = self.row_to_data[table_row]
+            if data_row >= 0:
+                return self.store.row(data_row)
+        return None
+
+    def by_code(self, code: str) -> Optional[RowView]:
+        return self.store.by_code(code)
+
+    def row_of(self, code: str) -> Optional[int]:
+        return self.code_to_row.get(code)
+
+    def is_section(self, table_row: int) -> bool:
+        return table_row in self.section_rows
@@ -0,0 +1,210 @@
+# ui/table_model.py
+from typing import Callable, Optional, Tuple
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from PySide6.QtGui import QColor, QFont
+from src.analysis.metrics import absolute_change, growth_rate
+from src.analysis.table_store import RowView, TableStore
+from src.ui.table_index import TableIndex
+
+HEADERS = [
+    "Показатель",
+    "Отчетный год",
+    "Год сравнения",
+    "Темп роста, %",
+    "Абсолютное отклонение"
+]
+
+COEFFICIENT_TITLES = [
+    "K1 (Обязательства / Активы)",
+    "K2 (Непросроченные обязательства / Общие обязательства)",
+    "Ликвидность (Ден.средства + Фин.вложения / Краткосрочные обязательства)"
+]
+
+# Цвета создаются один раз и отдаются представлению по ролям
+SECTION_BACKGROUND = QColor(70, 70, 70)
+NEGATIVE_BACKGROUND = QColor(150, 50, 50)
+POSITIVE_BACKGROUND = QColor(50, 150, 50)
+DEVIATION_FOREGROUND = QColor(255, 255, 255)
+NUMBER_ALIGNMENT = int(Qt.AlignRight | Qt.AlignVCenter)
+
+
+class FinancialTableModel(QAbstractTableModel):
+    """Модель таблицы отчета: ячейки вычисляются из записей по запросу представления
+
+    Модель не хранит ячеек - текст, цвет и шрифт строятся в data() из
+    строки хранилища, найденной через TableIndex. Для таблицы с коэффициентами
+    после данных идут пустая строка и три строки коэффициентов.
+    """
+
+    # Изменено значение: строка (RowView) и год, к которому оно относится
+    valueEdited = Signal(object, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index_data = TableIndex(TableStore())
+        self.selected_year = None
+        self.prev_year = None
+        self.coefficients: Optional[Callable[[int], Tuple[float, float, float]]] = None
+        self.read_only = False  # Запрет правок, пока данные загружаются
+        self._bold_font = QFont()
+        self._bold_font.setBold(True)
+
+    def set_source(self, index_data: TableIndex, selected_year: int, prev_year: Optional[int],
+                   coefficients: Optional[Callable[[int], Tuple[float, float, float]]] = None):
+        """Подключает данные таблицы; coefficients - источник строк коэффициентов"""
+        self.beginResetModel()
+        self.index_data = index_data
+        self.selected_year = selected_year
+        self.prev_year = prev_year
+        self.coefficients = coefficients
+        self.endResetModel()
+
+    @property
+    def coefficients_row(self) -> int:
+        """Первая строка коэффициентов (после пустой строки-разделителя)"""
+        return self.index_data.row_count + 1
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.index_data.row_count + (4 if self.coefficients else 0)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            # Год сравнения не всегда предыдущий календарный - показываем оба года
+            year = {1: self.selected_year, 2: self.prev_year}.get(section)
+            return f"{HEADERS[section]} ({year})" if year else HEADERS[section]
+        return None
+
+    def _values(self, record: RowView):
+        """Значения отчетного и предыдущего года; ноль показывается как отсутствие"""
+        current_val = record.value(self.selected_year) if self.selected_year is not None else 0
+        prev_val = record.value(self.prev_year) if self.prev_year else None
+        return current_val, prev_val
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+
+        if row >= self.index_data.row_count:
+            return self._coefficient_data(row, column, role)
+
+        if self.index_data.is_section(row):
+            if column != 0:
+                return None
+            if role == Qt.DisplayRole:
+                return self.index_data.section_rows[row]
+            if role == Qt.FontRole:
+                return self._bold_font
+            if role == Qt.BackgroundRole:
+                return SECTION_BACKGROUND
+            return None
+
+        record = self.index_data.record(row)
+        if column == 0:
+            return record.parameter if role == Qt.DisplayRole else None
+
+        if role == Qt.TextAlignmentRole:
+            return NUMBER_ALIGNMENT
+
+        current_val, prev_val = self._values(record)
+
+        if role == Qt.EditRole:
+            value = current_val if column == 1 else prev_val
+            return f"{value:,}" if value else "-"
+
+        if column == 4:
+            deviation = self._deviation(current_val, prev_val)
+            if deviation is not None:
+                if role == Qt.BackgroundRole:
+                    return NEGATIVE_BACKGROUND if deviation < 0 else POSITIVE_BACKGROUND
+                if role == Qt.ForegroundRole:
+                    return DEVIATION_FOREGROUND
+
+        if role != Qt.DisplayRole:
+            return None
+
+        if column == 1:
+            return f"{current_val:,}" if current_val != 0 else "-"
+        if column == 2:
+            return f"{prev_val:,}" if self.prev_year and prev_val != 0 else "-"
+        if column == 3:
+            rate = growth_rate(current_val, prev_val) if self.prev_year else None
+            return f"{rate:.2f}%" if rate is not None else "-"
+        deviation = self._deviation(current_val, prev_val)
+        return f"{deviation:,}" if deviation is not None else "-"
+
+    def _deviation(self, current_val, prev_val):
+        if self.prev_year and current_val is not None and prev_val is not None:
+            return absolute_change(current_val, prev_val)
+        return None
+
+    def _coefficient_data(self, row, column, role):
+        position = row - self.coefficients_row
+        if position < 0 or column > 1:
+            return None
+        if column == 0:
+            if role == Qt.DisplayRole:
+                return COEFFICIENT_TITLES[position]
+            if role == Qt.FontRole:
+                return self._bold_font
+            if role == Qt.BackgroundRole:
+                return SECTION_BACKGROUND
+            return None
+        if role == Qt.TextAlignmentRole:
+            return NUMBER_ALIGNMENT
+        if role == Qt.DisplayRole:
+            return f"{self.coefficients(self.selected_year)[position]:.4f}"
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        row, column = index.row(), index.column()
+        # Разрешаем редактирование только столбцов с годами в строках данных
+        if not self.read_only and self.index_data.record(row) is not None and \
+                (column == 1 or (column == 2 and self.prev_year)):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not (self.flags(index) & Qt.ItemIsEditable):
+            return False
+
+        text = str(value).strip().replace(",", "").replace(" ", "")
+        try:
+            new_value = float(text) if text not in ("", "-") else 0
+        except ValueError:
+            # Некорректное значение - ячейка сохраняет прежнее
+            return False
+
+        record = self.index_data.record(index.row())
+        year = self.selected_year if index.column() == 1 else self.prev_year
+        if not record.store.has_year(year):
+            # Года нет в данных таблицы - значение некуда записать
+            return False
+        record.set_value(year, new_value)
+
+        self.refresh_row(index.row())
+        self.valueEdited.emit(record, year)
+        return True
+
+    def append_records(self, chunk: TableStore):
+        """Добавляет порцию строк в конец таблицы (до строк коэффициентов)"""
+        first = self.index_data.row_count
+        self.beginInsertRows(QModelIndex(), first, first + self.index_data.rows_added(chunk) - 1)
+        self.index_data.extend(chunk)
+        self.endInsertRows()
+
+    def refresh_row(self, row: int):
+        """Перерисовывает значения, темп роста и отклонение одной строки"""
+        self.dataChanged.emit(self.index(row, 1), self.index(row, len(HEADERS) - 1))
+
+    def refresh_coefficients(self):
+        """Перерисовывает строки коэффициентов"""
+        if self.coefficients:
+            first = self.coefficients_row
+            self.dataChanged.emit(self.index(first, 1), self.index(first + 2, 1))
@@ -0,0 +1,255 @@
+# ui/workers.py
+import threading
+from typing import List, Optional
+from PySide6.QtCore import QObject, QRunnable, Signal
+from src.database.connection import FINANCIAL_DB_PATH, close_thread_connections
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, DEFAULT_ENTITY
+from src.database.seed import ensure_seed_data
+from src.database.snapshot import arrow_available, open_snapshot, snapshot_path, write_snapshot
+from src.analysis.coefficients import CoefficientEngine
+from src.analysis.table_store import TableStore
+
+# Строк в одной порции, передаваемой в интерфейс при загрузке
+LOAD_CHUNK_SIZE = 500
+# Сколько ждать записи отложенных правок перед выгрузкой, с
+EXPORT_FLUSH_TIMEOUT = 10.0
+
+
+class LoadDataSignals(QObject):
+    # Порция строк таблицы: имя таблицы и TableStore с этими строками
+    chunk = Signal(str, object)
+    # Загрузка завершена: словарь с data_manager, coefficient_engine и entities
+    finished = Signal(object)
+    error = Signal(str)
+
+
+class LoadDataWorker(QRunnable):
+    """Загрузка таблиц отчетов и расчет коэффициентов в пуле потоков
+
+    Подготовка базы, чтение строк и расчет коэффициентов выполняются вне
+    потока интерфейса; строки передаются окну порциями через сигналы.
+    Если таблицы организации в снимке базы (src/database/snapshot.py) не
+    изменялись после его записи, они читаются из снимка целиком, иначе -
+    из SQLite. При refresh_snapshot устаревшие таблицы снимка затем
+    обновляются в этом же потоке.
+    """
+
+    def __init__(self, table_names: List[str], chunk_size: int = LOAD_CHUNK_SIZE,
+                 entity: str = DEFAULT_ENTITY, db_path: str = FINANCIAL_DB_PATH,
+                 refresh_snapshot: bool = True):
+        super().__init__()
+        self.table_names = table_names
+        self.chunk_size = chunk_size
+        self.entity = entity
+        self.db_path = db_path
+        self.refresh_snapshot = refresh_snapshot
+        self.signals = LoadDataSignals()
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            close_thread_connections()
+
+    def _run(self):
+        try:
+            data_manager = FinancialDataManager(self.db_path)
+            # Начальные данные пишутся только при первом запуске или смене их версии
+            ensure_seed_data(data_manager)
+
+            table_versions = data_manager.table_versions()
+            snapshot = open_snapshot(snapshot_path(self.db_path))
+            # Снимок нужно обновить, если в нем устарела хоть одна таблица базы
+            snapshot_stale = snapshot is None or not all(
+                snapshot.is_fresh(entity, table_name, table_versions) for entity, table_name in table_versions)
+            # Список организаций снимка верен, только если ни одна его таблица не устарела
+            entities = data_manager.list_entities() if snapshot_stale else snapshot.entities()
+            if snapshot is not None and all(snapshot.is_fresh(self.entity, table_name, table_versions)
+                                            for table_name in self.table_names):
+                capital = self._load_snapshot(snapshot)
+            else:
+                if snapshot is not None:
+                    snapshot.close()
+                capital = self._load_database(data_manager)
+
+            # Коэффициенты считаются сразу по всем годам из столбцов значений
+            coefficient_engine = CoefficientEngine.from_store(capital, self.entity)
+            coefficient_engine.compute()
+        except Exception as e:
+            # Любая ошибка (базы, поврежденного снимка, данных) должна дойти до
+            # окна, иначе оно останется в состоянии загрузки
+            self.signals.error.emit(str(e) or type(e).__name__)
+            return
+
+        self.signals.finished.emit({
+            'data_manager': data_manager,
+            'coefficient_engine': coefficient_engine,
+            'entities': entities,
+        })
+
+        if snapshot_stale and self.refresh_snapshot and arrow_available():
+            # Окно уже получило данные; снимок пишется после, не задерживая его
+            try:
+                write_snapshot(data_manager)
+            except Exception as e:
+                # Например, в Windows нельзя заменить файл, открытый другим процессом
+                print(f"Снимок базы не записан: {e}")
+
+    def _load_database(self, data_manager: FinancialDataManager) -> TableStore:
+        """Читает таблицы из базы порциями; возвращает строки таблицы капитала"""
+        capital = TableStore()
+        for table_name, rows in data_manager.iter_tables(self.table_names, self.entity,
+                                                           chunk_size=self.chunk_size):
+            # Порция переводится в столбцовый вид здесь, а не в потоке интерфейса
+            chunk = TableStore.from_rows(rows)
+            if table_name == CAPITAL_TABLE:
+                capital.extend(chunk)
+            self.signals.chunk.emit(table_name, chunk)
+        return capital
+
+    def _load_snapshot(self, snapshot) -> TableStore:
+        """Читает таблицы из снимка, каждую одной порцией; возвращает капитал"""
+        capital = TableStore()
+        try:
+            for table_name in self.table_names:
+                if not snapshot.has_table(self.entity, table_name):
+                    continue
+                store = snapshot.table(self.entity, table_name)
+                if table_name == CAPITAL_TABLE:
+                    capital = store
+                self.signals.chunk.emit(table_name, store)
+            return capital
+        finally:
+            snapshot.close()
+
+
+class ExportSignals(QObject):
+    # Выгружено организаций из общего числа
+    progress = Signal(int, int)
+    # Выгрузка завершена: список записанных файлов
+    finished = Signal(object)
+    error = Signal(str)
+    cancelled = Signal()
+
+
+class ExportWorker(QRunnable):
+    """Выгрузка отчетов в файл (src/analysis/export.py) в пуле потоков
+
+    Перед выгрузкой дописываются отложенные правки окна, чтобы в файл
+    попало то, что видно на экране. Задача читает базу собственным
+    соединением и отменяется через cancel() между организациями.
+    """
+
+    def __init__(self, path: str, file_format: str, entities: List[str], years: List[int],
+                 db_path: str = FINANCIAL_DB_PATH, write_behind=None, lag: Optional[int] = None):
+        super().__init__()
+        self.path = path
+        self.file_format = file_format
+        self.entities = entities
+        self.years = years
+        self.db_path = db_path
+        self.write_behind = write_behind
+        self.lag = lag  # Сравнение с годом на lag лет раньше; None - с предыдущим годом с данными
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self.signals = ExportSignals()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def done(self) -> bool:
+        """Задача завершилась (с сигналом или без)"""
+        return self._done.is_set()
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            self._done.set()
+
+    def _run(self):
+        # openpyxl и matplotlib загружаются только при выгрузке
+        try:
+            from src.analysis.export import ExportCancelled, export_reports
+        except ImportError as e:
+            self.signals.error.emit(str(e))
+            return
+
+        if self.write_behind is not None and not self.write_behind.flush_and_wait(EXPORT_FLUSH_TIMEOUT):
+            self.signals.error.emit("Не удалось сохранить изменения перед выгрузкой")
+            return
+        try:
+            paths = export_reports(FinancialDataManager(self.db_path), self.path, self.file_format,
+                                   self.entities, self.years, progress=self.signals.progress.emit,
+                                   is_cancelled=self._cancel.is_set, lag=self.lag)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            # Любая ошибка (файла, базы, openpyxl, matplotlib) должна дойти до
+            # окна выгрузки, иначе оно останется в состоянии выгрузки
+            self.signals.error.emit(str(e) or type(e).__name__)
+            return
+        finally:
+            close_thread_connections()
+        self.signals.finished.emit(paths)
+
+
+class IngestSignals(QObject):
+    # Состояние файла папки импорта (словарь из src/database/ingest.py)
+    file_status = Signal(object)
+    # Просмотр завершен: словарь с imported (загружено книг), entities и changed
+    finished = Signal(object)
+    error = Signal(str)
+
+
+class IngestWorker(QRunnable):
+    """Один просмотр папки импорта (src/database/ingest.py) в пуле потоков
+
+    Новые книги загружаются собственным соединением задачи; окно получает
+    состояние каждого измененного файла и по окончании - список организаций
+    и организации, таблицы которых изменились (по table_versions). После
+    загрузки книг обновляется снимок базы.
+    """
+
+    def __init__(self, folder: str, db_path: str = FINANCIAL_DB_PATH):
+        super().__init__()
+        self.folder = folder
+        self.db_path = db_path
+        self._cancel = threading.Event()
+        self.signals = IngestSignals()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            close_thread_connections()
+
+    def _run(self):
+        try:
+            from src.database.ingest import IMPORTED, scan_folder
+
+            data_manager = FinancialDataManager(self.db_path)
+            versions = data_manager.table_versions()
+            statuses = scan_folder(data_manager, self.folder, on_status=self.signals.file_status.emit,
+                                   is_cancelled=self._cancel.is_set)
+            imported = sum(1 for status in statuses if status['status'] == IMPORTED)
+            entities = data_manager.list_entities() if imported else None
+            changed = sorted({key[0] for key, version in data_manager.table_versions().items()
+                              if versions.get(key) != version})
+        except Exception as e:
+            # Наблюдатель ждет finished или error: без сигнала он больше не
+            # запустил бы ни одного просмотра
+            self.signals.error.emit(str(e) or type(e).__name__)
+            return
+
+        if imported and arrow_available():
+            try:
+                write_snapshot(data_manager)
+            except Exception as e:
+                print(f"Снимок базы не записан: {e}")
+        self.signals.finished.emit({'imported': imported, 'entities': entities, 'changed': changed})
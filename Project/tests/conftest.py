@@ -0,0 +1,17 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Модули импортируются как src.database.xxx из каталога Project
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.connection import close_thread_connections
+
+
+@pytest.fixture(autouse=True)
+def close_connections():
+    """Закрывает соединения после теста: базы тестов лежат во временных каталогах"""
+    yield
+    close_thread_connections()
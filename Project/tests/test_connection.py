@@ -0,0 +1,42 @@
+# tests/test_connection.py
+import sqlite3
+
+from src.database.connection import adopt_legacy_database
+from src.database.data_manager import FinancialDataManager, IMPORT_TABLE
+
+
+def legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE financial_data (id INTEGER PRIMARY KEY, parameter_name TEXT, "
+                 "parameter_code TEXT, year_2013 REAL, year_2014 REAL, year_2015 REAL)")
+    conn.execute("INSERT INTO financial_data VALUES (1, 'Выручка', '010', 1.0, 2.0, 3.0)")
+    conn.commit()
+    conn.close()
+
+
+def test_legacy_database_copied_from_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy_db("financial_data.db")
+    target = tmp_path / "database" / "financial_data.db"
+    target.parent.mkdir()
+
+    assert adopt_legacy_database(str(target))
+
+    # Старый файл остается на месте, копия мигрирует как обычная база
+    assert (tmp_path / "financial_data.db").exists()
+    rows = FinancialDataManager(str(target)).load_table(IMPORT_TABLE)
+    assert [(row['code'], row['2015']) for row in rows] == [('010', 3.0)]
+    assert not list(target.parent.glob("*.legacy-copy"))
+
+
+def test_existing_database_not_replaced(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy_db("financial_data.db")
+    target = tmp_path / "database" / "financial_data.db"
+    target.parent.mkdir()
+    FinancialDataManager(str(target))
+    before = target.read_bytes()
+
+    assert not adopt_legacy_database(str(target))
+    assert not adopt_legacy_database(str(tmp_path / "financial_data.db"))
+    assert target.read_bytes() == before
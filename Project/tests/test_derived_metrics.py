@@ -0,0 +1,140 @@
+# tests/test_derived_metrics.py
+import pytest
+
+from src.database import data_manager
+from src.database.connection import get_connection
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, COSTS_TABLE, _refresh_derived
+
+DERIVED_TABLES = ('derived_years', 'value_changes', 'section_totals', 'table_totals')
+
+ROWS = [
+    {'code': '010', 'parameter': "Уставный капитал", 'section': "Капитал", '2013': 100.0, '2014': 120.0, '2016': 90.0},
+    {'code': '020', 'parameter': "Резервный капитал", 'section': "Капитал", '2013': 10.0, '2016': 12.0},
+    {'code': '030', 'parameter': "Прибыль", 'section': "Результат", '2014': 5.0, '2016': -4.0},
+    {'code': '040', 'parameter': "Прочее", '2013': 1.0},
+]
+
+
+def derived(conn, entity, table_name):
+    return {table: sorted(conn.execute(f"SELECT * FROM {table} WHERE entity = ? AND table_name = ?",
+                                       (entity, table_name)).fetchall(), key=repr)
+            for table in DERIVED_TABLES}
+
+
+def full_rebuild(conn, entity, table_name):
+    """Показатели таблицы, пересчитанные целиком; база после вызова не меняется"""
+    conn.execute("SAVEPOINT rebuild")
+    try:
+        for table in DERIVED_TABLES:
+            conn.execute(f"DELETE FROM {table} WHERE entity = ? AND table_name = ?", (entity, table_name))
+        _refresh_derived(conn, entity, table_name)
+        return derived(conn, entity, table_name)
+    finally:
+        conn.execute("ROLLBACK TO rebuild")
+        conn.execute("RELEASE rebuild")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = FinancialDataManager(str(tmp_path / "financial_data.db"))
+    manager.save_table(CAPITAL_TABLE, ROWS, entity="acme")
+    manager.save_table(COSTS_TABLE, ROWS, entity="acme")
+    return manager
+
+
+@pytest.mark.parametrize("changes", [
+    # Значение внутри раздела
+    [("acme", CAPITAL_TABLE, '010', 2014, 130.0)],
+    # Обнуление: строка удаляется, год сравнения остается
+    [("acme", CAPITAL_TABLE, '020', 2013, 0.0), ("acme", CAPITAL_TABLE, '030', 2016, 7.0)],
+    # Строка без раздела и прежде пустая ячейка
+    [("acme", CAPITAL_TABLE, '040', 2016, 3.0)],
+    # Новый год таблицы меняет года сравнения всех строк
+    [("acme", CAPITAL_TABLE, '010', 2015, 110.0)],
+    # Последнее значение года: год исчезает из таблицы
+    [("acme", CAPITAL_TABLE, '030', 2014, 0.0), ("acme", CAPITAL_TABLE, '010', 2014, 0.0)],
+])
+def test_incremental_refresh_matches_full_rebuild(manager, changes):
+    manager.save_values(changes)
+
+    conn = get_connection(manager.db_path)
+    assert derived(conn, "acme", CAPITAL_TABLE) == full_rebuild(conn, "acme", CAPITAL_TABLE)
+    # Другая таблица той же организации не затронута
+    assert derived(conn, "acme", COSTS_TABLE) == full_rebuild(conn, "acme", COSTS_TABLE)
+
+
+def test_sequence_of_edits_matches_full_rebuild(manager):
+    for year, value in ((2014, 1.0), (2015, 2.0), (2013, 0.0), (2015, 0.0), (2016, 50.0)):
+        manager.save_values([("acme", CAPITAL_TABLE, '020', year, value)])
+
+    conn = get_connection(manager.db_path)
+    assert derived(conn, "acme", CAPITAL_TABLE) == full_rebuild(conn, "acme", CAPITAL_TABLE)
+
+
+def test_totals_compare_with_previous_year_with_data(manager):
+    totals = {row['section']: row for row in manager.get_section_totals(2016, "acme", CAPITAL_TABLE)}
+
+    # Года 2015 в таблице нет: 2016 сравнивается с 2014
+    assert totals["Капитал"]['total'] == 102.0
+    assert totals["Капитал"]['previous_total'] == 120.0
+
+
+class ImportInterrupted(Exception):
+    pass
+
+
+def interrupted_import(path, workbook_path, stop_after):
+    """Загружает книгу пачками по 2 строки и прерывает загрузку после stop_after строк"""
+    def progress(done, total):
+        if done >= stop_after:
+            raise ImportInterrupted()
+
+    with pytest.raises(ImportInterrupted):
+        FinancialDataManager(path).load_data_from_excel(workbook_path, batch_size=2, progress_callback=progress,
+                                                        entity="acme", table_name=CAPITAL_TABLE)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Код", "Показатель", "Раздел", "2013", "2014"])
+    for number in range(1, 7):
+        sheet.append([f"{number:03d}", f"Строка {number}", "Капитал", number * 10, number * 11])
+    path = str(tmp_path / "report.xlsx")
+    workbook.save(path)
+    return path
+
+
+def test_interrupted_import_keeps_metrics_of_written_batches(tmp_path, workbook_path):
+    path = str(tmp_path / "financial_data.db")
+    interrupted_import(path, workbook_path, stop_after=4)
+
+    manager = FinancialDataManager(path)
+    conn = get_connection(path)
+    assert conn.execute("SELECT COUNT(*) FROM import_progress").fetchone()[0] == 1
+    totals = manager.get_section_totals(2014, "acme", CAPITAL_TABLE)
+    assert (totals[0]['total'], totals[0]['previous_total']) == (110.0, 100.0)
+    assert derived(conn, "acme", CAPITAL_TABLE) == full_rebuild(conn, "acme", CAPITAL_TABLE)
+
+    # Продолжение загрузки дописывает остальные строки
+    manager.load_data_from_excel(workbook_path, entity="acme", table_name=CAPITAL_TABLE)
+    assert manager.get_section_totals(2014, "acme", CAPITAL_TABLE)[0]['total'] == 231.0
+
+
+def test_stale_metrics_rebuilt_on_open(tmp_path, workbook_path, monkeypatch):
+    path = str(tmp_path / "financial_data.db")
+    # Процесс завершился, не успев пересчитать показатели
+    monkeypatch.setattr(data_manager, "_refresh_stale_derived", lambda conn: None)
+    interrupted_import(path, workbook_path, stop_after=4)
+    conn = get_connection(path)
+    assert derived(conn, "acme", CAPITAL_TABLE)['derived_years'] == []
+    monkeypatch.undo()
+
+    manager = FinancialDataManager(path)
+
+    assert manager.list_years("acme", CAPITAL_TABLE) == [2013, 2014]
+    assert manager.get_section_totals(2014, "acme", CAPITAL_TABLE)[0]['total'] == 110.0
+    assert derived(conn, "acme", CAPITAL_TABLE) == full_rebuild(conn, "acme", CAPITAL_TABLE)
@@ -0,0 +1,108 @@
+# tests/test_export.py
+import csv
+
+import pytest
+
+from src.analysis.export import (COEFFICIENT_HEADERS, METRIC_HEADERS, NO_SECTION_TITLE, TABLE_TOTAL_TITLE,
+                                 TOTAL_HEADERS, ExportCancelled, export_reports)
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, COSTS_TABLE
+
+ENTITIES = ("acme", "globex")
+
+
+def rows(scale):
+    return [{'code': '010', 'parameter': "Уставный капитал", 'section': "Капитал",
+             '2013': 100.0 * scale, '2014': 120.0 * scale},
+            {'code': '020', 'parameter': "Прочее", '2013': 10.0 * scale, '2014': 0}]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = FinancialDataManager(str(tmp_path / "financial_data.db"))
+    for scale, entity in enumerate(ENTITIES, start=1):
+        manager.save_table(CAPITAL_TABLE, rows(scale), entity=entity)
+        manager.save_table(COSTS_TABLE, rows(scale * 10), entity=entity)
+    return manager
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f, delimiter=";"))
+
+
+def cancel_after(count):
+    """is_cancelled, который останавливает выгрузку после count организаций"""
+    calls = []
+
+    def is_cancelled():
+        calls.append(None)
+        return len(calls) > count
+
+    return is_cancelled
+
+
+def test_csv_contents(manager, tmp_path):
+    path = str(tmp_path / "report.csv")
+
+    paths = export_reports(manager, path, 'csv', ENTITIES, [2014])
+
+    assert paths == [path, str(tmp_path / "report_totals.csv"), str(tmp_path / "report_coefficients.csv")]
+    metrics = read_csv(paths[0])
+    assert tuple(metrics[0]) == METRIC_HEADERS
+    assert len(metrics) == 1 + len(ENTITIES) * 2 * 2
+    assert metrics[1] == ["acme", "Собственный капитал", "Капитал", "010", "Уставный капитал", "2014", "2013",
+                          "120.0", "100.0", "120.0", "20.0"]
+    # Нулевое значение: темп роста не определен
+    assert metrics[2][3:] == ["020", "Прочее", "2014", "2013", "0.0", "10.0", "", "-10.0"]
+
+    totals = read_csv(paths[1])
+    assert tuple(totals[0]) == TOTAL_HEADERS
+    acme_capital = {row[2]: row[4:6] for row in totals if row[0] == "acme" and row[1] == "Собственный капитал"}
+    assert acme_capital == {"Капитал": ["120.0", "100.0"], NO_SECTION_TITLE: ["0.0", "10.0"],
+                            TABLE_TOTAL_TITLE: ["120.0", "110.0"]}
+    assert tuple(read_csv(paths[2])[0]) == COEFFICIENT_HEADERS
+
+
+def test_xlsx_contents(manager, tmp_path):
+    from openpyxl import load_workbook
+
+    path = str(tmp_path / "report.xlsx")
+    export_reports(manager, path, 'xlsx', ENTITIES, [2013, 2014])
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        assert workbook.sheetnames == ["Показатели", "Итоги разделов", "Коэффициенты", "Графики"]
+        metrics = list(workbook["Показатели"].iter_rows(values_only=True))
+        assert metrics[0] == METRIC_HEADERS
+        assert len(metrics) == 1 + len(ENTITIES) * 2 * 2 * 2
+        globex = [row for row in metrics if row[0] == "globex" and row[1] == "Затраты на производство"]
+        # Первый год не с чем сравнивать; пустые ячейки в конце строки read-only не возвращает
+        assert globex[0][3:] == ("010", "Уставный капитал", 2013, None, 2000)
+        assert globex[2][5:] == (2014, 2013, 2400.0, 2000.0, 120.0, 400.0)
+    finally:
+        workbook.close()
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".export-")] == []
+
+
+@pytest.mark.parametrize("file_format", ['csv', 'xlsx'])
+def test_cancelled_export_removes_partial_files(manager, tmp_path, file_format):
+    path = str(tmp_path / f"report.{file_format}")
+    done = []
+
+    with pytest.raises(ExportCancelled):
+        export_reports(manager, path, file_format, ENTITIES, [2014],
+                       progress=lambda number, total: done.append(number), is_cancelled=cancel_after(1))
+
+    assert done == [1]
+    assert [p.name for p in tmp_path.iterdir() if p.name != "financial_data.db"
+            and not p.name.startswith("financial_data.db-")] == []
+
+
+def test_cancelled_xlsx_keeps_previous_file(manager, tmp_path):
+    path = tmp_path / "report.xlsx"
+    path.write_bytes(b"previous export")
+
+    with pytest.raises(ExportCancelled):
+        export_reports(manager, str(path), 'xlsx', ENTITIES, [2014], is_cancelled=cancel_after(1))
+
+    assert path.read_bytes() == b"previous export"
@@ -0,0 +1,134 @@
+# tests/test_ingest.py
+import itertools
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from src.database import ingest
+from src.database.data_manager import FinancialDataManager, IMPORT_TABLE
+from src.database.ingest import (DUPLICATE, ERROR, IMPORTED, UNCHANGED, WAITING,
+                                 ingest_file, list_ingested, scan_folder)
+
+# Каждая запись книги получает свою отметку в прошлом: файл уже «улегся»
+_MTIMES = itertools.count(1_600_000_000, -10)
+
+
+def save_workbook(path, values, author="Бухгалтерия"):
+    """Книга с одним листом отчета; author меняет свойства книги, а не ячейки"""
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Код", "Показатель", "2014", "2015"])
+    for number, value in enumerate(values, start=1):
+        sheet.append([f"{number:03d}", f"Строка {number}", value, value * 2])
+    workbook.properties.creator = author
+    workbook.save(path)
+    mtime = next(_MTIMES)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return FinancialDataManager(str(tmp_path / "financial_data.db"))
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "inbox"
+    folder.mkdir()
+    return folder
+
+
+def scan(manager, folder):
+    return {os.path.basename(status['file_path']): status['status']
+            for status in scan_folder(manager, str(folder), settle_seconds=0)}
+
+
+def test_new_workbook_imported_once(manager, folder):
+    save_workbook(folder / "a.xlsx", [1, 2])
+
+    assert scan(manager, folder) == {"a.xlsx": IMPORTED}
+    # Файл не менялся - он даже не читается
+    assert scan(manager, folder) == {}
+    assert [row['2015'] for row in manager.load_table(IMPORT_TABLE)] == [2.0, 4.0]
+
+
+def test_byte_identical_copy_is_duplicate(manager, folder):
+    save_workbook(folder / "a.xlsx", [1, 2])
+    scan(manager, folder)
+    shutil.copy(folder / "a.xlsx", folder / "b.xlsx")
+
+    assert scan(manager, folder) == {"b.xlsx": DUPLICATE}
+    status = {row['file_path']: row for row in list_ingested(manager.db_path)}[str(folder / "b.xlsx")]
+    assert status['message'] == str(folder / "a.xlsx")
+
+
+def test_resave_with_same_cells_is_unchanged(manager, folder, monkeypatch):
+    save_workbook(folder / "a.xlsx", [1, 2])
+    scan(manager, folder)
+    version = manager.data_version()
+    raw_hash = ingest.file_hash(str(folder / "a.xlsx"))
+    # Excel при пересохранении меняет свойства книги, но не значения ячеек
+    save_workbook(folder / "a.xlsx", [1, 2], author="Экономист")
+    assert ingest.file_hash(str(folder / "a.xlsx")) != raw_hash
+    loads = []
+    monkeypatch.setattr(manager, "load_data_from_excel", lambda *args, **kwargs: loads.append(args))
+
+    assert scan(manager, folder) == {"a.xlsx": UNCHANGED}
+    assert loads == [] and manager.data_version() == version
+    # В базе остается прежнее состояние
+    assert list_ingested(manager.db_path)[0]['status'] == IMPORTED
+
+
+def test_other_file_with_same_cells_is_duplicate(manager, folder):
+    save_workbook(folder / "a.xlsx", [1, 2])
+    scan(manager, folder)
+    save_workbook(folder / "b.xlsx", [1, 2], author="Экономист")
+    assert ingest.file_hash(str(folder / "a.xlsx")) != ingest.file_hash(str(folder / "b.xlsx"))
+
+    assert scan(manager, folder) == {"b.xlsx": DUPLICATE}
+
+
+def test_changed_cells_imported_again(manager, folder):
+    save_workbook(folder / "a.xlsx", [1, 2])
+    scan(manager, folder)
+    save_workbook(folder / "a.xlsx", [1, 3])
+
+    assert scan(manager, folder) == {"a.xlsx": IMPORTED}
+    assert [row['2014'] for row in manager.load_table(IMPORT_TABLE)] == [1.0, 3.0]
+
+
+def test_workbook_still_copying_is_skipped(manager, folder):
+    save_workbook(folder / "a.xlsx", [1, 2])
+    path = str(folder / "a.xlsx")
+    os.utime(path)  # Только что изменен
+
+    assert ingest_file(manager, path, settle_seconds=60)['status'] == WAITING
+    assert list_ingested(manager.db_path) == []
+    assert ingest_file(manager, path, settle_seconds=0)['status'] == IMPORTED
+
+
+def test_damaged_workbook_retried_only_after_change(manager, folder):
+    (folder / "a.xlsx").write_bytes(b"not a workbook")
+
+    assert scan(manager, folder) == {"a.xlsx": ERROR}
+    assert scan(manager, folder) == {}
+    save_workbook(folder / "a.xlsx", [1])
+    assert scan(manager, folder) == {"a.xlsx": IMPORTED}
+
+
+def test_transient_error_retried_on_next_scan(manager, folder, monkeypatch):
+    save_workbook(folder / "a.xlsx", [1, 2])
+    load = manager.load_data_from_excel
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(manager, "load_data_from_excel", locked)
+    assert scan(manager, folder) == {"a.xlsx": ERROR}
+
+    monkeypatch.setattr(manager, "load_data_from_excel", load)
+    assert scan(manager, folder) == {"a.xlsx": IMPORTED}
@@ -0,0 +1,80 @@
+# tests/test_migrations.py
+import sqlite3
+
+from src.database.data_manager import FinancialDataManager, IMPORT_TABLE, DEFAULT_ENTITY, MIGRATIONS
+
+# Схема базы до перехода на длинный формат: годы - столбцы таблицы
+BASELINE_SCHEMA = """
+    CREATE TABLE financial_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        parameter_name TEXT NOT NULL,
+        parameter_code TEXT NOT NULL,
+        year_2013 REAL,
+        year_2014 REAL,
+        year_2015 REAL,
+        unpaid_capital REAL,
+        own_shares REAL,
+        reserve_capital_1 REAL,
+        reserve_capital_2 REAL,
+        reserve_capital_3 REAL,
+        additional_capital_1 REAL,
+        additional_capital_2 REAL,
+        additional_capital_3 REAL,
+        retained_earnings_1 REAL,
+        retained_earnings_2 REAL,
+        retained_earnings_3 REAL,
+        net_profit REAL,
+        total REAL
+    )
+"""
+
+
+def baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO financial_data (parameter_name, parameter_code, year_2013, year_2014, year_2015, total) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [("Уставный капитал", "010", 100.0, 120.0, 150.0, 1.0),
+         ("Резервный капитал", "020", 0.0, 30.0, None, 2.0),
+         ("Уставный капитал (повтор)", "010", 5.0, 6.0, 7.0, 3.0)])
+    conn.commit()
+    conn.close()
+
+
+def test_baseline_schema_migrates_to_long_format(tmp_path):
+    path = str(tmp_path / "financial_data.db")
+    baseline_db(path)
+
+    manager = FinancialDataManager(path)
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    # Повторяющийся код не сливается с первой строкой, а получает суффикс
+    rows = manager.load_table(IMPORT_TABLE, DEFAULT_ENTITY)
+    assert [(row['code'], row['parameter']) for row in rows] == [
+        ("010", "Уставный капитал"), ("020", "Резервный капитал"), ("010-2", "Уставный капитал (повтор)")]
+    assert (rows[0]['2013'], rows[0]['2014'], rows[0]['2015']) == (100.0, 120.0, 150.0)
+    assert (rows[2]['2013'], rows[2]['2015']) == (5.0, 7.0)
+    # Нулевые и пустые значения не хранятся
+    assert conn.execute(
+        "SELECT year FROM financial_values WHERE code = '020' ORDER BY year").fetchall() == [(2014,)]
+    assert manager.list_years(DEFAULT_ENTITY, IMPORT_TABLE) == [2013, 2014, 2015]
+
+    # Старая таблица с разбивкой капитала сохраняется под другим именем
+    tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "financial_data" not in tables
+    assert conn.execute("SELECT total FROM financial_data_legacy ORDER BY id").fetchall() == [(1.0,), (2.0,), (3.0,)]
+    conn.close()
+
+
+def test_migrated_database_opens_without_repeating_migrations(tmp_path):
+    path = str(tmp_path / "financial_data.db")
+    baseline_db(path)
+    FinancialDataManager(path)
+    version = FinancialDataManager(path).data_version()
+
+    manager = FinancialDataManager(path)
+
+    assert manager.data_version() == version
+    assert len(manager.load_table(IMPORT_TABLE, DEFAULT_ENTITY)) == 3
@@ -0,0 +1,67 @@
+# tests/test_query_cache.py
+import pytest
+
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE
+
+ROWS = [{'code': '010', 'parameter': "Уставный капитал", 'section': "Капитал", '2013': 100.0, '2014': 120.0},
+        {'code': '020', 'parameter': "Резервный капитал", 'section': "Капитал", '2013': 10.0, '2014': 15.0}]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = FinancialDataManager(str(tmp_path / "financial_data.db"))
+    manager.save_table(CAPITAL_TABLE, ROWS)
+    return manager
+
+
+def main_values(rows):
+    return {row['parameter_code']: row['main_year'] for row in rows}
+
+
+def test_repeated_query_served_from_cache(manager):
+    first = manager.get_data_for_years(2014, table_name=CAPITAL_TABLE)
+
+    assert manager.get_data_for_years(2014, table_name=CAPITAL_TABLE) is first
+    # Другой год сравнения - другой ключ кеша
+    assert manager.get_data_for_years(2014, 2013, table_name=CAPITAL_TABLE) is not first
+
+
+def test_cached_rows_are_read_only(manager):
+    rows = manager.get_data_for_years(2014, table_name=CAPITAL_TABLE)
+
+    assert isinstance(rows, tuple)
+    with pytest.raises(TypeError):
+        rows[0]['main_year'] = 0.0
+    # Копия строки изменяется, кеш - нет
+    copy = dict(rows[0])
+    copy['main_year'] = 0.0
+    assert manager.get_data_for_years(2014, table_name=CAPITAL_TABLE)[0]['main_year'] == 120.0
+
+
+@pytest.mark.parametrize("write, expected", [
+    (lambda manager: manager.save_values([("default", CAPITAL_TABLE, '010', 2014, 130.0)]),
+     {'010': 130.0, '020': 15.0}),
+    (lambda manager: manager.save_table(CAPITAL_TABLE, [dict(ROWS[1], **{'2014': 16.0})]),
+     {'010': 120.0, '020': 16.0}),
+    # replace=True очищает таблицу через _clear_table
+    (lambda manager: manager.save_table(CAPITAL_TABLE, [dict(ROWS[0], **{'2014': 5.0})], replace=True),
+     {'010': 5.0}),
+])
+def test_write_invalidates_cache(manager, write, expected):
+    before = manager.get_data_for_years(2014, table_name=CAPITAL_TABLE)
+    explicit = manager.get_data_for_years(2014, 2013, table_name=CAPITAL_TABLE)
+
+    write(manager)
+
+    assert main_values(manager.get_data_for_years(2014, table_name=CAPITAL_TABLE)) == expected
+    assert main_values(manager.get_data_for_years(2014, 2013, table_name=CAPITAL_TABLE)) == expected
+    assert main_values(before) == {'010': 120.0, '020': 15.0}
+    assert main_values(explicit) == {'010': 120.0, '020': 15.0}
+
+
+def test_write_through_another_manager_invalidates_cache(manager):
+    manager.get_data_for_years(2014, table_name=CAPITAL_TABLE)
+
+    FinancialDataManager(manager.db_path).save_values([("default", CAPITAL_TABLE, '020', 2014, 0.0)])
+
+    assert main_values(manager.get_data_for_years(2014, table_name=CAPITAL_TABLE)) == {'010': 120.0, '020': 0.0}
@@ -0,0 +1,30 @@
+# tests/test_seed.py
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, COSTS_TABLE, DEFAULT_ENTITY
+from src.database.seed import SEED_VERSION, ensure_seed_data
+
+
+def test_seed_written_once(tmp_path):
+    manager = FinancialDataManager(str(tmp_path / "financial_data.db"))
+
+    assert ensure_seed_data(manager)
+    assert not ensure_seed_data(manager)
+    assert manager.get_meta('seed_version') == SEED_VERSION
+    assert manager.list_tables(DEFAULT_ENTITY) == sorted([CAPITAL_TABLE, COSTS_TABLE])
+
+
+def test_new_seed_version_keeps_user_edits(tmp_path):
+    manager = FinancialDataManager(str(tmp_path / "financial_data.db"))
+    ensure_seed_data(manager)
+    manager.save_values([(DEFAULT_ENTITY, CAPITAL_TABLE, '010', 2013, 12345.0)])
+    version = manager.get_meta('seed_version')
+
+    # Новая версия заполняет только таблицу, которой еще нет
+    assert manager.apply_seed(version + 1, {
+        CAPITAL_TABLE: [{'code': '010', 'parameter': "Остаток", '2013': 1.0}],
+        "new_table": [{'code': '001', 'parameter': "Новая строка", '2013': 7.0}],
+    })
+
+    assert manager.load_table(CAPITAL_TABLE)[0]['2013'] == 12345.0
+    assert manager.load_table("new_table") == [
+        {'code': '001', 'parameter': "Новая строка", 'section': None, '2013': 7.0}]
+    assert manager.get_meta('seed_version') == version + 1
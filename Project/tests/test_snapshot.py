@@ -0,0 +1,135 @@
+# tests/test_snapshot.py
+import numpy as np
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, COSTS_TABLE
+from src.database.snapshot import open_snapshot, snapshot_path, write_snapshot
+
+ENTITIES = ("acme", "globex")
+
+
+def rows(scale):
+    return [{'code': '010', 'parameter': "Уставный капитал", 'section': "Капитал",
+             '2013': 100.0 * scale, '2014': 120.0 * scale},
+            {'code': '020', 'parameter': "Резервный капитал", 'section': None, '2013': 0, '2014': 5.0 * scale}]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = FinancialDataManager(str(tmp_path / "financial_data.db"))
+    for scale, entity in enumerate(ENTITIES, start=1):
+        for table_name in (CAPITAL_TABLE, COSTS_TABLE):
+            manager.save_table(table_name, rows(scale), entity=entity)
+    return manager
+
+
+def tables_read(manager, monkeypatch):
+    """Список (организация, таблица), прочитанных write_snapshot из базы"""
+    read = []
+    iter_tables = manager.iter_tables
+
+    def spy(table_names, entity, **kwargs):
+        read.extend((entity, table_name) for table_name in table_names)
+        return iter_tables(table_names, entity, **kwargs)
+
+    monkeypatch.setattr(manager, "iter_tables", spy)
+    return read
+
+
+def test_snapshot_round_trip(manager):
+    path = write_snapshot(manager)
+
+    snapshot = open_snapshot(path, manager.data_version())
+    try:
+        assert snapshot.entities() == list(ENTITIES)
+        assert snapshot.years == [2013, 2014]
+        store = snapshot.table("globex", CAPITAL_TABLE)
+        assert store.codes == ['010', '020']
+        assert [store.section(row) for row in range(len(store))] == ["Капитал", None]
+        assert store.column(2014).tolist() == [240.0, 10.0]
+        metrics = snapshot.metrics("globex", CAPITAL_TABLE)
+        assert metrics.column('growth_2014').to_pylist() == [120.0, None]
+        assert metrics.column('change_2014').to_pylist() == [40.0, 10.0]
+    finally:
+        snapshot.close()
+
+
+def test_freshness_follows_table_versions(manager):
+    path = write_snapshot(manager)
+    manager.save_values([("acme", COSTS_TABLE, '010', 2014, 1.0)])
+    versions = manager.table_versions()
+
+    snapshot = open_snapshot(path)
+    try:
+        assert not snapshot.is_fresh("acme", COSTS_TABLE, versions)
+        assert snapshot.is_fresh("acme", CAPITAL_TABLE, versions)
+        assert snapshot.is_fresh("globex", COSTS_TABLE, versions)
+        # Снимок целиком с другой версией данных не открывается
+        assert open_snapshot(path, manager.data_version()) is None
+    finally:
+        snapshot.close()
+
+
+def test_rewrite_reads_only_changed_tables(manager, monkeypatch):
+    write_snapshot(manager)
+    manager.save_values([("globex", CAPITAL_TABLE, '020', 2013, 3.0)])
+    read = tables_read(manager, monkeypatch)
+
+    path = write_snapshot(manager)
+
+    assert read == [("globex", CAPITAL_TABLE)]
+    snapshot = open_snapshot(path, manager.data_version())
+    try:
+        assert snapshot.table("globex", CAPITAL_TABLE).column(2013).tolist() == [200.0, 3.0]
+        # Скопированный пакет совпадает с таблицей в базе
+        copied = snapshot.table("acme", COSTS_TABLE)
+        assert np.array_equal(copied.values[:len(copied)], [[100.0, 120.0], [0.0, 5.0]])
+        assert all(snapshot.is_fresh(entity, table_name, manager.table_versions())
+                   for entity in ENTITIES for table_name in (CAPITAL_TABLE, COSTS_TABLE))
+    finally:
+        snapshot.close()
+
+
+def test_new_year_rebuilds_whole_snapshot(manager, monkeypatch):
+    write_snapshot(manager)
+    manager.save_values([("acme", CAPITAL_TABLE, '010', 2015, 130.0)])
+    read = tables_read(manager, monkeypatch)
+
+    path = write_snapshot(manager)
+
+    assert sorted(read) == sorted((entity, table_name) for entity in ENTITIES
+                                  for table_name in (CAPITAL_TABLE, COSTS_TABLE))
+    snapshot = open_snapshot(path)
+    try:
+        assert snapshot.years == [2013, 2014, 2015]
+        assert snapshot.table("globex", COSTS_TABLE).years == [2013, 2014]
+    finally:
+        snapshot.close()
+
+
+def test_damaged_or_foreign_file_is_ignored(manager, tmp_path):
+    path = snapshot_path(manager.db_path)
+    assert open_snapshot(path) is None
+
+    with open(path, "wb") as f:
+        f.write(b"not an arrow file")
+    assert open_snapshot(path) is None
+
+    write_snapshot(manager)
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    assert open_snapshot(path) is None
+
+    # Файл Arrow без оглавления снимка
+    schema = pa.schema([pa.field('code', pa.string())])
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_batch(pa.record_batch([pa.array(['010'])], schema=schema))
+    assert open_snapshot(path) is None
+
+    # Поврежденный снимок заменяется новым целиком
+    path = write_snapshot(manager)
+    snapshot = open_snapshot(path, manager.data_version())
+    assert snapshot is not None
+    snapshot.close()
@@ -0,0 +1,99 @@
+# tests/test_table_store.py
+import math
+
+import numpy as np
+import pytest
+
+from src.analysis.table_store import INITIAL_CAPACITY, TableStore
+
+
+def make_rows(count, section="Раздел I"):
+    return [{'code': f"{number:03d}", 'parameter': f"Строка {number}", 'section': section,
+             '2013': float(number), '2014': float(number * 2) if number % 3 else None}
+            for number in range(count)]
+
+
+def test_from_rows_round_trip():
+    rows = make_rows(5) + [{'code': '900', 'parameter': "Без раздела", '2013': 1.0, '2014': 0}]
+
+    store = TableStore.from_rows(rows)
+
+    assert store.years == [2013, 2014]
+    assert len(store) == 6
+    for index, row in enumerate(rows):
+        view = store.row(index)
+        assert (view.code, view.parameter, view.section) == (row['code'], row['parameter'], row.get('section'))
+        # Пустое значение хранится нулем
+        assert view.value(2014) == (row['2014'] or 0.0)
+    assert store.row_of('003') == 3
+    assert store.by_code('900').section is None
+    assert store.by_code('999') is None
+    assert store.section_names == ["Раздел I", None]
+
+
+def test_growth_keeps_rows_and_values():
+    store = TableStore()
+    capacities = set()
+    for start in range(0, 1000, 70):
+        added = store.append_rows(make_rows(1000)[start:start + 70])
+        assert added == range(start, min(start + 70, 1000))
+        capacities.add(len(store.values))
+
+    assert len(store) == 1000
+    # Емкость растет удвоением, а не на каждую порцию
+    assert len(capacities) <= int(math.log2(1000 / INITIAL_CAPACITY)) + 2
+    assert store.values.shape[1] == 2 and store.section_ids.shape == (len(store.values),)
+    assert store.column(2013).tolist() == [float(number) for number in range(1000)]
+    assert store.row_of('999') == 999
+
+
+def test_extend_appends_chunks():
+    rows = make_rows(10)
+    store = TableStore()
+    for start in range(0, 10, 4):
+        store.extend(TableStore.from_rows(rows[start:start + 4]))
+
+    expected = TableStore.from_rows(rows)
+    assert store.codes == expected.codes
+    assert np.array_equal(store.column(2014), expected.column(2014))
+    assert [store.section(index) for index in range(10)] == ["Раздел I"] * 10
+
+    with pytest.raises(ValueError):
+        store.extend(TableStore.from_rows([{'code': '100', 'parameter': "Другие годы", '2015': 1.0}]))
+
+
+def test_from_arrays_matches_from_rows():
+    rows = make_rows(4) + [{'code': '900', 'parameter': "Без раздела", '2013': 1.0}]
+    source = TableStore.from_rows(rows)
+
+    store = TableStore.from_arrays(source.years, source.codes, source.names,
+                                   [source.section(index) for index in range(len(source))],
+                                   source.values[:len(source)])
+
+    assert store.codes == source.codes and store.names == source.names
+    assert store.section_names == source.section_names
+    assert np.array_equal(store.values[:len(store)], source.values[:len(source)])
+
+
+def test_missing_year():
+    store = TableStore.from_rows(make_rows(3))
+    view = store.row(1)
+
+    assert view.value(2020) == 0.0
+    assert store.column(2020).tolist() == [0.0, 0.0, 0.0]
+    assert store.series('999') == [0.0, 0.0]
+    with pytest.raises(KeyError):
+        view.set_value(2020, 1.0)
+
+    view.set_value(2014, 7.0)
+    assert store.value(1, 2014) == 7.0
+
+
+def test_growth_rates_and_changes():
+    store = TableStore.from_rows([{'code': '010', 'parameter': "А", '2013': 100.0, '2014': 150.0},
+                                  {'code': '020', 'parameter': "Б", '2013': 0, '2014': 10.0}])
+
+    rates = store.growth_rates(2014, 2013)
+    assert rates[0] == 150.0
+    assert math.isnan(rates[1])
+    assert store.absolute_changes(2014, 2013).tolist() == [50.0, 10.0]
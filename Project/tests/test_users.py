@@ -0,0 +1,56 @@
+# tests/test_users.py
+import pytest
+
+from src.database import database
+from src.database.database import (USER_CREATED, USER_EXISTS, USER_FAILED, USER_REPEATED,
+                                   add_user, add_users, add_users_from_csv, check_user)
+
+# Низкая стоимость хэша, чтобы тесты не ждали PBKDF2
+ITERATIONS = 1000
+
+
+@pytest.fixture(autouse=True)
+def users_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "users.db"))
+    monkeypatch.setattr(database, "_database_ready", False)
+    database.session_cache.forget()
+
+
+def test_add_users_reports_each_row():
+    assert add_user("admin", "secret", ITERATIONS)
+
+    results = add_users([("ivanov", "1"), ("admin", "2"), ("ivanov", "3"), ("", "4"), ("petrov", None)],
+                        ITERATIONS)
+
+    assert [(username, status) for username, status, _ in results] == [
+        ("ivanov", USER_CREATED), ("admin", USER_EXISTS), ("ivanov", USER_REPEATED),
+        ("", USER_FAILED), ("petrov", USER_FAILED)]
+    assert results[3][2] == "Пустой логин"
+    assert results[4][2].startswith("Неверный пароль")
+    # Записан только новый пользователь, прежний пароль не перезаписан
+    assert check_user("ivanov", "1", ITERATIONS)
+    assert check_user("admin", "secret", ITERATIONS)
+    assert not check_user("admin", "2", ITERATIONS)
+    assert not check_user("petrov", "", ITERATIONS)
+
+
+def test_add_users_reports_login_added_after_check(monkeypatch):
+    # Логин появился в базе между проверкой существующих и вставкой
+    add_user("sidorov", "first", ITERATIONS)
+    monkeypatch.setattr(database, "_existing_usernames", lambda conn, usernames: set())
+
+    results = add_users([("sidorov", "second"), ("kozlov", "k")], ITERATIONS)
+
+    assert results == [("sidorov", USER_EXISTS, ""), ("kozlov", USER_CREATED, "")]
+    assert check_user("sidorov", "first", ITERATIONS)
+
+
+def test_add_users_from_csv(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("username,password\n ivanov ,1\nivanov,2\n,3\npetrov,4\n", encoding="utf-8")
+
+    results = add_users_from_csv(str(path), ITERATIONS)
+
+    # Строки без логина пропускаются, логин очищается от пробелов
+    assert [(username, status) for username, status, _ in results] == [
+        ("ivanov", USER_CREATED), ("ivanov", USER_REPEATED), ("petrov", USER_CREATED)]
@@ -0,0 +1,92 @@
+# tests/test_write_behind.py
+import sqlite3
+
+import pytest
+
+from src.database import write_behind
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE, DEFAULT_ENTITY
+from src.database.write_behind import WriteBehindQueue
+
+ROWS = [{'code': '010', 'parameter': "Уставный капитал", 'section': "Основные данные", '2014': 100.0},
+        {'code': '020', 'parameter': "Резервный капитал", 'section': "Основные данные", '2014': 10.0}]
+
+
+class LockedDataManager(FinancialDataManager):
+    """Хранилище, запись в которое не удается, пока locked"""
+
+    locked = True
+
+    def save_values(self, changes):
+        if self.locked:
+            raise sqlite3.OperationalError("database is locked")
+        super().save_values(changes)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "financial_data.db")
+    FinancialDataManager(path).save_table(CAPITAL_TABLE, ROWS)
+    return path
+
+
+def values(manager):
+    return {row['code']: row['2014'] for row in manager.load_table(CAPITAL_TABLE, DEFAULT_ENTITY)}
+
+
+def test_flush_and_wait_writes_without_waiting_for_pause(db_path):
+    manager = FinancialDataManager(db_path)
+    queue = WriteBehindQueue(manager, delay=60)
+    try:
+        queue.mark_dirty(CAPITAL_TABLE, '010', 2014, 1.0)
+        # Повторная правка ячейки заменяет предыдущую
+        queue.mark_dirty(CAPITAL_TABLE, '010', 2014, 150.0)
+        assert queue.pending == 1
+
+        assert queue.flush_and_wait(5)
+        assert queue.pending == 0
+        assert values(manager)['010'] == 150.0
+    finally:
+        assert queue.close()
+
+
+def test_close_writes_pending_edits_and_stops_thread(db_path):
+    manager = FinancialDataManager(db_path)
+    queue = WriteBehindQueue(manager, delay=60)
+    queue.mark_dirty(CAPITAL_TABLE, '010', 2014, 200.0)
+    queue.mark_dirty(CAPITAL_TABLE, '020', 2014, 0.0)
+
+    assert queue.close()
+
+    assert not queue._thread.is_alive()
+    assert values(manager) == {'010': 200.0, '020': 0}
+
+
+def test_close_keeps_edits_queued_while_database_is_locked(db_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "CLOSE_RETRY_DELAYS", ())
+    manager = LockedDataManager(db_path)
+    queue = WriteBehindQueue(manager, delay=60)
+    queue.mark_dirty(CAPITAL_TABLE, '010', 2014, 300.0)
+
+    assert not queue.flush_and_wait(0.5)
+    assert not queue.close()
+    assert queue.pending == 1
+    assert values(manager)['010'] == 100.0
+
+    # Повторный close() пишет оставшиеся правки в вызывающем потоке
+    manager.locked = False
+    assert queue.close()
+    assert queue.pending == 0
+    assert values(manager)['010'] == 300.0
+
+
+def test_invalid_edit_goes_to_failed_without_blocking_others(db_path):
+    manager = FinancialDataManager(db_path)
+    queue = WriteBehindQueue(manager, delay=60)
+    queue.mark_dirty(CAPITAL_TABLE, '010', 2014, "не число")
+    queue.mark_dirty(CAPITAL_TABLE, '020', 2014, 25.0)
+
+    assert not queue.close()
+
+    assert queue.failed == {(DEFAULT_ENTITY, CAPITAL_TABLE, '010', 2014): "не число"}
+    assert queue.pending == 0
+    assert values(manager) == {'010': 100.0, '020': 25.0}
@@ -0,0 +1,75 @@
+# tests/test_year_comparisons.py
+import pytest
+
+from src.database.data_manager import FinancialDataManager, CAPITAL_TABLE
+
+# У acme нет данных за 2015 год, у globex - за 2014
+TABLES = {
+    "acme": [{'code': '010', 'parameter': "Уставный капитал", 'section': "Капитал",
+              '2013': 100.0, '2014': 120.0, '2016': 90.0},
+             {'code': '020', 'parameter': "Резервный капитал", 'section': "Капитал",
+              '2013': 10.0, '2014': 0, '2016': 12.0}],
+    "globex": [{'code': '010', 'parameter': "Уставный капитал", 'section': "Капитал",
+                '2013': 50.0, '2015': 60.0, '2016': 30.0}],
+}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = FinancialDataManager(str(tmp_path / "financial_data.db"))
+    for entity, rows in TABLES.items():
+        manager.save_table(CAPITAL_TABLE, rows, entity=entity)
+    return manager
+
+
+def by_key(rows):
+    return {(row['entity'], row['parameter_code'], row['year']): row for row in rows}
+
+
+@pytest.mark.parametrize("entity", sorted(TABLES))
+def test_lag_matches_value_changes_for_adjacent_years(manager, entity):
+    years = manager.list_years(entity, CAPITAL_TABLE)
+    comparisons = by_key(manager.get_year_comparisons(years, [entity], CAPITAL_TABLE))
+
+    for year in years:
+        for row in manager.get_data_for_years(year, entities=[entity], table_name=CAPITAL_TABLE):
+            window = comparisons[(entity, row['parameter_code'], year)]
+            assert (window['value'], window['base_value'], window['growth_rate'], window['absolute_change']) == \
+                   (row['main_year'], row['previous_year'], row['growth_rate'], row['absolute_change'])
+
+
+def test_lag_over_non_contiguous_years(manager):
+    rows = by_key(manager.get_year_comparisons([2013, 2014, 2016, 2010, 2015], ["acme", "globex"],
+                                               CAPITAL_TABLE, lag=2))
+
+    # Сравнение с годом на две позиции раньше в списке, а не на два года раньше
+    row = rows[("acme", '010', 2016)]
+    assert (row['base_year'], row['base_value'], row['absolute_change']) == (2013, 100.0, -10.0)
+    assert row['growth_rate'] == pytest.approx(90.0)
+    row = rows[("globex", '010', 2015)]
+    assert (row['base_year'], row['base_value'], row['growth_rate']) == (2016, 30.0, 200.0)
+    # Первые lag лет списка не с чем сравнивать
+    assert rows[("acme", '010', 2014)]['base_year'] is None
+    # 2010 года нет в таблице: его значение - NULL, а не ноль
+    row = rows[("acme", '010', 2010)]
+    assert (row['base_year'], row['base_value'], row['growth_rate']) == (2014, 120.0, None)
+
+
+def test_missing_years_give_null(manager):
+    rows = by_key(manager.get_year_comparisons([2015, 2016], ["acme", "globex"], CAPITAL_TABLE))
+
+    row = rows[("acme", '010', 2016)]
+    assert row['base_year'] == 2015
+    assert (row['base_value'], row['growth_rate'], row['absolute_change']) == (None, None, None)
+    # Год с данными в таблице, но без значения строки - ноль
+    row = rows[("globex", '010', 2016)]
+    assert (row['base_value'], row['absolute_change']) == (60.0, -30.0)
+    # Нулевое значение существующего года - ноль, темп роста - NULL
+    row = manager.get_year_comparisons([2014, 2016], ["acme"], CAPITAL_TABLE)[-1]
+    assert (row['parameter_code'], row['base_value'], row['growth_rate'], row['absolute_change']) == \
+           ('020', 0.0, None, 12.0)
+
+    # Явно заданный год сравнения без данных - тот же результат через get_data_for_years
+    explicit = {row['parameter_code']: row for row in manager.get_data_for_years(
+        2016, 2015, ["acme"], CAPITAL_TABLE)}
+    assert (explicit['010']['previous_year'], explicit['010']['growth_rate']) == (None, None)